@@ -2,6 +2,6 @@
 Bot Package Initialization
 """
 
-from bot import handlers, callbacks, keyboards, states
+from bot import handlers, callbacks, keyboards, states, stats, update_processor
 
-__all__ = ['handlers', 'callbacks', 'keyboards', 'states']
\ No newline at end of file
+__all__ = ['handlers', 'callbacks', 'keyboards', 'states', 'stats', 'update_processor']
\ No newline at end of file
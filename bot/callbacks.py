@@ -2,560 +2,364 @@
 Button Callback Handlers
 """
 
+import asyncio
 import logging
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, FrozenSet, List, Set, Tuple
+from pypdf import PdfReader
 from telegram import Update
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes
 
+from config.settings import MAX_CONCURRENT_JOBS, UPLOAD_TIMEOUT
 from config.texts import get_text
 from bot.keyboards import *
-from bot.states import UserStateManager, set_user_language, get_user_language
+from bot.stats import record_pdf_processed
+from bot.states import States, UserStateManager, set_user_language, get_user_language
 from utils.subscriber_manager import add_subscriber, remove_subscriber, is_subscribed
-from utils.file_manager import cleanup_files, get_file_size_mb
+from utils.file_manager import get_file_size_mb, load_document, schedule_cleanup
 from services.pdf_organizer import merge_pdfs
 from services.image_processor import images_to_pdf
 
 logger = logging.getLogger(__name__)
 state_manager = UserStateManager()
 
+# Bounds how many merge / images-to-PDF jobs run at the same time
+_pdf_job_semaphore = asyncio.Semaphore(MAX_CONCURRENT_JOBS)
+
+# Strong references to fire-and-forget tasks; the event loop only keeps weak ones
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def _spawn(coro: Awaitable) -> asyncio.Task:
+    """Schedule a coroutine without awaiting it"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    task.add_done_callback(_log_task_error)
+    return task
+
+
+def _log_task_error(task: asyncio.Task) -> None:
+    """Retrieve a background task's exception so it is logged rather than lost"""
+    if task.cancelled():
+        return
+    error = task.exception()
+    if isinstance(error, BadRequest):
+        # e.g. "Query is too old" when a tap is answered late; nothing to recover
+        logger.debug("Background Bot API call rejected: %s", error)
+    elif error is not None:
+        logger.error("Background task failed: %s", error, exc_info=error)
+
 
 async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle all button callbacks"""
     query = update.callback_query
-    await query.answer()
+    # Acknowledge in the background; the handler doesn't need to wait for it
+    _spawn(query.answer())
     
     user_id = update.effective_user.id
     data = query.data
     lang = get_user_language(user_id)
     
-    logger.info(f"User {user_id} clicked button: {data}")
+    logger.debug("User %s clicked button: %s", user_id, data)
     
-    # Language selection
-    if data.startswith("lang_"):
+    # Language selection (fixed-width prefix, compared by slice)
+    if data[:5] == "lang_":
         await handle_language_selection(query, user_id, data)
         return
     
-    # Navigation
-    if data == "back_to_menu":
-        state_manager.clear_state(user_id)
-        await query.edit_message_text(
-            get_text(lang, "choose_action"),
-            reply_markup=get_main_keyboard(user_id)
-        )
-        return
-    
     # Main menu categories
-    if data == "menu_organize":
-        await query.edit_message_text(
-            get_text(lang, "choose_action"),
-            reply_markup=get_organize_keyboard(user_id)
-        )
-        return
-    
-    if data == "menu_optimize":
-        await query.edit_message_text(
-            get_text(lang, "choose_action"),
-            reply_markup=get_optimize_keyboard(user_id)
-        )
-        return
-    
-    if data == "menu_convert":
-        await query.edit_message_text(
-            get_text(lang, "choose_action"),
-            reply_markup=get_convert_keyboard(user_id)
-        )
-        return
-    
-    if data == "menu_edit":
+    keyboard_factory = MENU_KEYBOARDS.get(data)
+    if keyboard_factory is not None:
         await query.edit_message_text(
             get_text(lang, "choose_action"),
-            reply_markup=get_edit_keyboard(user_id)
+            reply_markup=keyboard_factory(lang=lang)
         )
         return
     
-    if data == "menu_security":
-        await query.edit_message_text(
-            get_text(lang, "choose_action"),
-            reply_markup=get_security_keyboard(user_id)
-        )
-        return
-    
-    # Organize PDF operations
-    if data == "merge":
-        await handle_merge_start(query, user_id, lang)
-        return
-    
-    if data == "do_merge":
-        await handle_do_merge(query, user_id, lang, context)
-        return
-    
-    if data == "split":
-        await handle_split_start(query, user_id, lang)
-        return
-    
-    if data == "extract_pages":
-        await handle_extract_pages_start(query, user_id, lang)
-        return
-    
-    if data == "remove_pages":
-        await handle_remove_pages_start(query, user_id, lang)
-        return
-    
-    if data == "extract_images":
-        await handle_extract_images_start(query, user_id, lang)
-        return
-    
-    if data == "extract_text":
-        await handle_extract_text_start(query, user_id, lang)
-        return
-    
-    # Optimize PDF operations
-    if data == "compress":
-        await handle_compress_start(query, user_id, lang)
-        return
-    
-    if data == "repair":
-        await handle_repair_start(query, user_id, lang)
-        return
-    
-    if data == "ocr":
-        await handle_ocr_start(query, user_id, lang)
-        return
-    
-    # Convert PDF operations
-    if data in ["jpg_to_pdf", "png_to_pdf", "convert"]:
-        await handle_images_to_pdf_start(query, user_id, lang)
-        return
-    
-    if data == "create_pdf_from_images":
-        await handle_create_pdf_from_images(query, user_id, lang, context)
+    # Operations, navigation and subscription management
+    handler = CALLBACK_DISPATCH.get(data)
+    if handler is not None:
+        await handler(query, user_id, lang, context)
         return
     
-    if data == "word_to_pdf":
-        await handle_word_to_pdf_start(query, user_id, lang)
-        return
-    
-    if data == "excel_to_pdf":
-        await handle_excel_to_pdf_start(query, user_id, lang)
-        return
-    
-    if data == "powerpoint_to_pdf":
-        await handle_powerpoint_to_pdf_start(query, user_id, lang)
-        return
-    
-    if data == "pdf_to_jpg":
-        await handle_pdf_to_jpg_start(query, user_id, lang)
-        return
-    
-    if data == "pdf_to_word":
-        await handle_pdf_to_word_start(query, user_id, lang)
-        return
-    
-    # Edit PDF operations
-    if data == "rotate":
-        await handle_rotate_start(query, user_id, lang)
-        return
-    
-    if data == "add_page_numbers":
-        await handle_page_numbers_start(query, user_id, lang)
-        return
-    
-    if data == "watermark":
-        await handle_watermark_start(query, user_id, lang)
-        return
-    
-    # Security operations
-    if data == "unlock":
-        await handle_unlock_start(query, user_id, lang)
-        return
-    
-    if data == "protect":
-        await handle_protect_start(query, user_id, lang)
-        return
-    
-    # Subscription management
-    if data == "subscribe_coming":
-        if not is_subscribed(user_id):
-            add_subscriber(user_id)
-            await query.edit_message_text(
-                f"✅ {get_text(lang, 'subscribed')}\n\n{get_text(lang, 'coming_soon')}",
-                reply_markup=get_back_keyboard(user_id)
-            )
-        else:
-            await query.edit_message_text(
-                f"✅ {get_text(lang, 'already_subscribed')}",
-                reply_markup=get_back_keyboard(user_id)
-            )
-        return
-    
-    if data == "unsubscribe_coming":
-        if is_subscribed(user_id):
-            remove_subscriber(user_id)
-            await query.edit_message_text(
-                f"🔕 {get_text(lang, 'unsubscribed')}",
-                reply_markup=get_back_keyboard(user_id)
-            )
-        else:
-            await query.edit_message_text(
-                f"ℹ️ {get_text(lang, 'not_subscribed')}",
-                reply_markup=get_back_keyboard(user_id)
-            )
-        return
-    
-    # Coming soon features
-    await handle_coming_soon(query, user_id, lang, data)
+    # Coming soon features; anything else is stale or forged callback data
+    if data in _KNOWN_COMING_SOON:
+        await handle_coming_soon(query, user_id, lang, data)
+    else:
+        logger.debug("Unknown callback data from user %s: %s", user_id, data)
 
 
 async def handle_language_selection(query, user_id: int, data: str) -> None:
     """Handle language selection"""
-    lang_code = data.split("_")[1]
+    lang_code = data[5:]
     set_user_language(user_id, lang_code)
     
     await query.edit_message_text(
         get_text(lang_code, "language_changed"),
-        reply_markup=get_main_keyboard(user_id)
+        reply_markup=get_main_keyboard(lang=lang_code)
     )
 
 
-async def handle_merge_start(query, user_id: int, lang: str) -> None:
-    """Start PDF merging"""
-    state_manager.set_state(user_id, "merging")
-    state_manager.clear_files(user_id)
-    
+async def handle_back_to_menu(query, user_id: int, lang: str, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Return to the main menu"""
+    state_manager.clear_state(user_id)
     await query.edit_message_text(
-        get_text(lang, "send_pdfs"),
-        reply_markup=get_back_keyboard(user_id),
-        parse_mode="Markdown"
+        get_text(lang, "choose_action"),
+        reply_markup=get_main_keyboard(lang=lang)
     )
 
 
-async def handle_do_merge(query, user_id: int, lang: str, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Execute PDF merging"""
-    files = state_manager.get_files(user_id)
-    
-    if len(files) < 2:
-        await query.edit_message_text(
-            get_text(lang, "no_pdfs"),
-            reply_markup=get_main_keyboard(user_id)
-        )
-        return
-    
-    await query.edit_message_text(
-        get_text(lang, "merging_pdfs", count=len(files))
-    )
+async def handle_subscribe(query, user_id: int, lang: str, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Subscribe user to coming soon notifications"""
+    text = _subscription_message(lang, "subscribed" if add_subscriber(user_id) else "already_subscribed")
     
-    try:
-        output_path = await merge_pdfs(files)
-        
-        # Get file info
-        from PyPDF2 import PdfReader
-        reader = PdfReader(output_path)
-        total_pages = len(reader.pages)
-        file_size = get_file_size_mb(output_path)
-        
-        await context.bot.send_document(
-            chat_id=user_id,
-            document=open(output_path, 'rb'),
-            filename="merged.pdf",
-            caption=get_text(lang, "pdfs_merged",
-                           pages=total_pages,
-                           size=f"{file_size:.2f}MB")
-        )
-        
-        await context.bot.send_message(
-            chat_id=user_id,
-            text=get_text(lang, "success"),
-            reply_markup=get_main_keyboard(user_id)
-        )
-        
-        cleanup_files(files + [output_path])
-        state_manager.clear_state(user_id)
-        state_manager.clear_files(user_id)
-        
-    except Exception as e:
-        logger.error(f"Merge error: {e}", exc_info=True)
-        await context.bot.send_message(
-            chat_id=user_id,
-            text=get_text(lang, "error"),
-            reply_markup=get_main_keyboard(user_id)
-        )
-
-
-async def handle_split_start(query, user_id: int, lang: str) -> None:
-    """Start PDF splitting"""
-    state_manager.set_state(user_id, "splitting")
-    
-    await query.edit_message_text(
-        get_text(lang, "send_pdf_for_split"),
-        reply_markup=get_back_keyboard(user_id),
-        parse_mode="Markdown"
-    )
-
-
-async def handle_extract_pages_start(query, user_id: int, lang: str) -> None:
-    """Start page extraction"""
-    state_manager.set_state(user_id, "extracting_pages")
-    
-    await query.edit_message_text(
-        get_text(lang, "send_pdf_for_extract_pages"),
-        reply_markup=get_back_keyboard(user_id),
-        parse_mode="Markdown"
-    )
+    await query.edit_message_text(text, reply_markup=get_back_keyboard(lang=lang))
 
 
-async def handle_remove_pages_start(query, user_id: int, lang: str) -> None:
-    """Start page removal"""
-    state_manager.set_state(user_id, "removing_pages")
+async def handle_unsubscribe(query, user_id: int, lang: str, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Unsubscribe user from coming soon notifications"""
+    text = _subscription_message(lang, "unsubscribed" if remove_subscriber(user_id) else "not_subscribed")
     
-    await query.edit_message_text(
-        get_text(lang, "send_pdf_for_remove_pages"),
-        reply_markup=get_back_keyboard(user_id),
-        parse_mode="Markdown"
-    )
+    await query.edit_message_text(text, reply_markup=get_back_keyboard(lang=lang))
 
 
-async def handle_extract_images_start(query, user_id: int, lang: str) -> None:
-    """Start image extraction"""
-    state_manager.set_state(user_id, "extracting_images")
-    
-    await query.edit_message_text(
-        get_text(lang, "send_pdf_for_extract_images"),
-        reply_markup=get_back_keyboard(user_id),
-        parse_mode="Markdown"
-    )
+@lru_cache(maxsize=32)
+def _subscription_message(lang: str, key: str) -> str:
+    """Compose a subscription status message (built once per language and status)"""
+    text = f"{_SUBSCRIPTION_ICONS[key]} {get_text(lang, key)}"
+    if key == "subscribed":
+        text += f"\n\n{get_text(lang, 'coming_soon')}"
+    return text
 
 
-async def handle_extract_text_start(query, user_id: int, lang: str) -> None:
-    """Start text extraction"""
-    state_manager.set_state(user_id, "extracting_text")
+async def handle_operation_start(query, user_id: int, lang: str, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Start a single-PDF operation described in _START_SPECS"""
+    state, text_key = _START_SPECS[query.data]
+    state_manager.set_state(user_id, state)
     
     await query.edit_message_text(
-        get_text(lang, "send_pdf_for_extract_text"),
-        reply_markup=get_back_keyboard(user_id),
+        get_text(lang, text_key),
+        reply_markup=get_back_keyboard(lang=lang),
         parse_mode="Markdown"
     )
 
 
-async def handle_compress_start(query, user_id: int, lang: str) -> None:
-    """Start PDF compression"""
-    state_manager.set_state(user_id, "compressing")
+async def handle_merge_start(query, user_id: int, lang: str, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Start PDF merging"""
+    state_manager.set_state(user_id, States.MERGING)
+    state_manager.clear_files(user_id)
     
     await query.edit_message_text(
-        get_text(lang, "send_pdf_for_compress"),
-        reply_markup=get_back_keyboard(user_id),
+        get_text(lang, "send_pdfs"),
+        reply_markup=get_back_keyboard(lang=lang),
         parse_mode="Markdown"
     )
 
 
-async def handle_repair_start(query, user_id: int, lang: str) -> None:
-    """Start PDF repair"""
-    state_manager.set_state(user_id, "repairing")
+async def handle_do_merge(query, user_id: int, lang: str, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Execute PDF merging"""
+    # Let uploads sent before the tap finish downloading first
+    await context.application.update_processor.wait_for_chat(user_id)
+    if len(state_manager.get_files(user_id)) < 2:
+        await query.edit_message_text(
+            get_text(lang, "no_pdfs"),
+            reply_markup=get_main_keyboard(lang=lang)
+        )
+        return
     
+    # Taken before the first await, so a repeated tap finds the list empty
+    files = state_manager.take_files(user_id)
     await query.edit_message_text(
-        get_text(lang, "send_pdf_for_repair"),
-        reply_markup=get_back_keyboard(user_id),
-        parse_mode="Markdown"
+        get_text(lang, "merging_pdfs", count=len(files))
     )
-
-
-async def handle_ocr_start(query, user_id: int, lang: str) -> None:
-    """Start OCR processing"""
-    state_manager.set_state(user_id, "ocr_processing")
     
-    await query.edit_message_text(
-        get_text(lang, "send_pdf_for_ocr"),
-        reply_markup=get_back_keyboard(user_id),
-        parse_mode="Markdown"
+    await _produce_and_send(
+        query, user_id, lang, context, files,
+        producer=merge_pdfs,
+        filename="merged.pdf",
+        caption_key="pdfs_merged"
     )
 
 
-async def handle_images_to_pdf_start(query, user_id: int, lang: str) -> None:
+async def handle_images_to_pdf_start(query, user_id: int, lang: str, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Start collecting images for PDF"""
-    state_manager.set_state(user_id, "collecting_images")
+    state_manager.set_state(user_id, States.COLLECTING_IMAGES)
     state_manager.clear_files(user_id)
     
     await query.edit_message_text(
         get_text(lang, "send_images"),
-        reply_markup=get_cancel_keyboard(user_id),
+        reply_markup=get_cancel_keyboard(lang=lang),
         parse_mode="Markdown"
     )
 
 
 async def handle_create_pdf_from_images(query, user_id: int, lang: str, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Create PDF from collected images"""
-    images = state_manager.get_files(user_id)
-    
-    if not images:
+    await context.application.update_processor.wait_for_chat(user_id)
+    if not state_manager.get_files(user_id):
         await query.edit_message_text(
             get_text(lang, "no_images"),
-            reply_markup=get_main_keyboard(user_id)
+            reply_markup=get_main_keyboard(lang=lang)
         )
         return
     
+    images = state_manager.take_files(user_id)
     await query.edit_message_text(
         get_text(lang, "creating_pdf", count=len(images))
     )
     
+    await _produce_and_send(
+        query, user_id, lang, context, images,
+        producer=images_to_pdf,
+        filename="images.pdf",
+        caption_key="pdf_created"
+    )
+
+
+async def _produce_and_send(query, user_id: int, lang: str, context: ContextTypes.DEFAULT_TYPE,
+                            files: List[str], producer: Callable[[List[str]], Awaitable[str]],
+                            filename: str, caption_key: str) -> None:
+    """Build a PDF from the user's collected files, send it and clean up"""
     try:
-        output_path = await images_to_pdf(images)
+        if _pdf_job_semaphore.locked():
+            await query.edit_message_text(get_text(lang, "job_queued"))
         
-        # Get file info
-        from PyPDF2 import PdfReader
-        reader = PdfReader(output_path)
-        total_pages = len(reader.pages)
+        async with _pdf_job_semaphore:
+            output_path = await producer(files)
+        
+        # Get file info (parsing and reading the output happen off the event loop)
+        total_pages = await asyncio.to_thread(_count_pages, output_path)
         file_size = get_file_size_mb(output_path)
+        document = await load_document(output_path, filename)
         
-        await context.bot.send_document(
-            chat_id=user_id,
-            document=open(output_path, 'rb'),
-            filename="images.pdf",
-            caption=get_text(lang, "pdf_created",
+        caption = get_text(lang, caption_key,
                            pages=total_pages,
                            size=f"{file_size:.2f}MB")
-        )
         
-        await context.bot.send_message(
+        await context.bot.send_document(
             chat_id=user_id,
-            text=get_text(lang, "success"),
-            reply_markup=get_main_keyboard(user_id)
+            document=document,
+            caption=f"{caption}\n\n{get_text(lang, 'success')}",
+            reply_markup=get_main_keyboard(lang=lang),
+            read_timeout=UPLOAD_TIMEOUT,
+            write_timeout=UPLOAD_TIMEOUT
         )
         
-        cleanup_files(images + [output_path])
+        # Unlink in the background so the handler returns right away
+        schedule_cleanup(files + [output_path])
+        record_pdf_processed()
         state_manager.clear_state(user_id)
-        state_manager.clear_files(user_id)
         
     except Exception as e:
-        logger.error(f"Images to PDF error: {e}", exc_info=True)
-        await context.bot.send_message(
-            chat_id=user_id,
-            text=get_text(lang, "error"),
-            reply_markup=get_main_keyboard(user_id)
-        )
-
-
-async def handle_word_to_pdf_start(query, user_id: int, lang: str) -> None:
-    """Start Word to PDF conversion"""
-    state_manager.set_state(user_id, "word_to_pdf")
-    
-    await query.edit_message_text(
-        get_text(lang, "send_files"),
-        reply_markup=get_back_keyboard(user_id),
-        parse_mode="Markdown"
+        logger.exception("%s error: %s", producer.__name__, e)
+        # Hand the files back so the user can try again
+        state_manager.session(user_id).files[:0] = files
+        await _send_error(context, user_id, lang)
+
+
+async def _send_error(context: ContextTypes.DEFAULT_TYPE, user_id: int, lang: str) -> None:
+    """Tell the user an operation failed and offer the main menu"""
+    await context.bot.send_message(
+        chat_id=user_id,
+        text=get_text(lang, "error"),
+        reply_markup=get_main_keyboard(lang=lang)
     )
 
 
-async def handle_excel_to_pdf_start(query, user_id: int, lang: str) -> None:
-    """Start Excel to PDF conversion"""
-    state_manager.set_state(user_id, "excel_to_pdf")
-    
-    await query.edit_message_text(
-        get_text(lang, "send_files"),
-        reply_markup=get_back_keyboard(user_id),
-        parse_mode="Markdown"
-    )
-
-
-async def handle_powerpoint_to_pdf_start(query, user_id: int, lang: str) -> None:
-    """Start PowerPoint to PDF conversion"""
-    state_manager.set_state(user_id, "powerpoint_to_pdf")
-    
-    await query.edit_message_text(
-        get_text(lang, "send_files"),
-        reply_markup=get_back_keyboard(user_id),
-        parse_mode="Markdown"
-    )
-
-
-async def handle_pdf_to_jpg_start(query, user_id: int, lang: str) -> None:
-    """Start PDF to JPG conversion"""
-    state_manager.set_state(user_id, "pdf_to_jpg")
-    
-    await query.edit_message_text(
-        get_text(lang, "send_one_pdf"),
-        reply_markup=get_back_keyboard(user_id),
-        parse_mode="Markdown"
-    )
+def _count_pages(pdf_path: str) -> int:
+    """Return the number of pages in a PDF"""
+    return len(PdfReader(pdf_path).pages)
 
 
-async def handle_pdf_to_word_start(query, user_id: int, lang: str) -> None:
-    """Start PDF to Word conversion"""
-    state_manager.set_state(user_id, "pdf_to_word")
-    
-    await query.edit_message_text(
-        get_text(lang, "send_one_pdf"),
-        reply_markup=get_back_keyboard(user_id),
-        parse_mode="Markdown"
-    )
-
-
-async def handle_rotate_start(query, user_id: int, lang: str) -> None:
-    """Start PDF rotation"""
-    state_manager.set_state(user_id, "rotating")
-    
-    await query.edit_message_text(
-        get_text(lang, "send_pdf_for_rotate"),
-        reply_markup=get_back_keyboard(user_id),
-        parse_mode="Markdown"
-    )
-
-
-async def handle_page_numbers_start(query, user_id: int, lang: str) -> None:
-    """Start adding page numbers"""
-    state_manager.set_state(user_id, "adding_page_numbers")
-    
-    await query.edit_message_text(
-        get_text(lang, "send_one_pdf"),
-        reply_markup=get_back_keyboard(user_id),
-        parse_mode="Markdown"
-    )
-
-
-async def handle_watermark_start(query, user_id: int, lang: str) -> None:
-    """Start adding watermark"""
-    state_manager.set_state(user_id, "adding_watermark")
-    
+async def handle_coming_soon(query, user_id: int, lang: str, feature: str) -> None:
+    """Handle coming soon features"""
     await query.edit_message_text(
-        get_text(lang, "send_pdf_for_watermark"),
-        reply_markup=get_back_keyboard(user_id),
-        parse_mode="Markdown"
+        get_text(lang, "coming_soon"),
+        reply_markup=_coming_soon_keyboard(lang, is_subscribed(user_id))
     )
 
 
-async def handle_unlock_start(query, user_id: int, lang: str) -> None:
-    """Start unlocking PDF"""
-    state_manager.set_state(user_id, "unlocking")
+@lru_cache(maxsize=64)
+def _coming_soon_keyboard(lang: str, subscribed: bool) -> InlineKeyboardMarkup:
+    """Notify-me / cancel keyboard for coming soon features (built once per variant)"""
+    if subscribed:
+        toggle = InlineKeyboardButton("🔕 " + get_text(lang, "cancel"), callback_data="unsubscribe_coming")
+    else:
+        toggle = InlineKeyboardButton("🔔 " + get_text(lang, "notify_me"), callback_data="subscribe_coming")
+    
+    return InlineKeyboardMarkup([
+        [toggle],
+        [get_back_button(lang)]
+    ])
+
+
+_SUBSCRIPTION_ICONS: Dict[str, str] = {
+    "subscribed": "✅",
+    "already_subscribed": "✅",
+    "unsubscribed": "🔕",
+    "not_subscribed": "ℹ️",
+}
+
+# Callback data -> (state to enter, instruction text key)
+_START_SPECS: Dict[str, Tuple[States, str]] = {
+    # Organize
+    "split": (States.SPLITTING, "send_pdf_for_split"),
+    "extract_pages": (States.EXTRACTING_PAGES, "send_pdf_for_extract_pages"),
+    "remove_pages": (States.REMOVING_PAGES, "send_pdf_for_remove_pages"),
+    "extract_images": (States.EXTRACTING_IMAGES, "send_pdf_for_extract_images"),
+    "extract_text": (States.EXTRACTING_TEXT, "send_pdf_for_extract_text"),
+    
+    # Optimize
+    "compress": (States.COMPRESSING, "send_pdf_for_compress"),
+    "repair": (States.REPAIRING, "send_pdf_for_repair"),
+    "ocr": (States.OCR_PROCESSING, "send_pdf_for_ocr"),
+    
+    # Convert
+    "word_to_pdf": (States.WORD_TO_PDF, "send_files"),
+    "excel_to_pdf": (States.EXCEL_TO_PDF, "send_files"),
+    "powerpoint_to_pdf": (States.POWERPOINT_TO_PDF, "send_files"),
+    "pdf_to_jpg": (States.PDF_TO_JPG, "send_one_pdf"),
+    "pdf_to_word": (States.PDF_TO_WORD, "send_one_pdf"),
+    
+    # Edit
+    "rotate": (States.ROTATING, "send_pdf_for_rotate"),
+    "add_page_numbers": (States.ADDING_PAGE_NUMBERS, "send_one_pdf"),
+    "watermark": (States.ADDING_WATERMARK, "send_pdf_for_watermark"),
+    
+    # Security
+    "unlock": (States.UNLOCKING, "send_pdf_for_unlock"),
+    "protect": (States.PROTECTING, "send_pdf_for_protect"),
+}
+
+# Buttons shown in the menus for features that aren't implemented yet
+_KNOWN_COMING_SOON: FrozenSet[str] = frozenset({"crop", "sign", "redact", "compare"})
+
+MENU_KEYBOARDS: Dict[str, Callable[..., InlineKeyboardMarkup]] = {
+    "menu_organize": get_organize_keyboard,
+    "menu_optimize": get_optimize_keyboard,
+    "menu_convert": get_convert_keyboard,
+    "menu_edit": get_edit_keyboard,
+    "menu_security": get_security_keyboard,
+}
+
+CALLBACK_DISPATCH: Dict[str, Callable[..., Awaitable[None]]] = {
+    # Navigation
+    "back_to_menu": handle_back_to_menu,
     
-    await query.edit_message_text(
-        get_text(lang, "send_pdf_for_unlock"),
-        reply_markup=get_back_keyboard(user_id),
-        parse_mode="Markdown"
-    )
-
-
-async def handle_protect_start(query, user_id: int, lang: str) -> None:
-    """Start protecting PDF"""
-    state_manager.set_state(user_id, "protecting")
+    # Multi-file operations
+    "merge": handle_merge_start,
+    "do_merge": handle_do_merge,
+    "jpg_to_pdf": handle_images_to_pdf_start,
+    "png_to_pdf": handle_images_to_pdf_start,
+    "convert": handle_images_to_pdf_start,
+    "create_pdf_from_images": handle_create_pdf_from_images,
     
-    await query.edit_message_text(
-        get_text(lang, "send_pdf_for_protect"),
-        reply_markup=get_back_keyboard(user_id),
-        parse_mode="Markdown"
-    )
-
-
-async def handle_coming_soon(query, user_id: int, lang: str, feature: str) -> None:
-    """Handle coming soon features"""
-    if is_subscribed(user_id):
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🔕 " + get_text(lang, "cancel"), callback_data="unsubscribe_coming")],
-            [InlineKeyboardButton(get_text(lang, "back"), callback_data="back_to_menu")]
-        ])
-    else:
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🔔 " + get_text(lang, "notify_me"), callback_data="subscribe_coming")],
-            [InlineKeyboardButton(get_text(lang, "back"), callback_data="back_to_menu")]
-        ])
+    # Single-PDF operations
+    **{data: handle_operation_start for data in _START_SPECS},
     
-    await query.edit_message_text(
-        get_text(lang, "coming_soon"),
-        reply_markup=keyboard
-    )
\ No newline at end of file
+    # Subscription management
+    "subscribe_coming": handle_subscribe,
+    "unsubscribe_coming": handle_unsubscribe,
+}
\ No newline at end of file
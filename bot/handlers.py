@@ -3,19 +3,24 @@ Message and Command Handlers
 """
 
 import logging
+import re
+from typing import Awaitable, Callable, Dict, Optional, Tuple
 from telegram import Update
 from telegram.ext import ContextTypes
 
 from config.texts import get_text
-from config.settings import ADMIN_IDS, MAX_FILE_SIZE_MB
+from config.settings import ADMIN_IDS, COMPRESSION_LEVELS, DEFAULT_LANGUAGE, MAX_FILE_SIZE_MB, SUPPORTED_LANGUAGES
 from bot.keyboards import (
     get_main_keyboard,
     get_language_keyboard,
-    get_back_keyboard
+    get_back_keyboard,
+    get_done_keyboard,
+    get_merge_keyboard
 )
-from bot.states import UserStateManager, get_user_language
-from utils.file_manager import download_file, cleanup_files, get_file_size_mb
-from utils.subscriber_manager import add_subscriber, remove_subscriber, is_subscribed
+from bot.states import States, UserStateManager, get_user_language
+from bot.stats import get_stats, record_pdf_processed
+from utils.file_manager import DownloadedFile, download_file, get_file_size_mb, load_document, schedule_cleanup
+from utils.subscriber_manager import add_subscriber, remove_subscriber
 from services.pdf_converter import convert_image_to_pdf, convert_document_to_pdf
 from services.pdf_organizer import merge_pdfs, extract_pages, remove_pages
 from services.pdf_optimizer import compress_pdf, repair_pdf
@@ -26,15 +31,33 @@ from services.image_processor import images_to_pdf
 logger = logging.getLogger(__name__)
 state_manager = UserStateManager()
 
+# Accepted text replies for rotation angle and compression level
+_ROTATION_RE = re.compile(r"^\s*(90|180|270)\s*$")
+_COMPRESSION_LEVEL_RE = re.compile(r"^\s*([123])\s*$")
+
+# Fixed command replies, resolved once per supported language at import
+_COMMAND_TEXT_KEYS = ("welcome", "help", "choose_language", "operation_cancelled", "choose_action")
+_COMMAND_TEXTS: Dict[str, Dict[str, str]] = {
+    language: {key: get_text(language, key) for key in _COMMAND_TEXT_KEYS}
+    for language in SUPPORTED_LANGUAGES
+}
+_ADMIN_ONLY_TEXT = "❌ Admin only command"
+
+
+def _command_text(lang: str, key: str) -> str:
+    """Look up a prebuilt command reply (unknown languages fall back to the default)"""
+    return _COMMAND_TEXTS.get(lang, _COMMAND_TEXTS[DEFAULT_LANGUAGE])[key]
+
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /start command"""
-    user_id = update.effective_user.id
-    user_name = update.effective_user.first_name
+    user = update.effective_user
+    user_id = user.id
+    user_name = user.first_name
     
-    logger.info(f"User {user_id} ({user_name}) started the bot")
+    logger.info("User %s (%s) started the bot", user_id, user_name)
     
-    welcome_text = get_text(get_user_language(user_id), "welcome")
+    welcome_text = _command_text(get_user_language(user_id), "welcome")
     
     await update.message.reply_text(
         welcome_text,
@@ -48,12 +71,12 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     user_id = update.effective_user.id
     lang = get_user_language(user_id)
     
-    help_text = get_text(lang, "help")
+    help_text = _command_text(lang, "help")
     
     await update.message.reply_text(
         help_text,
         parse_mode="Markdown",
-        reply_markup=get_main_keyboard(user_id)
+        reply_markup=get_main_keyboard(lang=lang)
     )
 
 
@@ -62,7 +85,7 @@ async def language_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     user_id = update.effective_user.id
     lang = get_user_language(user_id)
     
-    text = get_text(lang, "choose_language")
+    text = _command_text(lang, "choose_language")
     
     await update.message.reply_text(
         text,
@@ -79,11 +102,11 @@ async def cancel_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     state_manager.clear_state(user_id)
     state_manager.clear_files(user_id)
     
-    text = get_text(lang, "operation_cancelled")
+    text = _command_text(lang, "operation_cancelled")
     
     await update.message.reply_text(
         text,
-        reply_markup=get_main_keyboard(user_id)
+        reply_markup=get_main_keyboard(lang=lang)
     )
 
 
@@ -92,11 +115,7 @@ async def subscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     user_id = update.effective_user.id
     lang = get_user_language(user_id)
     
-    if is_subscribed(user_id):
-        text = get_text(lang, "already_subscribed")
-    else:
-        add_subscriber(user_id)
-        text = get_text(lang, "subscribed")
+    text = get_text(lang, "subscribed" if add_subscriber(user_id) else "already_subscribed")
     
     await update.message.reply_text(text)
 
@@ -106,11 +125,7 @@ async def unsubscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE
     user_id = update.effective_user.id
     lang = get_user_language(user_id)
     
-    if not is_subscribed(user_id):
-        text = get_text(lang, "not_subscribed")
-    else:
-        remove_subscriber(user_id)
-        text = get_text(lang, "unsubscribed")
+    text = get_text(lang, "unsubscribed" if remove_subscriber(user_id) else "not_subscribed")
     
     await update.message.reply_text(text)
 
@@ -118,631 +133,494 @@ async def unsubscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /stats command (admin only)"""
     user_id = update.effective_user.id
-    lang = get_user_language(user_id)
+    message = update.message
     
     if user_id not in ADMIN_IDS:
-        await update.message.reply_text("❌ Admin only command")
+        await message.reply_text(_ADMIN_ONLY_TEXT)
         return
     
-    # TODO: Implement statistics
+    stats = get_stats()
     stats_text = "📊 *Bot Statistics:*\n\n" \
-                 "Total users: Coming soon\n" \
-                 "Active today: Coming soon\n" \
-                 "PDFs processed: Coming soon"
+                 f"Total users: {stats['users']}\n" \
+                 f"Subscribers: {stats['subscribers']}\n" \
+                 f"PDFs processed: {stats['processed']}"
     
-    await update.message.reply_text(stats_text, parse_mode="Markdown")
+    await message.reply_text(stats_text, parse_mode="Markdown")
 
 
 async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle document uploads"""
     user_id = update.effective_user.id
+    message = update.message
     lang = get_user_language(user_id)
-    document = update.message.document
+    document = message.document
     
     # Check file size
     file_size_mb = document.file_size / (1024 * 1024)
     if file_size_mb > MAX_FILE_SIZE_MB:
-        await update.message.reply_text(
+        await message.reply_text(
             get_text(lang, "file_too_large", max_size=MAX_FILE_SIZE_MB)
         )
         return
     
     state = state_manager.get_state(user_id)
-    logger.info(f"User {user_id} uploaded document in state: {state}")
+    logger.info("User %s uploaded document in state: %s", user_id, state.name if state else None)
     
     try:
         # Download file
-        file_path = await download_file(
+        file = await download_file(
             context.bot,
             document.file_id,
             document.file_name
         )
         
-        # Handle based on state
-        if state == "merging":
-            await handle_merge_document(update, context, file_path)
-            
-        elif state == "compressing":
-            await handle_compress_document(update, context, file_path)
-            
-        elif state == "rotating":
-            await handle_rotate_document(update, context, file_path)
-            
-        elif state == "unlocking":
-            await handle_unlock_document(update, context, file_path)
-            
-        elif state == "protecting":
-            await handle_protect_document(update, context, file_path)
-            
-        elif state == "extracting_pages":
-            await handle_extract_pages_document(update, context, file_path)
-            
-        elif state == "removing_pages":
-            await handle_remove_pages_document(update, context, file_path)
-            
-        elif state == "adding_watermark":
-            await handle_watermark_document(update, context, file_path)
-            
-        elif state == "adding_page_numbers":
-            await handle_page_numbers_document(update, context, file_path)
-            
-        else:
-            # Default: convert to PDF
-            await handle_convert_document(update, context, file_path)
-            
+        # Handle based on state (default: convert to PDF)
+        handler = _DOC_HANDLERS.get(state, handle_convert_document)
+        await handler(update, context, file, lang)
+        
     except Exception as e:
-        logger.error(f"Error handling document: {e}", exc_info=True)
-        await update.message.reply_text(get_text(lang, "error"))
+        logger.exception("Error handling document: %s", e)
+        await message.reply_text(get_text(lang, "error"))
 
 
 async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle photo uploads"""
     user_id = update.effective_user.id
+    message = update.message
     lang = get_user_language(user_id)
-    photo = update.message.photo[-1]  # Get largest photo
+    photo = message.photo[-1]  # Get largest photo
     
-    state = state_manager.get_state(user_id)
-    logger.info(f"User {user_id} uploaded photo in state: {state}")
+    session = state_manager.session(user_id)
+    state = session.state
+    logger.info("User %s uploaded photo in state: %s", user_id, state.name if state else None)
     
     try:
         # Download photo
-        file_path = await download_file(
+        file_path = (await download_file(
             context.bot,
             photo.file_id,
-            f"image_{user_id}_{len(state_manager.get_files(user_id))}.jpg"
-        )
+            f"image_{user_id}_{len(session.files)}.jpg"
+        )).path
         
-        if state == "collecting_images":
+        if state is States.COLLECTING_IMAGES:
             # Add to image collection
-            state_manager.add_file(user_id, file_path)
-            count = len(state_manager.get_files(user_id))
+            session.files.append(file_path)
+            count = len(session.files)
             
-            from bot.keyboards import get_done_keyboard
-            await update.message.reply_text(
+            await message.reply_text(
                 get_text(lang, "images_count", count=count),
-                reply_markup=get_done_keyboard(user_id),
+                reply_markup=get_done_keyboard(lang=lang),
                 parse_mode="Markdown"
             )
             
-        elif state == "adding_watermark" and state_manager.get_temp(user_id, "pdf_path"):
+        elif state is States.ADDING_WATERMARK and session.temp.get("pdf_path"):
             # This is the watermark image
-            await handle_watermark_image(update, context, file_path)
+            await handle_watermark_image(update, context, file_path, lang)
             
         else:
             # Default: convert single image to PDF
-            await handle_convert_image(update, context, file_path)
+            await handle_convert_image(update, context, file_path, lang)
             
     except Exception as e:
-        logger.error(f"Error handling photo: {e}", exc_info=True)
-        await update.message.reply_text(get_text(lang, "error"))
+        logger.exception("Error handling photo: %s", e)
+        await message.reply_text(get_text(lang, "error"))
 
 
 async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle text messages"""
+    message = update.message
     user_id = update.effective_user.id
     lang = get_user_language(user_id)
-    text = update.message.text
+    text = message.text
     
     state = state_manager.get_state(user_id)
-    logger.info(f"User {user_id} sent text in state: {state}")
+    logger.info("User %s sent text in state: %s", user_id, state.name if state else None)
     
     try:
-        if state == "rotating_wait_angle":
-            await handle_rotation_angle(update, context, text)
-            
-        elif state == "unlocking_wait_password":
-            await handle_unlock_password(update, context, text)
-            
-        elif state == "protecting_wait_password":
-            await handle_protect_password(update, context, text)
-            
-        elif state == "extracting_pages_wait_spec":
-            await handle_extract_pages_spec(update, context, text)
-            
-        elif state == "removing_pages_wait_spec":
-            await handle_remove_pages_spec(update, context, text)
-            
-        elif state == "compressing_wait_level":
-            await handle_compression_level(update, context, text)
-            
+        handler = _TEXT_HANDLERS.get(state)
+        if handler is not None:
+            await handler(update, context, text, lang)
         else:
             # Unknown state or no operation pending
-            await update.message.reply_text(
-                get_text(lang, "choose_action"),
-                reply_markup=get_main_keyboard(user_id)
+            await message.reply_text(
+                _command_text(lang, "choose_action"),
+                reply_markup=get_main_keyboard(lang=lang)
             )
-            
+        
     except Exception as e:
-        logger.error(f"Error handling text: {e}", exc_info=True)
-        await update.message.reply_text(get_text(lang, "error"))
+        logger.exception("Error handling text: %s", e)
+        await message.reply_text(get_text(lang, "error"))
 
 
 # Helper functions for specific operations
 
-async def handle_merge_document(update: Update, context: ContextTypes.DEFAULT_TYPE, file_path: str) -> None:
+async def handle_merge_document(update: Update, context: ContextTypes.DEFAULT_TYPE, file: DownloadedFile, lang: str) -> None:
     """Handle document for merging"""
     user_id = update.effective_user.id
-    lang = get_user_language(user_id)
+    message = update.message
+    file_path = file.path
     
-    if not file_path.lower().endswith('.pdf'):
-        await update.message.reply_text("❌ Please send PDF files only")
-        cleanup_files([file_path])
+    if not file.is_pdf:
+        await message.reply_text("❌ Please send PDF files only")
+        schedule_cleanup([file_path])
         return
     
     state_manager.add_file(user_id, file_path)
     count = len(state_manager.get_files(user_id))
     
-    from bot.keyboards import get_merge_keyboard
-    await update.message.reply_text(
+    await message.reply_text(
         get_text(lang, "pdfs_count", count=count),
-        reply_markup=get_merge_keyboard(user_id, count),
+        reply_markup=get_merge_keyboard(user_id, count, lang=lang),
         parse_mode="Markdown"
     )
 
 
-async def handle_compress_document(update: Update, context: ContextTypes.DEFAULT_TYPE, file_path: str) -> None:
-    """Handle document for compression"""
+async def handle_pdf_intake(update: Update, context: ContextTypes.DEFAULT_TYPE, file: DownloadedFile, lang: str) -> None:
+    """Store an uploaded PDF and ask for the input its operation needs (see _PDF_INTAKE)"""
     user_id = update.effective_user.id
-    lang = get_user_language(user_id)
-    
-    if not file_path.lower().endswith('.pdf'):
-        await update.message.reply_text("❌ Please send a PDF file")
-        cleanup_files([file_path])
-        return
-    
-    # Ask for compression level
-    state_manager.set_temp(user_id, "pdf_path", file_path)
-    state_manager.set_state(user_id, "compressing_wait_level")
-    
-    await update.message.reply_text(
-        get_text(lang, "enter_compression_level"),
-        parse_mode="Markdown"
-    )
-
-
-async def handle_rotate_document(update: Update, context: ContextTypes.DEFAULT_TYPE, file_path: str) -> None:
-    """Handle document for rotation"""
-    user_id = update.effective_user.id
-    lang = get_user_language(user_id)
-    
-    if not file_path.lower().endswith('.pdf'):
-        await update.message.reply_text("❌ Please send a PDF file")
-        cleanup_files([file_path])
-        return
-    
-    state_manager.set_temp(user_id, "pdf_path", file_path)
-    state_manager.set_state(user_id, "rotating_wait_angle")
+    message = update.message
     
-    await update.message.reply_text(get_text(lang, "enter_rotation"))
-
-
-async def handle_unlock_document(update: Update, context: ContextTypes.DEFAULT_TYPE, file_path: str) -> None:
-    """Handle document for unlocking"""
-    user_id = update.effective_user.id
-    lang = get_user_language(user_id)
-    
-    if not file_path.lower().endswith('.pdf'):
-        await update.message.reply_text("❌ Please send a PDF file")
-        cleanup_files([file_path])
+    if not file.is_pdf:
+        await message.reply_text("❌ Please send a PDF file")
+        schedule_cleanup([file.path])
         return
     
-    state_manager.set_temp(user_id, "pdf_path", file_path)
-    state_manager.set_state(user_id, "unlocking_wait_password")
+    session = state_manager.session(user_id)
+    next_state, prompt_key, parse_mode = _PDF_INTAKE[session.state]
+    session.temp["pdf_path"] = file.path
+    session.state = next_state
     
-    await update.message.reply_text(get_text(lang, "enter_password"))
+    await message.reply_text(get_text(lang, prompt_key), parse_mode=parse_mode)
 
 
-async def handle_protect_document(update: Update, context: ContextTypes.DEFAULT_TYPE, file_path: str) -> None:
-    """Handle document for protection"""
-    user_id = update.effective_user.id
-    lang = get_user_language(user_id)
-    
-    if not file_path.lower().endswith('.pdf'):
-        await update.message.reply_text("❌ Please send a PDF file")
-        cleanup_files([file_path])
-        return
-    
-    state_manager.set_temp(user_id, "pdf_path", file_path)
-    state_manager.set_state(user_id, "protecting_wait_password")
-    
-    await update.message.reply_text(get_text(lang, "enter_new_password"))
-
-
-async def handle_extract_pages_document(update: Update, context: ContextTypes.DEFAULT_TYPE, file_path: str) -> None:
-    """Handle document for page extraction"""
-    user_id = update.effective_user.id
-    lang = get_user_language(user_id)
-    
-    if not file_path.lower().endswith('.pdf'):
-        await update.message.reply_text("❌ Please send a PDF file")
-        cleanup_files([file_path])
-        return
-    
-    state_manager.set_temp(user_id, "pdf_path", file_path)
-    state_manager.set_state(user_id, "extracting_pages_wait_spec")
-    
-    await update.message.reply_text(
-        get_text(lang, "enter_pages"),
-        parse_mode="Markdown"
-    )
-
-
-async def handle_remove_pages_document(update: Update, context: ContextTypes.DEFAULT_TYPE, file_path: str) -> None:
-    """Handle document for page removal"""
-    user_id = update.effective_user.id
-    lang = get_user_language(user_id)
-    
-    if not file_path.lower().endswith('.pdf'):
-        await update.message.reply_text("❌ Please send a PDF file")
-        cleanup_files([file_path])
-        return
-    
-    state_manager.set_temp(user_id, "pdf_path", file_path)
-    state_manager.set_state(user_id, "removing_pages_wait_spec")
-    
-    await update.message.reply_text(
-        get_text(lang, "enter_pages"),
-        parse_mode="Markdown"
-    )
-
-
-async def handle_watermark_document(update: Update, context: ContextTypes.DEFAULT_TYPE, file_path: str) -> None:
-    """Handle document for watermark"""
-    user_id = update.effective_user.id
-    lang = get_user_language(user_id)
-    
-    if not file_path.lower().endswith('.pdf'):
-        await update.message.reply_text("❌ Please send a PDF file")
-        cleanup_files([file_path])
-        return
-    
-    state_manager.set_temp(user_id, "pdf_path", file_path)
-    
-    await update.message.reply_text(get_text(lang, "send_watermark_image"))
-
-
-async def handle_watermark_image(update: Update, context: ContextTypes.DEFAULT_TYPE, image_path: str) -> None:
+async def handle_watermark_image(update: Update, context: ContextTypes.DEFAULT_TYPE, image_path: str, lang: str) -> None:
     """Handle watermark image"""
     user_id = update.effective_user.id
-    lang = get_user_language(user_id)
+    message = update.message
     
     pdf_path = state_manager.get_temp(user_id, "pdf_path")
     
-    await update.message.reply_text(get_text(lang, "adding_watermark"))
+    await message.reply_text(get_text(lang, "adding_watermark"))
     
     try:
         output_path = await add_watermark(pdf_path, image_path)
         
-        await update.message.reply_document(
-            document=open(output_path, 'rb'),
-            filename="watermarked.pdf"
+        await message.reply_document(
+            document=await load_document(output_path, "watermarked.pdf"),
+            caption=get_text(lang, "watermark_added"),
+            reply_markup=get_main_keyboard(lang=lang)
         )
         
-        await update.message.reply_text(
-            get_text(lang, "watermark_added"),
-            reply_markup=get_main_keyboard(user_id)
-        )
+        schedule_cleanup([pdf_path, image_path, output_path])
         
-        cleanup_files([pdf_path, image_path, output_path])
+        record_pdf_processed()
         state_manager.clear_state(user_id)
         
     except Exception as e:
-        logger.error(f"Watermark error: {e}", exc_info=True)
-        await update.message.reply_text(get_text(lang, "error"))
-        cleanup_files([pdf_path, image_path])
+        logger.exception("Watermark error: %s", e)
+        await message.reply_text(get_text(lang, "error"))
+        schedule_cleanup([pdf_path, image_path])
 
 
-async def handle_page_numbers_document(update: Update, context: ContextTypes.DEFAULT_TYPE, file_path: str) -> None:
+async def handle_page_numbers_document(update: Update, context: ContextTypes.DEFAULT_TYPE, file: DownloadedFile, lang: str) -> None:
     """Handle document for page numbers"""
     user_id = update.effective_user.id
-    lang = get_user_language(user_id)
+    message = update.message
+    file_path = file.path
     
-    if not file_path.lower().endswith('.pdf'):
-        await update.message.reply_text("❌ Please send a PDF file")
-        cleanup_files([file_path])
+    if not file.is_pdf:
+        await message.reply_text("❌ Please send a PDF file")
+        schedule_cleanup([file_path])
         return
     
-    await update.message.reply_text(get_text(lang, "adding_page_numbers"))
+    await message.reply_text(get_text(lang, "adding_page_numbers"))
     
     try:
         output_path = await add_page_numbers(file_path)
         
-        await update.message.reply_document(
-            document=open(output_path, 'rb'),
-            filename="numbered.pdf"
+        await message.reply_document(
+            document=await load_document(output_path, "numbered.pdf"),
+            caption=get_text(lang, "page_numbers_added"),
+            reply_markup=get_main_keyboard(lang=lang)
         )
         
-        await update.message.reply_text(
-            get_text(lang, "page_numbers_added"),
-            reply_markup=get_main_keyboard(user_id)
-        )
+        schedule_cleanup([file_path, output_path])
         
-        cleanup_files([file_path, output_path])
+        record_pdf_processed()
         state_manager.clear_state(user_id)
         
     except Exception as e:
-        logger.error(f"Page numbers error: {e}", exc_info=True)
-        await update.message.reply_text(get_text(lang, "error"))
-        cleanup_files([file_path])
+        logger.exception("Page numbers error: %s", e)
+        await message.reply_text(get_text(lang, "error"))
+        schedule_cleanup([file_path])
 
 
-async def handle_convert_document(update: Update, context: ContextTypes.DEFAULT_TYPE, file_path: str) -> None:
+async def handle_convert_document(update: Update, context: ContextTypes.DEFAULT_TYPE, file: DownloadedFile, lang: str) -> None:
     """Handle document conversion to PDF"""
-    user_id = update.effective_user.id
-    lang = get_user_language(user_id)
+    message = update.message
+    file_path = file.path
     
-    await update.message.reply_text(get_text(lang, "converting"))
+    await message.reply_text(get_text(lang, "converting"))
     
     try:
         output_path = await convert_document_to_pdf(file_path)
         
-        await update.message.reply_document(
-            document=open(output_path, 'rb'),
-            filename="converted.pdf"
+        await message.reply_document(
+            document=await load_document(output_path, "converted.pdf"),
+            caption=get_text(lang, "success"),
+            reply_markup=get_main_keyboard(lang=lang)
         )
         
-        await update.message.reply_text(
-            get_text(lang, "success"),
-            reply_markup=get_main_keyboard(user_id)
-        )
+        schedule_cleanup([file_path, output_path])
         
-        cleanup_files([file_path, output_path])
+        record_pdf_processed()
         
     except Exception as e:
-        logger.error(f"Conversion error: {e}", exc_info=True)
-        await update.message.reply_text(get_text(lang, "error"))
-        cleanup_files([file_path])
+        logger.exception("Conversion error: %s", e)
+        await message.reply_text(get_text(lang, "error"))
+        schedule_cleanup([file_path])
 
 
-async def handle_convert_image(update: Update, context: ContextTypes.DEFAULT_TYPE, file_path: str) -> None:
+async def handle_convert_image(update: Update, context: ContextTypes.DEFAULT_TYPE, file_path: str, lang: str) -> None:
     """Handle single image conversion to PDF"""
-    user_id = update.effective_user.id
-    lang = get_user_language(user_id)
+    message = update.message
     
-    await update.message.reply_text(get_text(lang, "converting"))
+    await message.reply_text(get_text(lang, "converting"))
     
     try:
         output_path = await convert_image_to_pdf(file_path)
         
-        await update.message.reply_document(
-            document=open(output_path, 'rb'),
-            filename="image.pdf"
+        await message.reply_document(
+            document=await load_document(output_path, "image.pdf"),
+            caption=get_text(lang, "success"),
+            reply_markup=get_main_keyboard(lang=lang)
         )
         
-        await update.message.reply_text(
-            get_text(lang, "success"),
-            reply_markup=get_main_keyboard(user_id)
-        )
+        schedule_cleanup([file_path, output_path])
         
-        cleanup_files([file_path, output_path])
+        record_pdf_processed()
         
     except Exception as e:
-        logger.error(f"Image conversion error: {e}", exc_info=True)
-        await update.message.reply_text(get_text(lang, "error"))
-        cleanup_files([file_path])
+        logger.exception("Image conversion error: %s", e)
+        await message.reply_text(get_text(lang, "error"))
+        schedule_cleanup([file_path])
 
 
 # Text input handlers
 
-async def handle_rotation_angle(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str) -> None:
+async def handle_rotation_angle(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str, lang: str) -> None:
     """Handle rotation angle input"""
     user_id = update.effective_user.id
-    lang = get_user_language(user_id)
+    message = update.message
+    
+    match = _ROTATION_RE.match(text)
+    if not match:
+        await message.reply_text(get_text(lang, "invalid_rotation"))
+        return
+    angle = int(match.group(1))
     
     try:
-        angle = int(text.strip())
-        if angle not in [90, 180, 270]:
-            await update.message.reply_text(get_text(lang, "invalid_rotation"))
-            return
-        
         pdf_path = state_manager.get_temp(user_id, "pdf_path")
-        await update.message.reply_text(get_text(lang, "rotating_pdf"))
+        await message.reply_text(get_text(lang, "rotating_pdf"))
         
         output_path = await rotate_pdf(pdf_path, angle)
         
-        await update.message.reply_document(
-            document=open(output_path, 'rb'),
-            filename="rotated.pdf"
+        await message.reply_document(
+            document=await load_document(output_path, "rotated.pdf"),
+            caption=get_text(lang, "pdf_rotated", angle=angle),
+            reply_markup=get_main_keyboard(lang=lang)
         )
         
-        await update.message.reply_text(
-            get_text(lang, "pdf_rotated", angle=angle),
-            reply_markup=get_main_keyboard(user_id)
-        )
+        schedule_cleanup([pdf_path, output_path])
         
-        cleanup_files([pdf_path, output_path])
+        record_pdf_processed()
         state_manager.clear_state(user_id)
         
-    except ValueError:
-        await update.message.reply_text(get_text(lang, "invalid_rotation"))
     except Exception as e:
-        logger.error(f"Rotation error: {e}", exc_info=True)
-        await update.message.reply_text(get_text(lang, "error"))
+        logger.exception("Rotation error: %s", e)
+        await message.reply_text(get_text(lang, "error"))
 
 
-async def handle_unlock_password(update: Update, context: ContextTypes.DEFAULT_TYPE, password: str) -> None:
+async def handle_unlock_password(update: Update, context: ContextTypes.DEFAULT_TYPE, password: str, lang: str) -> None:
     """Handle password for unlocking"""
     user_id = update.effective_user.id
-    lang = get_user_language(user_id)
+    message = update.message
     
     try:
         pdf_path = state_manager.get_temp(user_id, "pdf_path")
-        await update.message.reply_text(get_text(lang, "unlocking_pdf"))
+        await message.reply_text(get_text(lang, "unlocking_pdf"))
         
         output_path = await unlock_pdf(pdf_path, password)
         
-        await update.message.reply_document(
-            document=open(output_path, 'rb'),
-            filename="unlocked.pdf"
+        await message.reply_document(
+            document=await load_document(output_path, "unlocked.pdf"),
+            caption=get_text(lang, "pdf_unlocked"),
+            reply_markup=get_main_keyboard(lang=lang)
         )
         
-        await update.message.reply_text(
-            get_text(lang, "pdf_unlocked"),
-            reply_markup=get_main_keyboard(user_id)
-        )
+        schedule_cleanup([pdf_path, output_path])
         
-        cleanup_files([pdf_path, output_path])
+        record_pdf_processed()
         state_manager.clear_state(user_id)
         
     except Exception as e:
-        logger.error(f"Unlock error: {e}", exc_info=True)
-        await update.message.reply_text(
+        logger.exception("Unlock error: %s", e)
+        await message.reply_text(
             get_text(lang, "password_incorrect")
         )
 
 
-async def handle_protect_password(update: Update, context: ContextTypes.DEFAULT_TYPE, password: str) -> None:
+async def handle_protect_password(update: Update, context: ContextTypes.DEFAULT_TYPE, password: str, lang: str) -> None:
     """Handle password for protection"""
     user_id = update.effective_user.id
-    lang = get_user_language(user_id)
+    message = update.message
     
     try:
         pdf_path = state_manager.get_temp(user_id, "pdf_path")
-        await update.message.reply_text(get_text(lang, "protecting_pdf"))
+        await message.reply_text(get_text(lang, "protecting_pdf"))
         
         output_path = await protect_pdf(pdf_path, password)
         
-        await update.message.reply_document(
-            document=open(output_path, 'rb'),
-            filename="protected.pdf"
+        await message.reply_document(
+            document=await load_document(output_path, "protected.pdf"),
+            caption=get_text(lang, "pdf_protected"),
+            reply_markup=get_main_keyboard(lang=lang)
         )
         
-        await update.message.reply_text(
-            get_text(lang, "pdf_protected"),
-            reply_markup=get_main_keyboard(user_id)
-        )
+        schedule_cleanup([pdf_path, output_path])
         
-        cleanup_files([pdf_path, output_path])
+        record_pdf_processed()
         state_manager.clear_state(user_id)
         
     except Exception as e:
-        logger.error(f"Protection error: {e}", exc_info=True)
-        await update.message.reply_text(get_text(lang, "error"))
+        logger.exception("Protection error: %s", e)
+        await message.reply_text(get_text(lang, "error"))
 
 
-async def handle_extract_pages_spec(update: Update, context: ContextTypes.DEFAULT_TYPE, page_spec: str) -> None:
+async def handle_extract_pages_spec(update: Update, context: ContextTypes.DEFAULT_TYPE, page_spec: str, lang: str) -> None:
     """Handle page specification for extraction"""
     user_id = update.effective_user.id
-    lang = get_user_language(user_id)
+    message = update.message
     
     try:
         pdf_path = state_manager.get_temp(user_id, "pdf_path")
-        await update.message.reply_text(get_text(lang, "extracting_pages"))
+        await message.reply_text(get_text(lang, "extracting_pages"))
         
         output_path = await extract_pages(pdf_path, page_spec)
         
-        await update.message.reply_document(
-            document=open(output_path, 'rb'),
-            filename="extracted.pdf"
+        await message.reply_document(
+            document=await load_document(output_path, "extracted.pdf"),
+            caption=get_text(lang, "success"),
+            reply_markup=get_main_keyboard(lang=lang)
         )
         
-        await update.message.reply_text(
-            get_text(lang, "success"),
-            reply_markup=get_main_keyboard(user_id)
-        )
+        schedule_cleanup([pdf_path, output_path])
         
-        cleanup_files([pdf_path, output_path])
+        record_pdf_processed()
         state_manager.clear_state(user_id)
         
     except Exception as e:
-        logger.error(f"Extract pages error: {e}", exc_info=True)
-        await update.message.reply_text(get_text(lang, "invalid_pages"))
+        logger.exception("Extract pages error: %s", e)
+        await message.reply_text(get_text(lang, "invalid_pages"))
 
 
-async def handle_remove_pages_spec(update: Update, context: ContextTypes.DEFAULT_TYPE, page_spec: str) -> None:
+async def handle_remove_pages_spec(update: Update, context: ContextTypes.DEFAULT_TYPE, page_spec: str, lang: str) -> None:
     """Handle page specification for removal"""
     user_id = update.effective_user.id
-    lang = get_user_language(user_id)
+    message = update.message
     
     try:
         pdf_path = state_manager.get_temp(user_id, "pdf_path")
-        await update.message.reply_text(get_text(lang, "removing_pages"))
+        await message.reply_text(get_text(lang, "removing_pages"))
         
         output_path = await remove_pages(pdf_path, page_spec)
         
-        await update.message.reply_document(
-            document=open(output_path, 'rb'),
-            filename="removed.pdf"
+        await message.reply_document(
+            document=await load_document(output_path, "removed.pdf"),
+            caption=get_text(lang, "success"),
+            reply_markup=get_main_keyboard(lang=lang)
         )
         
-        await update.message.reply_text(
-            get_text(lang, "success"),
-            reply_markup=get_main_keyboard(user_id)
-        )
+        schedule_cleanup([pdf_path, output_path])
         
-        cleanup_files([pdf_path, output_path])
+        record_pdf_processed()
         state_manager.clear_state(user_id)
         
     except Exception as e:
-        logger.error(f"Remove pages error: {e}", exc_info=True)
-        await update.message.reply_text(get_text(lang, "invalid_pages"))
+        logger.exception("Remove pages error: %s", e)
+        await message.reply_text(get_text(lang, "invalid_pages"))
 
 
-async def handle_compression_level(update: Update, context: ContextTypes.DEFAULT_TYPE, level: str) -> None:
+async def handle_compression_level(update: Update, context: ContextTypes.DEFAULT_TYPE, level: str, lang: str) -> None:
     """Handle compression level input"""
     user_id = update.effective_user.id
-    lang = get_user_language(user_id)
+    message = update.message
+    
+    match = _COMPRESSION_LEVEL_RE.match(level)
+    if not match:
+        await message.reply_text("❌ Please enter 1, 2, or 3")
+        return
+    quality = COMPRESSION_LEVELS[int(match.group(1)) - 1]
     
     try:
-        level_num = int(level.strip())
-        if level_num not in [1, 2, 3]:
-            await update.message.reply_text("❌ Please enter 1, 2, or 3")
-            return
-        
-        quality = ["low", "medium", "high"][level_num - 1]
-        
         pdf_path = state_manager.get_temp(user_id, "pdf_path")
         original_size = get_file_size_mb(pdf_path)
         
-        await update.message.reply_text(get_text(lang, "compressing_pdf"))
+        await message.reply_text(get_text(lang, "compressing_pdf"))
         
         output_path = await compress_pdf(pdf_path, quality)
         compressed_size = get_file_size_mb(output_path)
         saved_percent = int((1 - compressed_size / original_size) * 100) if original_size > 0 else 0
         
-        await update.message.reply_document(
-            document=open(output_path, 'rb'),
-            filename="compressed.pdf"
-        )
-        
-        await update.message.reply_text(
-            get_text(lang, "pdf_compressed",
+        await message.reply_document(
+            document=await load_document(output_path, "compressed.pdf"),
+            caption=get_text(lang, "pdf_compressed",
                     original=f"{original_size:.2f}MB",
                     compressed=f"{compressed_size:.2f}MB",
                     saved=saved_percent),
-            reply_markup=get_main_keyboard(user_id)
+            reply_markup=get_main_keyboard(lang=lang)
         )
         
-        cleanup_files([pdf_path, output_path])
+        schedule_cleanup([pdf_path, output_path])
+        
+        record_pdf_processed()
         state_manager.clear_state(user_id)
         
-    except ValueError:
-        await update.message.reply_text("❌ Please enter 1, 2, or 3")
     except Exception as e:
-        logger.error(f"Compression error: {e}", exc_info=True)
-        await update.message.reply_text(get_text(lang, "error"))
+        logger.exception("Compression error: %s", e)
+        await message.reply_text(get_text(lang, "error"))
 
 
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle errors"""
-    logger.error(f"Update {update} caused error {context.error}", exc_info=context.error)
\ No newline at end of file
+    logger.error("Update %s caused error %s", update, context.error, exc_info=context.error)
+
+
+# State waiting for a PDF -> (state to enter, prompt text key, prompt parse mode)
+_PDF_INTAKE: Dict[States, Tuple[States, str, Optional[str]]] = {
+    States.COMPRESSING: (States.COMPRESSING_WAIT_LEVEL, "enter_compression_level", "Markdown"),
+    States.ROTATING: (States.ROTATING_WAIT_ANGLE, "enter_rotation", None),
+    States.UNLOCKING: (States.UNLOCKING_WAIT_PASSWORD, "enter_password", None),
+    States.PROTECTING: (States.PROTECTING_WAIT_PASSWORD, "enter_new_password", None),
+    States.EXTRACTING_PAGES: (States.EXTRACTING_PAGES_WAIT_SPEC, "enter_pages", "Markdown"),
+    States.REMOVING_PAGES: (States.REMOVING_PAGES_WAIT_SPEC, "enter_pages", "Markdown"),
+    # The watermark image arrives as a photo while still in this state
+    States.ADDING_WATERMARK: (States.ADDING_WATERMARK, "send_watermark_image", None),
+}
+
+# State -> handler for an uploaded document
+_DOC_HANDLERS: Dict[States, Callable[[Update, ContextTypes.DEFAULT_TYPE, DownloadedFile, str], Awaitable[None]]] = {
+    States.MERGING: handle_merge_document,
+    States.ADDING_PAGE_NUMBERS: handle_page_numbers_document,
+    **{state: handle_pdf_intake for state in _PDF_INTAKE},
+}
+
+# State -> handler for a text reply
+_TEXT_HANDLERS: Dict[States, Callable[[Update, ContextTypes.DEFAULT_TYPE, str, str], Awaitable[None]]] = {
+    States.ROTATING_WAIT_ANGLE: handle_rotation_angle,
+    States.UNLOCKING_WAIT_PASSWORD: handle_unlock_password,
+    States.PROTECTING_WAIT_PASSWORD: handle_protect_password,
+    States.EXTRACTING_PAGES_WAIT_SPEC: handle_extract_pages_spec,
+    States.REMOVING_PAGES_WAIT_SPEC: handle_remove_pages_spec,
+    States.COMPRESSING_WAIT_LEVEL: handle_compression_level,
+}
\ No newline at end of file
@@ -2,11 +2,124 @@
 Keyboard Layouts for the Bot
 """
 
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from config.settings import DEFAULT_LANGUAGE, SUPPORTED_LANGUAGES
 from config.texts import get_text
 from bot.states import get_user_language
 
-
+# A button is (text key, callback data); a keyboard is a list of rows of buttons
+Button = Tuple[str, str]
+
+_BACK: Button = ("back", "back_to_menu")
+_CANCEL: Button = ("cancel", "back_to_menu")
+
+# Layout of every fixed keyboard, compiled per language by _compile_keyboard
+_MENU_SCHEMA: Dict[str, List[List[Button]]] = {
+    "main": [
+        [("organize_pdf", "menu_organize")],
+        [("optimize_pdf", "menu_optimize")],
+        [("convert_pdf", "menu_convert")],
+        [("edit_pdf", "menu_edit")],
+        [("pdf_security", "menu_security")],
+    ],
+    "organize": [
+        [("merge_pdfs", "merge")],
+        [("split_pdf", "split")],
+        [("extract_pages", "extract_pages")],
+        [("remove_pages", "remove_pages")],
+        [("extract_images", "extract_images"), ("extract_text", "extract_text")],
+        [_BACK],
+    ],
+    "optimize": [
+        [("compress_pdf", "compress")],
+        [("repair_pdf", "repair")],
+        [("ocr_pdf", "ocr")],
+        [_BACK],
+    ],
+    "convert": [
+        [("jpg_to_pdf", "jpg_to_pdf"), ("pdf_to_jpg", "pdf_to_jpg")],
+        [("word_to_pdf", "word_to_pdf"), ("pdf_to_word", "pdf_to_word")],
+        [("excel_to_pdf", "excel_to_pdf"), ("powerpoint_to_pdf", "powerpoint_to_pdf")],
+        [_BACK],
+    ],
+    "edit": [
+        [("rotate_pdf", "rotate")],
+        [("add_page_numbers", "add_page_numbers")],
+        [("add_watermark", "watermark")],
+        [("crop_pdf", "crop")],
+        [_BACK],
+    ],
+    "security": [
+        [("unlock_pdf", "unlock"), ("protect_pdf", "protect")],
+        [("sign_pdf", "sign")],
+        [("redact_pdf", "redact")],
+        [("compare_pdf", "compare")],
+        [_BACK],
+    ],
+    "back": [[_BACK]],
+    "cancel": [[_CANCEL]],
+    "done": [
+        [("done", "create_pdf_from_images")],
+        [_CANCEL],
+    ],
+}
+
+# Every schema button built once per language; keyboards share these (buttons are immutable)
+_BUTTONS: Dict[str, Dict[Button, InlineKeyboardButton]] = {
+    lang: {
+        button: InlineKeyboardButton(get_text(lang, button[0]), callback_data=button[1])
+        for rows in _MENU_SCHEMA.values()
+        for row in rows
+        for button in row
+    }
+    for lang in SUPPORTED_LANGUAGES
+}
+
+
+def _button(button: Button, lang: str) -> InlineKeyboardButton:
+    """Shared button instance for a language (unknown languages use the default)"""
+    buttons = _BUTTONS.get(lang) or _BUTTONS[DEFAULT_LANGUAGE]
+    return buttons[button]
+
+
+def get_back_button(lang: str) -> InlineKeyboardButton:
+    """Shared 'back to menu' button for a language"""
+    return _button(_BACK, lang)
+
+
+def get_cancel_button(lang: str) -> InlineKeyboardButton:
+    """Shared 'cancel' button for a language"""
+    return _button(_CANCEL, lang)
+
+
+def _compile_keyboard(name: str, lang: str) -> InlineKeyboardMarkup:
+    """Build a keyboard from _MENU_SCHEMA for a language out of the shared buttons"""
+    buttons = _BUTTONS[lang]
+    return InlineKeyboardMarkup([
+        [buttons[button] for button in row]
+        for row in _MENU_SCHEMA[name]
+    ])
+
+
+# Every fixed keyboard in every supported language, built once at import
+_KEYBOARDS: Dict[Tuple[str, str], InlineKeyboardMarkup] = {
+    (name, lang): _compile_keyboard(name, lang)
+    for name in _MENU_SCHEMA
+    for lang in SUPPORTED_LANGUAGES
+}
+
+
+def _keyboard(name: str, user_id: Optional[int], lang: Optional[str]) -> InlineKeyboardMarkup:
+    """Look up a prebuilt keyboard in the given or the user's language (see _KEYBOARDS)"""
+    if lang is None:
+        lang = get_user_language(user_id)
+    keyboard = _KEYBOARDS.get((name, lang))
+    return keyboard if keyboard is not None else _KEYBOARDS[name, DEFAULT_LANGUAGE]
+
+
+@lru_cache(maxsize=1)
 def get_language_keyboard() -> InlineKeyboardMarkup:
     """Language selection keyboard"""
     keyboard = [
@@ -18,134 +131,61 @@ def get_language_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(keyboard)
 
 
-def get_main_keyboard(user_id: int) -> InlineKeyboardMarkup:
+def get_main_keyboard(user_id: Optional[int] = None, *, lang: Optional[str] = None) -> InlineKeyboardMarkup:
     """Main menu keyboard"""
-    lang = get_user_language(user_id)
-    keyboard = [
-        [InlineKeyboardButton(get_text(lang, "organize_pdf"), callback_data="menu_organize")],
-        [InlineKeyboardButton(get_text(lang, "optimize_pdf"), callback_data="menu_optimize")],
-        [InlineKeyboardButton(get_text(lang, "convert_pdf"), callback_data="menu_convert")],
-        [InlineKeyboardButton(get_text(lang, "edit_pdf"), callback_data="menu_edit")],
-        [InlineKeyboardButton(get_text(lang, "pdf_security"), callback_data="menu_security")],
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return _keyboard("main", user_id, lang)
 
 
-def get_organize_keyboard(user_id: int) -> InlineKeyboardMarkup:
+def get_organize_keyboard(user_id: Optional[int] = None, *, lang: Optional[str] = None) -> InlineKeyboardMarkup:
     """Organize PDF menu keyboard"""
-    lang = get_user_language(user_id)
-    keyboard = [
-        [InlineKeyboardButton(get_text(lang, "merge_pdfs"), callback_data="merge")],
-        [InlineKeyboardButton(get_text(lang, "split_pdf"), callback_data="split")],
-        [InlineKeyboardButton(get_text(lang, "extract_pages"), callback_data="extract_pages")],
-        [InlineKeyboardButton(get_text(lang, "remove_pages"), callback_data="remove_pages")],
-        [
-            InlineKeyboardButton(get_text(lang, "extract_images"), callback_data="extract_images"),
-            InlineKeyboardButton(get_text(lang, "extract_text"), callback_data="extract_text")
-        ],
-        [InlineKeyboardButton(get_text(lang, "back"), callback_data="back_to_menu")],
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return _keyboard("organize", user_id, lang)
 
 
-def get_optimize_keyboard(user_id: int) -> InlineKeyboardMarkup:
+def get_optimize_keyboard(user_id: Optional[int] = None, *, lang: Optional[str] = None) -> InlineKeyboardMarkup:
     """Optimize PDF menu keyboard"""
-    lang = get_user_language(user_id)
-    keyboard = [
-        [InlineKeyboardButton(get_text(lang, "compress_pdf"), callback_data="compress")],
-        [InlineKeyboardButton(get_text(lang, "repair_pdf"), callback_data="repair")],
-        [InlineKeyboardButton(get_text(lang, "ocr_pdf"), callback_data="ocr")],
-        [InlineKeyboardButton(get_text(lang, "back"), callback_data="back_to_menu")],
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return _keyboard("optimize", user_id, lang)
 
 
-def get_convert_keyboard(user_id: int) -> InlineKeyboardMarkup:
+def get_convert_keyboard(user_id: Optional[int] = None, *, lang: Optional[str] = None) -> InlineKeyboardMarkup:
     """Convert PDF menu keyboard"""
-    lang = get_user_language(user_id)
-    keyboard = [
-        [
-            InlineKeyboardButton(get_text(lang, "jpg_to_pdf"), callback_data="jpg_to_pdf"),
-            InlineKeyboardButton(get_text(lang, "pdf_to_jpg"), callback_data="pdf_to_jpg")
-        ],
-        [
-            InlineKeyboardButton(get_text(lang, "word_to_pdf"), callback_data="word_to_pdf"),
-            InlineKeyboardButton(get_text(lang, "pdf_to_word"), callback_data="pdf_to_word")
-        ],
-        [
-            InlineKeyboardButton(get_text(lang, "excel_to_pdf"), callback_data="excel_to_pdf"),
-            InlineKeyboardButton(get_text(lang, "powerpoint_to_pdf"), callback_data="powerpoint_to_pdf")
-        ],
-        [InlineKeyboardButton(get_text(lang, "back"), callback_data="back_to_menu")],
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return _keyboard("convert", user_id, lang)
 
 
-def get_edit_keyboard(user_id: int) -> InlineKeyboardMarkup:
+def get_edit_keyboard(user_id: Optional[int] = None, *, lang: Optional[str] = None) -> InlineKeyboardMarkup:
     """Edit PDF menu keyboard"""
-    lang = get_user_language(user_id)
-    keyboard = [
-        [InlineKeyboardButton(get_text(lang, "rotate_pdf"), callback_data="rotate")],
-        [InlineKeyboardButton(get_text(lang, "add_page_numbers"), callback_data="add_page_numbers")],
-        [InlineKeyboardButton(get_text(lang, "add_watermark"), callback_data="watermark")],
-        [InlineKeyboardButton(get_text(lang, "crop_pdf"), callback_data="crop")],
-        [InlineKeyboardButton(get_text(lang, "back"), callback_data="back_to_menu")],
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return _keyboard("edit", user_id, lang)
 
 
-def get_security_keyboard(user_id: int) -> InlineKeyboardMarkup:
+def get_security_keyboard(user_id: Optional[int] = None, *, lang: Optional[str] = None) -> InlineKeyboardMarkup:
     """PDF security menu keyboard"""
-    lang = get_user_language(user_id)
-    keyboard = [
-        [
-            InlineKeyboardButton(get_text(lang, "unlock_pdf"), callback_data="unlock"),
-            InlineKeyboardButton(get_text(lang, "protect_pdf"), callback_data="protect")
-        ],
-        [InlineKeyboardButton(get_text(lang, "sign_pdf"), callback_data="sign")],
-        [InlineKeyboardButton(get_text(lang, "redact_pdf"), callback_data="redact")],
-        [InlineKeyboardButton(get_text(lang, "compare_pdf"), callback_data="compare")],
-        [InlineKeyboardButton(get_text(lang, "back"), callback_data="back_to_menu")],
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return _keyboard("security", user_id, lang)
 
 
-def get_back_keyboard(user_id: int) -> InlineKeyboardMarkup:
+def get_back_keyboard(user_id: Optional[int] = None, *, lang: Optional[str] = None) -> InlineKeyboardMarkup:
     """Simple back button keyboard"""
-    lang = get_user_language(user_id)
-    keyboard = [
-        [InlineKeyboardButton(get_text(lang, "back"), callback_data="back_to_menu")]
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return _keyboard("back", user_id, lang)
 
 
-def get_cancel_keyboard(user_id: int) -> InlineKeyboardMarkup:
+def get_cancel_keyboard(user_id: Optional[int] = None, *, lang: Optional[str] = None) -> InlineKeyboardMarkup:
     """Cancel button keyboard"""
-    lang = get_user_language(user_id)
-    keyboard = [
-        [InlineKeyboardButton(get_text(lang, "cancel"), callback_data="back_to_menu")]
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return _keyboard("cancel", user_id, lang)
 
 
-def get_done_keyboard(user_id: int) -> InlineKeyboardMarkup:
+def get_done_keyboard(user_id: Optional[int] = None, *, lang: Optional[str] = None) -> InlineKeyboardMarkup:
     """Done and cancel keyboard"""
-    lang = get_user_language(user_id)
-    keyboard = [
-        [InlineKeyboardButton(get_text(lang, "done"), callback_data="create_pdf_from_images")],
-        [InlineKeyboardButton(get_text(lang, "cancel"), callback_data="back_to_menu")]
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return _keyboard("done", user_id, lang)
 
 
-def get_merge_keyboard(user_id: int, count: int) -> InlineKeyboardMarkup:
+def get_merge_keyboard(user_id: Optional[int], count: int, *, lang: Optional[str] = None) -> InlineKeyboardMarkup:
     """Merge PDFs keyboard with file count"""
-    lang = get_user_language(user_id)
+    return _build_merge_keyboard(lang if lang is not None else get_user_language(user_id), count)
+
+
+@lru_cache(maxsize=64)
+def _build_merge_keyboard(lang: str, count: int) -> InlineKeyboardMarkup:
+    """Build the merge keyboard for a language and file count"""
     keyboard = [
-        [InlineKeyboardButton(
-            get_text(lang, "merge_now") + f" ({count} files)",
-            callback_data="do_merge"
-        )],
-        [InlineKeyboardButton(get_text(lang, "cancel"), callback_data="back_to_menu")]
+        [InlineKeyboardButton(get_text(lang, "merge_now", count=count), callback_data="do_merge")],
+        [get_cancel_button(lang)]
     ]
     return InlineKeyboardMarkup(keyboard)
\ No newline at end of file
@@ -2,128 +2,176 @@
 User State Management
 """
 
-from typing import Dict, List, Any, Optional
-from config.settings import DEFAULT_LANGUAGE
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import IntEnum, auto, unique
+from typing import Any, Dict, List, Optional
+from config.settings import DEFAULT_LANGUAGE, MAX_TRACKED_USERS
+from utils.file_manager import schedule_cleanup
 
 
-# Global state storage
-user_languages: Dict[int, str] = {}
-user_states: Dict[int, str] = {}
-user_files: Dict[int, List[str]] = {}
-user_temp_data: Dict[int, Dict[str, Any]] = {}
+@unique
+class States(IntEnum):
+    """Operation a user is currently in (stored per user as a small int)"""
+    # Organize
+    MERGING = auto()
+    SPLITTING = auto()
+    EXTRACTING_PAGES = auto()
+    EXTRACTING_PAGES_WAIT_SPEC = auto()
+    REMOVING_PAGES = auto()
+    REMOVING_PAGES_WAIT_SPEC = auto()
+    EXTRACTING_IMAGES = auto()
+    EXTRACTING_TEXT = auto()
+    
+    # Optimize
+    COMPRESSING = auto()
+    COMPRESSING_WAIT_LEVEL = auto()
+    REPAIRING = auto()
+    OCR_PROCESSING = auto()
+    
+    # Convert
+    COLLECTING_IMAGES = auto()
+    WORD_TO_PDF = auto()
+    EXCEL_TO_PDF = auto()
+    POWERPOINT_TO_PDF = auto()
+    PDF_TO_JPG = auto()
+    PDF_TO_WORD = auto()
+    
+    # Edit
+    ROTATING = auto()
+    ROTATING_WAIT_ANGLE = auto()
+    ADDING_PAGE_NUMBERS = auto()
+    ADDING_WATERMARK = auto()
+    CROPPING = auto()
+    
+    # Security
+    UNLOCKING = auto()
+    UNLOCKING_WAIT_PASSWORD = auto()
+    PROTECTING = auto()
+    PROTECTING_WAIT_PASSWORD = auto()
+
+
+@dataclass(slots=True)
+class UserState:
+    """Everything the bot keeps for one user"""
+    language: str = DEFAULT_LANGUAGE
+    state: Optional[States] = None
+    files: List[str] = field(default_factory=list)
+    temp: Dict[str, Any] = field(default_factory=dict)
+
+
+class _UserTable(OrderedDict):
+    """
+    Bounded LRU of user records; indexing creates a missing record, .get() doesn't
+    
+    Once MAX_TRACKED_USERS is exceeded the least recently seen user is dropped
+    and any files they were still collecting are deleted.
+    """
+    
+    def __missing__(self, user_id: int) -> UserState:
+        user = self[user_id] = UserState()
+        if len(self) > MAX_TRACKED_USERS:
+            _, evicted = self.popitem(last=False)
+            leftovers = evicted.files + [v for k, v in evicted.temp.items() if k.endswith("_path")]
+            if leftovers:
+                schedule_cleanup(leftovers)
+        return user
+
+
+# Global state storage (one record per user)
+users: OrderedDict[int, UserState] = _UserTable()
 
 
 def get_user_language(user_id: int) -> str:
-    """Get user's preferred language"""
-    return user_languages.get(user_id, DEFAULT_LANGUAGE)
+    """Get user's preferred language (every update asks, so this also marks the user as recently seen)"""
+    user = users.get(user_id)
+    if user is None:
+        return DEFAULT_LANGUAGE
+    users.move_to_end(user_id)
+    return user.language
 
 
 def set_user_language(user_id: int, language: str) -> None:
     """Set user's preferred language"""
-    user_languages[user_id] = language
+    users[user_id].language = language
 
 
 class UserStateManager:
     """Manage user states and data"""
     
     @staticmethod
-    def get_state(user_id: int) -> Optional[str]:
+    def session(user_id: int) -> UserState:
+        """Get (creating if needed) the record for user, for handlers touching several fields"""
+        return users[user_id]
+    
+    @staticmethod
+    def get_state(user_id: int) -> Optional[States]:
         """Get current state for user"""
-        return user_states.get(user_id)
+        user = users.get(user_id)
+        return user.state if user else None
     
     @staticmethod
-    def set_state(user_id: int, state: str) -> None:
+    def set_state(user_id: int, state: States) -> None:
         """Set state for user"""
-        user_states[user_id] = state
+        users[user_id].state = state
     
     @staticmethod
     def clear_state(user_id: int) -> None:
         """Clear state for user"""
-        if user_id in user_states:
-            del user_states[user_id]
+        user = users.get(user_id)
+        if user:
+            user.state = None
     
     @staticmethod
     def get_files(user_id: int) -> List[str]:
         """Get list of files for user"""
-        return user_files.get(user_id, [])
+        user = users.get(user_id)
+        return user.files if user else []
     
     @staticmethod
     def add_file(user_id: int, file_path: str) -> None:
         """Add file to user's file list"""
-        if user_id not in user_files:
-            user_files[user_id] = []
-        user_files[user_id].append(file_path)
+        users[user_id].files.append(file_path)
+    
+    @staticmethod
+    def take_files(user_id: int) -> List[str]:
+        """Remove and return user's file list, so a repeated tap can't reuse it"""
+        user = users.get(user_id)
+        if not user:
+            return []
+        files, user.files = user.files, []
+        return files
     
     @staticmethod
     def clear_files(user_id: int) -> None:
         """Clear all files for user"""
-        if user_id in user_files:
-            user_files[user_id] = []
+        user = users.get(user_id)
+        if user:
+            user.files.clear()
     
     @staticmethod
     def get_temp(user_id: int, key: str) -> Any:
         """Get temporary data for user"""
-        if user_id not in user_temp_data:
-            return None
-        return user_temp_data[user_id].get(key)
+        user = users.get(user_id)
+        return user.temp.get(key) if user else None
     
     @staticmethod
     def set_temp(user_id: int, key: str, value: Any) -> None:
         """Set temporary data for user"""
-        if user_id not in user_temp_data:
-            user_temp_data[user_id] = {}
-        user_temp_data[user_id][key] = value
+        users[user_id].temp[key] = value
     
     @staticmethod
     def clear_temp(user_id: int) -> None:
         """Clear all temporary data for user"""
-        if user_id in user_temp_data:
-            del user_temp_data[user_id]
+        user = users.get(user_id)
+        if user:
+            user.temp.clear()
     
     @staticmethod
     def clear_all(user_id: int) -> None:
-        """Clear all data for user"""
-        UserStateManager.clear_state(user_id)
-        UserStateManager.clear_files(user_id)
-        UserStateManager.clear_temp(user_id)
-
-
-# State constants
-class States:
-    """State constants"""
-    # Organize
-    MERGING = "merging"
-    SPLITTING = "splitting"
-    EXTRACTING_PAGES = "extracting_pages"
-    EXTRACTING_PAGES_WAIT_SPEC = "extracting_pages_wait_spec"
-    REMOVING_PAGES = "removing_pages"
-    REMOVING_PAGES_WAIT_SPEC = "removing_pages_wait_spec"
-    EXTRACTING_IMAGES = "extracting_images"
-    EXTRACTING_TEXT = "extracting_text"
-    
-    # Optimize
-    COMPRESSING = "compressing"
-    COMPRESSING_WAIT_LEVEL = "compressing_wait_level"
-    REPAIRING = "repairing"
-    OCR_PROCESSING = "ocr_processing"
-    
-    # Convert
-    COLLECTING_IMAGES = "collecting_images"
-    WORD_TO_PDF = "word_to_pdf"
-    EXCEL_TO_PDF = "excel_to_pdf"
-    POWERPOINT_TO_PDF = "powerpoint_to_pdf"
-    PDF_TO_JPG = "pdf_to_jpg"
-    PDF_TO_WORD = "pdf_to_word"
-    
-    # Edit
-    ROTATING = "rotating"
-    ROTATING_WAIT_ANGLE = "rotating_wait_angle"
-    ADDING_PAGE_NUMBERS = "adding_page_numbers"
-    ADDING_WATERMARK = "adding_watermark"
-    CROPPING = "cropping"
-    
-    # Security
-    UNLOCKING = "unlocking"
-    UNLOCKING_WAIT_PASSWORD = "unlocking_wait_password"
-    PROTECTING = "protecting"
-    PROTECTING_WAIT_PASSWORD = "protecting_wait_password"
\ No newline at end of file
+        """Clear all data for user (the language preference is kept)"""
+        user = users.get(user_id)
+        if user:
+            user.state = None
+            user.files.clear()
+            user.temp.clear()
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""
+Bot Statistics
+Counters are updated in place; /stats reads a snapshot refreshed in the background
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from bot.states import users
+from utils.subscriber_manager import get_subscriber_count
+
+logger = logging.getLogger(__name__)
+
+# How often the snapshot is recomputed (seconds)
+STATS_REFRESH_INTERVAL = 60
+
+# Live counters
+_pdfs_processed = 0
+
+# Last computed snapshot, served as-is by /stats
+_snapshot: Dict[str, Any] = {"users": 0, "subscribers": 0, "processed": 0, "updated": 0.0}
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def record_pdf_processed() -> None:
+    """Count one finished PDF operation"""
+    global _pdfs_processed
+    _pdfs_processed += 1
+
+
+def get_stats() -> Dict[str, Any]:
+    """Get the most recent statistics snapshot"""
+    return _snapshot
+
+
+def _compute_stats() -> Dict[str, Any]:
+    """Collect current statistics"""
+    return {
+        "users": len(users),
+        "subscribers": get_subscriber_count(),
+        "processed": _pdfs_processed,
+        "updated": time.time(),
+    }
+
+
+async def _refresh_stats() -> None:
+    """Recompute the snapshot periodically"""
+    while True:
+        _snapshot.update(_compute_stats())
+        await asyncio.sleep(STATS_REFRESH_INTERVAL)
+
+
+async def start_stats_refresher() -> None:
+    """Start refreshing the snapshot (call once the event loop is running)"""
+    global _refresh_task
+    if _refresh_task is None:
+        _refresh_task = asyncio.create_task(_refresh_stats())
+
+
+async def stop_stats_refresher() -> None:
+    """Stop the background refresh"""
+    global _refresh_task
+    if _refresh_task is None:
+        return
+    
+    _refresh_task.cancel()
+    try:
+        await _refresh_task
+    except asyncio.CancelledError:
+        pass
+    _refresh_task = None
\ No newline at end of file
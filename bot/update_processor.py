@@ -0,0 +1,79 @@
+"""
+Update Processor
+Updates from different chats are handled concurrently; messages within a chat stay in order
+"""
+
+import asyncio
+from typing import Any, Awaitable, Dict, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """
+    Run updates concurrently across chats but a chat's messages one at a time
+    
+    Commands and button taps skip the chat's queue, so /cancel and menus still
+    respond while a long conversion started by an upload is running.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._chat_locks: Dict[int, asyncio.Lock] = {}
+        self._pending: Dict[int, int] = {}
+
+    async def process_update(self, update: object, coroutine: Awaitable[Any]) -> None:  # type: ignore[misc]
+        """Wait for earlier updates of the same chat, then take a concurrency slot and process this one"""
+        # The base class takes the slot first, which lets a queued-up chat hold every slot
+        chat_id = self._ordered_chat_id(update)
+        if chat_id is None:
+            async with self._semaphore:
+                await self.do_process_update(update, coroutine)
+            return
+        
+        lock = self._chat_locks.get(chat_id)
+        if lock is None:
+            lock = self._chat_locks[chat_id] = asyncio.Lock()
+        self._pending[chat_id] = self._pending.get(chat_id, 0) + 1
+        
+        try:
+            async with lock, self._semaphore:
+                await self.do_process_update(update, coroutine)
+        finally:
+            # Forget the chat once nothing of it is queued, so idle chats cost no memory
+            self._pending[chat_id] -= 1
+            if not self._pending[chat_id]:
+                del self._pending[chat_id]
+                del self._chat_locks[chat_id]
+
+    @staticmethod
+    def _ordered_chat_id(update: object) -> Optional[int]:
+        """Chat whose order the update must keep (plain messages only: uploads and text replies)"""
+        if not isinstance(update, Update) or update.message is None:
+            return None
+        if (update.message.text or "").startswith("/"):
+            return None
+        return update.message.chat_id
+
+    async def wait_for_chat(self, chat_id: int) -> None:
+        """
+        Wait until the messages already queued for chat have been processed
+        
+        For button taps that act on collected uploads; never call it while handling a message.
+        """
+        lock = self._chat_locks.get(chat_id)
+        if lock is not None:
+            # asyncio.Lock is FIFO, so this turn comes after every earlier message
+            async with lock:
+                pass
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        """Process the update (ordering and the concurrency limit are handled in process_update)"""
+        await coroutine
+
+    async def initialize(self) -> None:
+        """Nothing to set up"""
+
+    async def shutdown(self) -> None:
+        """Nothing to release"""
\ No newline at end of file
@@ -3,39 +3,81 @@ Configuration settings for the PDF Bot
 """
 
 import os
+from enum import IntFlag, auto
 from pathlib import Path
 from dotenv import load_dotenv
 
-# Load environment variables
+# Load .env (variables already set in the environment take precedence)
 load_dotenv()
 
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment"""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment"""
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    """Read a true/false setting from the environment"""
+    value = os.environ.get(name)
+    return value.lower() == "true" if value else default
+
+
 # Base directory
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Bot Configuration
 BOT_TOKEN = os.getenv("BOT_TOKEN")
-ADMIN_IDS = [int(x) for x in os.getenv("ADMIN_IDS", "").split(",") if x.strip()]
+ADMIN_IDS = frozenset(int(x) for x in os.getenv("ADMIN_IDS", "").split(",") if x.strip())
 SUPPORT_USERNAME = os.getenv("SUPPORT_USERNAME", "YourSupportUsername")
 
 # Webhook Configuration (for hosting on Render)
 WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # Your Render app URL (e.g., https://your-app.onrender.com)
 WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")  # Webhook endpoint path
-PORT = int(os.getenv("PORT", "10000"))  # Port for the web server (Render provides this)
-USE_WEBHOOK = os.getenv("USE_WEBHOOK", "false").lower() == "true"  # Set to true for production
+PORT = _env_int("PORT", 10000)  # Port for the web server (Render provides this)
+USE_WEBHOOK = _env_flag("USE_WEBHOOK")  # Set to true for production
+POLLING_TIMEOUT = _env_int("POLLING_TIMEOUT", 50)  # Long-poll window of each getUpdates call in polling mode (seconds)
 
 # File Settings
-MAX_FILE_SIZE_MB = int(os.getenv("MAX_FILE_SIZE_MB", "50"))
-MAX_IMAGES_PER_PDF = int(os.getenv("MAX_IMAGES_PER_PDF", "100"))
-MAX_PDFS_TO_MERGE = int(os.getenv("MAX_PDFS_TO_MERGE", "20"))
+MAX_FILE_SIZE_MB = _env_int("MAX_FILE_SIZE_MB", 50)
+MAX_IMAGES_PER_PDF = _env_int("MAX_IMAGES_PER_PDF", 100)
+MAX_PDFS_TO_MERGE = _env_int("MAX_PDFS_TO_MERGE", 20)
+MAX_CONCURRENT_JOBS = _env_int("MAX_CONCURRENT_JOBS", 4)  # Heavy PDF jobs allowed to run at once
+MAX_CONCURRENT_UPDATES = _env_int("MAX_CONCURRENT_UPDATES", 64)  # Updates handled at once (ordered within each chat)
+PDF_WORKERS = _env_int("PDF_WORKERS", os.cpu_count() or 2)  # Processes for CPU-bound PDF/image work
+UPLOAD_TIMEOUT = _env_int("UPLOAD_TIMEOUT", 120)  # Read/write timeout for sending documents (seconds)
+MAX_TRACKED_USERS = _env_int("MAX_TRACKED_USERS", 100_000)  # Per-user records kept in memory (least recently seen are evicted)
+
+# Conversion Cache (outputs reused when the same file is converted again)
+ENABLE_CACHE = _env_flag("ENABLE_CACHE", True)
+CACHE_EXPIRY = _env_int("CACHE_EXPIRY", 24 * 3600)  # Seconds a cached output stays valid
+CACHE_MAX_MB = _env_int("CACHE_MAX_MB", 1024)  # Disk space the cache may use; oldest outputs are dropped first
+
+# Bot API Connection Settings
+HTTP_VERSION = os.getenv("HTTP_VERSION", "2")  # "2" multiplexes API calls over one connection
+CONNECTION_POOL_SIZE = _env_int("CONNECTION_POOL_SIZE", 256)
+POOL_TIMEOUT = _env_float("POOL_TIMEOUT", 30)  # Seconds to wait for a free connection
+RATE_LIMIT_MAX_RETRIES = _env_int("RATE_LIMIT_MAX_RETRIES", 2)  # Retries after a Telegram flood-wait (RetryAfter)
 
 # Directory Settings
 TEMP_DIR = BASE_DIR / "temp"
 LOGS_DIR = BASE_DIR / "logs"
 DATA_DIR = BASE_DIR / "data"
+CACHE_DIR = TEMP_DIR / "cache"
+
+
+def ensure_dirs() -> None:
+    """Create the temp, cache, logs and data directories if they don't exist (called once at startup)"""
+    for directory in (TEMP_DIR, CACHE_DIR, LOGS_DIR, DATA_DIR):
+        if not directory.is_dir():
+            directory.mkdir(exist_ok=True)
 
-# Create directories if they don't exist
-for directory in [TEMP_DIR, LOGS_DIR, DATA_DIR]:
-    directory.mkdir(exist_ok=True)
 
 # File paths
 SUBSCRIBERS_FILE = DATA_DIR / "subscribers.json"
@@ -46,64 +88,72 @@ LOG_FILE = LOGS_DIR / "bot.log"
 DEFAULT_LANGUAGE = "en"
 SUPPORTED_LANGUAGES = ["en", "fa"]
 
-# PDF Processing Settings
-PDF_QUALITY = {
-    "low": 50,
-    "medium": 75,
-    "high": 90
-}
-
-# Compression levels
-COMPRESSION_LEVELS = {
-    1: "low",
-    2: "medium",
-    3: "high"
-}
+# Compression levels 1-3, indexed by level - 1
+COMPRESSION_LEVELS = ("low", "medium", "high")
 
 # Image settings
 IMAGE_DPI = 300
 IMAGE_QUALITY = 95
-SUPPORTED_IMAGE_FORMATS = ["jpg", "jpeg", "png", "webp", "bmp", "tiff"]
+SUPPORTED_IMAGE_FORMATS = frozenset(("jpg", "jpeg", "png", "webp", "bmp", "tiff"))
 
 # Document settings
-SUPPORTED_DOCUMENT_FORMATS = ["docx", "doc", "txt", "rtf", "odt"]
-SUPPORTED_SPREADSHEET_FORMATS = ["xlsx", "xls", "csv"]
-SUPPORTED_PRESENTATION_FORMATS = ["pptx", "ppt", "odp"]
+SUPPORTED_DOCUMENT_FORMATS = frozenset(("docx", "doc", "txt", "rtf", "odt"))
+SUPPORTED_SPREADSHEET_FORMATS = frozenset(("xlsx", "xls", "csv"))
+SUPPORTED_PRESENTATION_FORMATS = frozenset(("pptx", "ppt", "odp"))
+
+# Same formats with the leading dot, as returned by os.path.splitext
+SUPPORTED_IMAGE_EXTS = frozenset("." + e for e in SUPPORTED_IMAGE_FORMATS)
+SUPPORTED_DOCUMENT_EXTS = frozenset("." + e for e in SUPPORTED_DOCUMENT_FORMATS)
+SUPPORTED_SPREADSHEET_EXTS = frozenset("." + e for e in SUPPORTED_SPREADSHEET_FORMATS)
+SUPPORTED_PRESENTATION_EXTS = frozenset("." + e for e in SUPPORTED_PRESENTATION_FORMATS)
 
 # OCR Settings
 OCR_LANGUAGE = os.getenv("OCR_LANGUAGE", "eng")  # Tesseract language code
-OCR_TIMEOUT = int(os.getenv("OCR_TIMEOUT", "300"))  # 5 minutes
+OCR_TIMEOUT = _env_int("OCR_TIMEOUT", 300)  # 5 minutes
 
 # Security Settings
 MIN_PASSWORD_LENGTH = 6
 MAX_PASSWORD_LENGTH = 128
 
 # Rate Limiting
-MAX_OPERATIONS_PER_HOUR = int(os.getenv("MAX_OPERATIONS_PER_HOUR", "50"))
-RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "false").lower() == "true"
-
-# Feature Flags
-FEATURES = {
-    "merge": True,
-    "split": True,
-    "compress": True,
-    "rotate": True,
-    "watermark": True,
-    "page_numbers": True,
-    "extract_pages": True,
-    "remove_pages": True,
-    "extract_images": True,
-    "extract_text": True,
-    "unlock": True,
-    "protect": True,
-    "repair": True,
-    "ocr": os.getenv("OCR_ENABLED", "false").lower() == "true",
-    "pdf_to_word": os.getenv("PDF_TO_WORD_ENABLED", "false").lower() == "true",
-    "pdf_to_excel": os.getenv("PDF_TO_EXCEL_ENABLED", "false").lower() == "true",
-    "sign": False,  # Coming soon
-    "redact": False,  # Coming soon
-    "compare": False,  # Coming soon
-}
+MAX_OPERATIONS_PER_HOUR = _env_int("MAX_OPERATIONS_PER_HOUR", 50)
+RATE_LIMIT_ENABLED = _env_flag("RATE_LIMIT_ENABLED")
+
+# Feature Flags (test with: Feature.OCR in ENABLED_FEATURES)
+class Feature(IntFlag):
+    MERGE = auto()
+    SPLIT = auto()
+    COMPRESS = auto()
+    ROTATE = auto()
+    WATERMARK = auto()
+    PAGE_NUMBERS = auto()
+    EXTRACT_PAGES = auto()
+    REMOVE_PAGES = auto()
+    EXTRACT_IMAGES = auto()
+    EXTRACT_TEXT = auto()
+    UNLOCK = auto()
+    PROTECT = auto()
+    REPAIR = auto()
+    OCR = auto()
+    PDF_TO_WORD = auto()
+    PDF_TO_EXCEL = auto()
+    SIGN = auto()  # Coming soon
+    REDACT = auto()  # Coming soon
+    COMPARE = auto()  # Coming soon
+
+
+ENABLED_FEATURES = (
+    Feature.MERGE | Feature.SPLIT | Feature.COMPRESS | Feature.ROTATE
+    | Feature.WATERMARK | Feature.PAGE_NUMBERS | Feature.EXTRACT_PAGES
+    | Feature.REMOVE_PAGES | Feature.EXTRACT_IMAGES | Feature.EXTRACT_TEXT
+    | Feature.UNLOCK | Feature.PROTECT | Feature.REPAIR
+)
+if _env_flag("OCR_ENABLED"):
+    ENABLED_FEATURES |= Feature.OCR
+if _env_flag("PDF_TO_WORD_ENABLED"):
+    ENABLED_FEATURES |= Feature.PDF_TO_WORD
+if _env_flag("PDF_TO_EXCEL_ENABLED"):
+    ENABLED_FEATURES |= Feature.PDF_TO_EXCEL
 
 # Logging Configuration
 LOGGING_CONFIG = {
@@ -1,300 +1,45 @@
 """
 Multilingual text configurations for the bot
+Texts live in config/locales/<lang>.json and each language is loaded on first use
 """
 
-TEXTS = {
-    "en": {
-        # Welcome and Basic
-        "welcome": (
-            "👋 *Welcome to PDF Bot!*\n\n"
-            "🔧 Every tool you need to work with PDFs in one place!\n\n"
-            "✨ *Features:*\n"
-            "• Convert images & documents to PDF\n"
-            "• Merge, split, and organize PDFs\n"
-            "• Compress and optimize PDFs\n"
-            "• Add watermarks & page numbers\n"
-            "• Secure PDFs with passwords\n"
-            "• Extract text and images\n"
-            "• OCR support for scanned documents\n"
-            "• And much more!\n\n"
-            "Choose your language using the buttons below."
-        ),
-        "help": (
-            "📚 *How to Use This Bot:*\n\n"
-            "1️⃣ Select a tool from the menu\n"
-            "2️⃣ Follow the instructions\n"
-            "3️⃣ Send your files\n"
-            "4️⃣ Get your processed PDF!\n\n"
-            "*Commands:*\n"
-            "/start - Start the bot\n"
-            "/help - Show this help message\n"
-            "/language - Change language\n"
-            "/cancel - Cancel current operation\n"
-            "/subscribe - Subscribe to updates\n"
-            "/unsubscribe - Unsubscribe from updates\n\n"
-            "*Support:*\n"
-            "For issues or suggestions, contact @YourSupportUsername"
-        ),
-        "choose_language": "🌐 Please choose your language:",
-        "language_changed": "✅ Language changed to English!",
-        "processing": "⏳ Processing your file...",
-        "converting": "🔄 Converting to PDF...",
-        "success": "✅ Done! Your PDF is ready.",
-        "error": "❌ An error occurred. Please try again.",
-        "unsupported": "❌ This file format is not supported yet.",
-        "choose_action": "📋 Choose a PDF tool:",
-        "back": "🔙 Back",
-        "cancel": "❌ Cancel",
-        "done": "✅ Done",
-        "operation_cancelled": "❌ Operation cancelled.",
-        "file_too_large": "❌ File is too large. Maximum size is {max_size}MB.",
-        "invalid_input": "❌ Invalid input. Please try again.",
-        
-        # Main menu categories
-        "organize_pdf": "📑 Organize PDF",
-        "optimize_pdf": "⚡ Optimize PDF",
-        "convert_pdf": "🔄 Convert PDF",
-        "edit_pdf": "✏️ Edit PDF",
-        "pdf_security": "🔒 PDF Security",
-        
-        # Organize PDF
-        "merge_pdfs": "🔗 Merge PDFs",
-        "split_pdf": "✂️ Split PDF",
-        "remove_pages": "🗑️ Remove Pages",
-        "extract_pages": "📄 Extract Pages",
-        "organize_pages": "📋 Reorder Pages",
-        "extract_images": "🖼️ Extract Images",
-        "extract_text": "📝 Extract Text",
-        
-        # Optimize PDF
-        "compress_pdf": "🗜️ Compress PDF",
-        "repair_pdf": "🔧 Repair PDF",
-        "ocr_pdf": "👁️ OCR PDF",
-        "reduce_size": "📉 Reduce File Size",
-        "optimize_images": "🖼️ Optimize Images",
-        
-        # Convert PDF
-        "convert_to_pdf": "📄 Convert to PDF",
-        "pdf_to_jpg": "🖼️ PDF to JPG",
-        "pdf_to_png": "🖼️ PDF to PNG",
-        "pdf_to_word": "📝 PDF to Word",
-        "pdf_to_powerpoint": "📊 PDF to PowerPoint",
-        "pdf_to_excel": "📈 PDF to Excel",
-        "pdf_to_text": "📝 PDF to Text",
-        "pdf_to_html": "🌐 PDF to HTML",
-        "pdf_to_pdfa": "📋 PDF to PDF/A",
-        "jpg_to_pdf": "🖼️ JPG to PDF",
-        "png_to_pdf": "🖼️ PNG to PDF",
-        "word_to_pdf": "📝 Word to PDF",
-        "powerpoint_to_pdf": "📊 PowerPoint to PDF",
-        "excel_to_pdf": "📈 Excel to PDF",
-        "html_to_pdf": "🌐 HTML to PDF",
-        "text_to_pdf": "📝 Text to PDF",
-        
-        # Edit PDF
-        "rotate_pdf": "🔄 Rotate PDF",
-        "add_page_numbers": "🔢 Add Page Numbers",
-        "add_watermark": "💧 Add Watermark",
-        "add_header_footer": "📄 Add Header/Footer",
-        "crop_pdf": "✂️ Crop PDF",
-        "resize_pdf": "📏 Resize PDF",
-        "black_white": "⚫⚪ Black & White",
-        "adjust_margins": "📐 Adjust Margins",
-        
-        # PDF Security
-        "unlock_pdf": "🔓 Unlock PDF",
-        "protect_pdf": "🔒 Protect PDF",
-        "sign_pdf": "✍️ Sign PDF",
-        "redact_pdf": "🖊️ Redact PDF",
-        "compare_pdf": "🔍 Compare PDFs",
-        "add_permissions": "🔐 Add Permissions",
-        "remove_metadata": "🗑️ Remove Metadata",
-        
-        # Instructions
-        "send_files": "📤 Please send me the files you want to convert.",
-        "send_pdfs": "📤 Send me PDF files to merge.\n\n💡 You can send multiple files one by one.",
-        "send_images": "📸 Send me images to convert to PDF.\n\n💡 Send multiple images and I'll combine them into one PDF.",
-        "images_count": "📸 Images received: *{count}*\n\n✅ Send more images or click *Done* to create PDF.",
-        "pdfs_count": "📄 PDFs received: *{count}*\n\n✅ Send more PDFs or click *Merge Now*.",
-        "ready_to_merge": "✅ Ready to merge {count} PDFs! Click the button when done.",
-        "merge_now": "🔗 Merge Now ({count} files)",
-        "send_one_pdf": "📤 Send me a PDF file.",
-        "send_pdf_for_split": "📤 Send me a PDF file to split.\n\n💡 I'll ask you how to split it.",
-        "send_pdf_for_compress": "📤 Send me a PDF file to compress.\n\n💡 I'll reduce its size while maintaining quality.",
-        "send_pdf_for_rotate": "📤 Send me a PDF file to rotate.",
-        "send_pdf_for_watermark": "📤 Send me a PDF file, then send a watermark image.",
-        "send_watermark_image": "📸 Now send me the watermark image.",
-        "send_pdf_for_unlock": "📤 Send me a password-protected PDF file.",
-        "send_pdf_for_protect": "📤 Send me a PDF file to protect with a password.",
-        "send_pdf_for_extract_pages": "📤 Send me a PDF file to extract pages from.",
-        "send_pdf_for_remove_pages": "📤 Send me a PDF file to remove pages from.",
-        "send_pdf_for_extract_images": "📤 Send me a PDF file to extract images from.",
-        "send_pdf_for_extract_text": "📤 Send me a PDF file to extract text from.",
-        "send_pdf_for_ocr": "📤 Send me a scanned PDF for OCR processing.",
-        "send_pdf_for_repair": "📤 Send me a damaged PDF file to repair.",
-        
-        # Input prompts
-        "enter_password": "🔑 Please enter the password:",
-        "enter_new_password": "🔑 Please enter a new password to protect the PDF:",
-        "enter_rotation": "🔄 Enter rotation angle:\n• 90° (clockwise)\n• 180° (upside down)\n• 270° (counter-clockwise)\n\nJust send: 90, 180, or 270",
-        "enter_pages": (
-            "📄 Enter page numbers:\n\n"
-            "*Examples:*\n"
-            "• Single pages: `1,3,5`\n"
-            "• Page ranges: `1-5,8,10-15`\n"
-            "• All pages: `all`"
-        ),
-        "enter_split_mode": (
-            "✂️ How would you like to split the PDF?\n\n"
-            "*Choose a method:*\n"
-            "1️⃣ Split by page ranges: `1-5,6-10`\n"
-            "2️⃣ Split every N pages: `every 2`\n"
-            "3️⃣ Extract specific pages: `1,3,5`"
-        ),
-        "enter_compression_level": (
-            "🗜️ Choose compression level:\n\n"
-            "1️⃣ *Low* - Best quality, larger file\n"
-            "2️⃣ *Medium* - Balanced (recommended)\n"
-            "3️⃣ *High* - Smallest file, lower quality\n\n"
-            "Send: 1, 2, or 3"
-        ),
-        
-        # Status messages
-        "no_images": "❌ No images received. Please send at least one image.",
-        "no_pdfs": "❌ Please send at least 2 PDF files to merge.",
-        "creating_pdf": "🔄 Creating PDF from {count} image(s)...",
-        "merging_pdfs": "🔗 Merging {count} PDF file(s)...",
-        "splitting_pdf": "✂️ Splitting PDF...",
-        "extracting_pages": "📄 Extracting pages...",
-        "removing_pages": "🗑️ Removing pages...",
-        "compressing_pdf": "🗜️ Compressing PDF...",
-        "rotating_pdf": "🔄 Rotating PDF pages...",
-        "adding_watermark": "💧 Adding watermark...",
-        "adding_page_numbers": "🔢 Adding page numbers...",
-        "unlocking_pdf": "🔓 Unlocking PDF...",
-        "protecting_pdf": "🔒 Protecting PDF...",
-        "extracting_images": "🖼️ Extracting images...",
-        "extracting_text": "📝 Extracting text...",
-        "performing_ocr": "👁️ Performing OCR...",
-        "repairing_pdf": "🔧 Repairing PDF...",
-        
-        # Success messages
-        "pdf_created": "✅ PDF created successfully!\n📄 Pages: {pages}\n📦 Size: {size}",
-        "pdfs_merged": "✅ PDFs merged successfully!\n📄 Total pages: {pages}\n📦 Size: {size}",
-        "pdf_split": "✅ PDF split into {count} file(s)!",
-        "pages_extracted": "✅ Extracted {count} page(s)!",
-        "pages_removed": "✅ Removed {count} page(s)!",
-        "pdf_compressed": "✅ PDF compressed!\n📉 Original: {original}\n📦 Compressed: {compressed}\n💰 Saved: {saved}%",
-        "pdf_rotated": "✅ PDF rotated {angle}°!",
-        "watermark_added": "✅ Watermark added to all pages!",
-        "page_numbers_added": "✅ Page numbers added!",
-        "pdf_unlocked": "✅ PDF unlocked successfully!",
-        "pdf_protected": "✅ PDF protected with password!",
-        "images_extracted": "✅ Extracted {count} image(s)!",
-        "text_extracted": "✅ Text extracted successfully!",
-        "ocr_completed": "✅ OCR completed!",
-        "pdf_repaired": "✅ PDF repaired successfully!",
-        
-        # Error messages
-        "password_incorrect": "❌ Incorrect password. Please try again.",
-        "no_password_needed": "✅ This PDF is not password-protected!",
-        "invalid_pages": "❌ Invalid page format. Please check the examples and try again.",
-        "invalid_rotation": "❌ Invalid rotation angle. Please enter: 90, 180, or 270",
-        "pdf_damaged": "❌ This PDF file appears to be damaged and cannot be processed.",
-        "no_text_found": "❌ No text found in this PDF. Try using OCR for scanned documents.",
-        "no_images_found": "❌ No images found in this PDF.",
-        
-        # Subscription
-        "subscribed": "🔔 You're now subscribed to updates!",
-        "already_subscribed": "✅ You're already subscribed!",
-        "unsubscribed": "🔕 You've been unsubscribed from updates.",
-        "not_subscribed": "ℹ️ You're not subscribed to updates.",
-        "coming_soon": "🔜 This feature is coming soon!\n\nWould you like to be notified when it's available?",
-        "notify_me": "🔔 Notify Me",
-        "no_thanks": "❌ No Thanks",
-        
-        # Stats
-        "stats": (
-            "📊 *Your Statistics:*\n\n"
-            "📄 PDFs processed: {pdfs}\n"
-            "🖼️ Images converted: {images}\n"
-            "🔗 Files merged: {merged}\n"
-            "⏱️ Member since: {date}"
-        ),
-    },
-    "fa": {
-        # Welcome and Basic
-        "welcome": (
-            "👋 *به ربات PDF خوش آمدید!*\n\n"
-            "🔧 همه ابزارهای مورد نیاز برای کار با PDF در یک مکان!\n\n"
-            "✨ *امکانات:*\n"
-            "• تبدیل تصاویر و اسناد به PDF\n"
-            "• ادغام، تقسیم و سازماندهی PDF\n"
-            "• فشرده‌سازی و بهینه‌سازی PDF\n"
-            "• افزودن واترمارک و شماره صفحه\n"
-            "• امنیت PDF با رمز عبور\n"
-            "• استخراج متن و تصاویر\n"
-            "• پشتیبانی OCR برای اسناد اسکن شده\n"
-            "• و خیلی بیشتر!\n\n"
-            "زبان خود را با استفاده از دکمه‌های زیر انتخاب کنید."
-        ),
-        "help": (
-            "📚 *نحوه استفاده:*\n\n"
-            "1️⃣ یک ابزار از منو انتخاب کنید\n"
-            "2️⃣ دستورالعمل‌ها را دنبال کنید\n"
-            "3️⃣ فایل‌های خود را ارسال کنید\n"
-            "4️⃣ PDF پردازش شده را دریافت کنید!\n\n"
-            "*دستورات:*\n"
-            "/start - شروع ربات\n"
-            "/help - نمایش راهنما\n"
-            "/language - تغییر زبان\n"
-            "/cancel - لغو عملیات فعلی\n"
-            "/subscribe - اشتراک در به‌روزرسانی‌ها\n"
-            "/unsubscribe - لغو اشتراک\n\n"
-            "*پشتیبانی:*\n"
-            "برای مشکلات یا پیشنهادات، با @YourSupportUsername تماس بگیرید"
-        ),
-        "choose_language": "🌐 لطفا زبان خود را انتخاب کنید:",
-        "language_changed": "✅ زبان به فارسی تغییر کرد!",
-        "processing": "⏳ در حال پردازش فایل شما...",
-        "converting": "🔄 در حال تبدیل به PDF...",
-        "success": "✅ انجام شد! PDF شما آماده است.",
-        "error": "❌ خطایی رخ داد. لطفا دوباره تلاش کنید.",
-        "unsupported": "❌ این فرمت فایل هنوز پشتیبانی نمی‌شود.",
-        "choose_action": "📋 یک ابزار PDF انتخاب کنید:",
-        "back": "🔙 بازگشت",
-        "cancel": "❌ لغو",
-        "done": "✅ انجام شد",
-        "operation_cancelled": "❌ عملیات لغو شد.",
-        "file_too_large": "❌ فایل خیلی بزرگ است. حداکثر اندازه {max_size}MB است.",
-        "invalid_input": "❌ ورودی نامعتبر. لطفا دوباره تلاش کنید.",
-        
-        # Main menu categories (keeping the same structure as English)
-        "organize_pdf": "📑 سازماندهی PDF",
-        "optimize_pdf": "⚡ بهینه‌سازی PDF",
-        "convert_pdf": "🔄 تبدیل PDF",
-        "edit_pdf": "✏️ ویرایش PDF",
-        "pdf_security": "🔒 امنیت PDF",
-        
-        # ... (Continue with all Persian translations following the same pattern)
-        # For brevity, I'll add key ones:
-        
-        "merge_pdfs": "🔗 ادغام PDF",
-        "split_pdf": "✂️ تقسیم PDF",
-        "compress_pdf": "🗜️ فشرده‌سازی PDF",
-        "rotate_pdf": "🔄 چرخش PDF",
-        "unlock_pdf": "🔓 باز کردن قفل PDF",
-        "protect_pdf": "🔒 محافظت از PDF",
-        
-        "send_images": "📸 تصاویر را برای تبدیل به PDF ارسال کنید.\n\n💡 تصاویر متعدد ارسال کنید و من آنها را در یک PDF ترکیب می‌کنم.",
-        "images_count": "📸 تصاویر دریافت شده: *{count}*\n\n✅ تصاویر بیشتری ارسال کنید یا روی *انجام شد* کلیک کنید.",
+import json
+import sys
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+from config.settings import DEFAULT_LANGUAGE, SUPPORTED_LANGUAGES
+
+# One <lang>.json per SUPPORTED_LANGUAGES entry; any other code falls back to the
+# default (user-supplied codes are never turned into file paths)
+LOCALES_DIR = Path(__file__).resolve().parent / "locales"
+
+
+@lru_cache(maxsize=None)
+def _lang_texts(lang: str) -> Dict[str, str]:
+    """
+    Load all texts for a language, with default-language fallbacks filled in
+    
+    Args:
+        lang: Language code from SUPPORTED_LANGUAGES
         
-        # Continue with all other translations...
-    }
-}
+    Returns:
+        Dictionary of interned texts by key
+    """
+    with open(LOCALES_DIR / f"{lang}.json", encoding="utf-8") as f:
+        own = json.load(f)
+    
+    texts = {} if lang == DEFAULT_LANGUAGE else dict(_lang_texts(DEFAULT_LANGUAGE))
+    texts.update((key, sys.intern(value)) for key, value in own.items())
+    return texts
 
-# Default language
-DEFAULT_LANGUAGE = "en"
+
+def _get_text_plain(lang: str, key: str) -> str:
+    """Look up unformatted text; unknown languages use the default language"""
+    texts = _lang_texts(lang if lang in SUPPORTED_LANGUAGES else DEFAULT_LANGUAGE)
+    text = texts.get(key)
+    return text if text is not None else f"Missing: {key}"
 
 
 def get_text(lang: str, key: str, **kwargs) -> str:
@@ -309,15 +54,6 @@ def get_text(lang: str, key: str, **kwargs) -> str:
     Returns:
         Formatted text string
     """
-    text = TEXTS.get(lang, TEXTS[DEFAULT_LANGUAGE]).get(
-        key, 
-        TEXTS[DEFAULT_LANGUAGE].get(key, f"Missing: {key}")
-    )
-    
-    if kwargs:
-        try:
-            return text.format(**kwargs)
-        except (KeyError, ValueError):
-            return text
-    
-    return text
\ No newline at end of file
+    text = _get_text_plain(lang, key)
+    # Placeholders without a matching argument format as empty strings
+    return text.format_map(defaultdict(str, kwargs)) if kwargs else text
\ No newline at end of file
@@ -6,9 +6,10 @@ A comprehensive Telegram bot for PDF operations
 
 import logging
 import logging.config
-from flask import Flask, request
+from aiohttp import web
 from telegram import Update
 from telegram.ext import (
+    AIORateLimiter,
     Application,
     CommandHandler,
     MessageHandler,
@@ -16,23 +17,27 @@ from telegram.ext import (
     filters,
 )
 import asyncio
-import threading
-import time
+import json
+import sys
 
 from config.settings import (
-    BOT_TOKEN, LOGGING_CONFIG, USE_WEBHOOK, WEBHOOK_URL,
-    WEBHOOK_PATH, PORT
+    ensure_dirs, BOT_TOKEN, LOGGING_CONFIG, USE_WEBHOOK, WEBHOOK_URL,
+    WEBHOOK_PATH, PORT, HTTP_VERSION, CONNECTION_POOL_SIZE, POOL_TIMEOUT,
+    RATE_LIMIT_MAX_RETRIES, MAX_CONCURRENT_UPDATES, POLLING_TIMEOUT
 )
 from bot import handlers, callbacks
+from bot.stats import start_stats_refresher, stop_stats_refresher
+from bot.update_processor import PerChatUpdateProcessor
+from utils.subscriber_manager import start_subscriber_flusher, stop_subscriber_flusher
+from utils.executors import prestart_process_pool, shutdown_pools
+from services._cache import start_cache_pruner, stop_cache_pruner
+from utils.file_manager import close_http_client
+from utils.log_queue import start_queue_logging, stop_queue_logging
 
-# Configure logging
-logging.config.dictConfig(LOGGING_CONFIG)
 logger = logging.getLogger(__name__)
 
 # Global variables
 application = None
-flask_app = Flask(__name__)
-loop = None
 
 
 def create_application():
@@ -46,7 +51,23 @@ def create_application():
     logger.info("Creating PDF Bot application...")
 
     # Create the Application
-    application = Application.builder().token(BOT_TOKEN).build()
+    builder = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .http_version(HTTP_VERSION)
+        .connection_pool_size(CONNECTION_POOL_SIZE)
+        .pool_timeout(POOL_TIMEOUT)
+        # Throttle outgoing calls to Telegram's limits (30/s overall, 20/min per group)
+        .rate_limiter(AIORateLimiter(max_retries=RATE_LIMIT_MAX_RETRIES))
+        # A slow conversion in one chat must not hold up commands from other chats
+        .concurrent_updates(PerChatUpdateProcessor(MAX_CONCURRENT_UPDATES))
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+    )
+    if USE_WEBHOOK:
+        # Updates are pushed to us by Telegram; no getUpdates poller needed
+        builder = builder.updater(None)
+    application = builder.build()
 
     # Command handlers
     application.add_handler(CommandHandler("start", handlers.start_command))
@@ -77,59 +98,59 @@ def create_application():
     return application
 
 
-@flask_app.route('/')
-def health_check():
-    """Health check endpoint for Render"""
-    return {"status": "ok", "message": "PDF Bot is running"}
+async def post_init(app: Application) -> None:
+    """Start background services once the event loop is running"""
+    await start_subscriber_flusher()
+    await start_stats_refresher()
+    await prestart_process_pool()
+    await start_cache_pruner()
 
 
-@flask_app.route(WEBHOOK_PATH, methods=['POST'])
-def webhook():
-    """Webhook endpoint for Telegram updates"""
-    global loop
+async def post_shutdown(app: Application) -> None:
+    """Flush and stop background services"""
+    await stop_cache_pruner()
+    await stop_stats_refresher()
+    await stop_subscriber_flusher()
+    await close_http_client()
+    shutdown_pools()
 
-    if not application or not loop:
-        return {"error": "Bot not initialized"}, 500
 
-    try:
-        # Get the update from Telegram
-        update_data = request.get_json()
-        if not update_data:
-            return {"error": "No JSON data received"}, 400
+async def health_check(request: web.Request) -> web.Response:
+    """Health check endpoint for Render"""
+    return web.json_response({"status": "ok", "message": "PDF Bot is running"})
 
-        # Create Update object
-        update = Update.de_json(update_data, application.bot)
 
-        # Process the update asynchronously
-        asyncio.run_coroutine_threadsafe(process_update(update), loop)
+async def webhook(request: web.Request) -> web.Response:
+    """Webhook endpoint for Telegram updates"""
+    if not application:
+        return web.json_response({"error": "Bot not initialized"}, status=500)
 
-        return {"status": "ok"}
+    raw = await request.read()
+    if not raw:
+        return web.json_response({"error": "No data received"}, status=400)
 
+    try:
+        update = Update.de_json(json.loads(raw), application.bot)
+        # Hand the update to the application's dispatcher (unbounded queue, never blocks)
+        application.update_queue.put_nowait(update)
     except Exception as e:
+        # Answer 200 anyway so Telegram doesn't keep redelivering a bad update
         logger.error(f"Webhook error: {e}")
-        return {"error": str(e)}, 500
 
+    return web.json_response({"status": "ok"})
 
-async def process_update(update: Update):
-    """Process a Telegram update asynchronously"""
-    try:
-        await application.process_update(update)
-    except Exception as e:
-        logger.error(f"Error processing update: {e}")
 
-
-def run_flask():
-    """Run the Flask web server"""
-    try:
-        logger.info(f"Starting Flask server on port {PORT}")
-        flask_app.run(host='0.0.0.0', port=PORT, debug=False)
-    except Exception as e:
-        logger.error(f"Flask server error: {e}")
+def create_web_app() -> web.Application:
+    """Create the aiohttp app serving the health check and webhook on the bot's event loop"""
+    web_app = web.Application()
+    web_app.router.add_get('/', health_check)
+    web_app.router.add_post(WEBHOOK_PATH, webhook)
+    return web_app
 
 
 async def run_webhook():
     """Run the bot with webhook"""
-    global application, loop
+    global application
 
     if not WEBHOOK_URL:
         logger.error("WEBHOOK_URL not set! Please set it in environment variables")
@@ -139,10 +160,12 @@ async def run_webhook():
     if not app:
         return
 
-    # Initialize the application
+    # Initialize and start the application (starts dispatching update_queue)
     await app.initialize()
+    await post_init(app)
+    await app.start()
     application = app  # Set the global application
-    loop = asyncio.get_event_loop()  # Set the global loop
+    runner = None
 
     # Set webhook
     webhook_full_url = f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}"
@@ -152,11 +175,13 @@ async def run_webhook():
         await app.bot.set_webhook(url=webhook_full_url)
         logger.info("✅ Webhook set successfully!")
 
-        # Start Flask server in a separate thread
-        flask_thread = threading.Thread(target=run_flask, daemon=True)
-        flask_thread.start()
+        # Serve webhook posts on this event loop
+        runner = web.AppRunner(create_web_app())
+        await runner.setup()
+        await web.TCPSite(runner, '0.0.0.0', PORT).start()
+        logger.info(f"Webhook server listening on port {PORT}")
 
-        # Keep the main thread alive
+        # Keep the event loop (and with it the server) alive
         while True:
             await asyncio.sleep(60)  # Check every minute
             logger.info("Bot is running with webhook...")
@@ -164,11 +189,16 @@ async def run_webhook():
     except Exception as e:
         logger.error(f"Webhook setup error: {e}")
     finally:
+        if runner:
+            await runner.cleanup()
         if app:
             await app.bot.delete_webhook()
+            await app.stop()
+            await post_shutdown(app)
+            await app.shutdown()
 
 
-async def run_polling():
+def run_polling():
     """Run the bot with polling (for local development)"""
     app = create_application()
     if not app:
@@ -178,7 +208,13 @@ async def run_polling():
     logger.info("Bot is ready to accept messages...")
 
     try:
-        await app.run_polling(
+        # Application.run_polling owns the event loop, so it is called outside asyncio.run.
+        # Each getUpdates waits up to POLLING_TIMEOUT seconds and returns up to 100 updates,
+        # and the next poll is sent as soon as a batch arrives.
+        app.run_polling(
+            poll_interval=0.0,
+            timeout=POLLING_TIMEOUT,
+            bootstrap_retries=-1,
             allowed_updates=Update.ALL_TYPES,
             drop_pending_updates=True
         )
@@ -186,16 +222,36 @@ async def run_polling():
         logger.error(f"Polling error: {e}")
 
 
+def install_uvloop() -> None:
+    """Use uvloop's libuv event loop when it is available (not on Windows)"""
+    if sys.platform == "win32":
+        return
+    try:
+        import uvloop
+    except ImportError:
+        logger.info("uvloop not installed, using the default asyncio event loop")
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("Using uvloop event loop")
+
+
 def main() -> None:
     """Start the bot"""
+    # Create runtime directories (the file log handler needs logs/), then configure logging
+    # (handlers run on a listener thread; see utils.log_queue)
+    ensure_dirs()
+    logging.config.dictConfig(LOGGING_CONFIG)
+    start_queue_logging()
+
     logger.info("Starting PDF Bot...")
+    install_uvloop()
 
     if USE_WEBHOOK:
         logger.info("Using webhook mode (for production)")
         asyncio.run(run_webhook())
     else:
         logger.info("Using polling mode (for local development)")
-        asyncio.run(run_polling())
+        run_polling()
 
 
 if __name__ == "__main__":
@@ -204,4 +260,6 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
-        logger.error(f"Fatal error: {e}", exc_info=True)
\ No newline at end of file
+        logger.error(f"Fatal error: {e}", exc_info=True)
+    finally:
+        stop_queue_logging()
\ No newline at end of file
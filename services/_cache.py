@@ -0,0 +1,160 @@
+"""
+Conversion Result Cache
+Reuses earlier outputs when the same file is submitted for the same operation again
+"""
+
+import asyncio
+import functools
+import hashlib
+import logging
+import os
+import shutil
+import time
+from contextlib import suppress
+from typing import Callable, Optional
+from config.settings import CACHE_DIR, CACHE_EXPIRY, CACHE_MAX_MB, ENABLE_CACHE
+
+logger = logging.getLogger(__name__)
+
+# Inputs are hashed in chunks of this size
+HASH_CHUNK_SIZE = 64 * 1024
+
+# How often the cache directory is pruned (seconds)
+CACHE_PRUNE_INTERVAL = 3600
+
+_prune_task: Optional[asyncio.Task] = None
+
+
+def file_digest(file_path: str) -> str:
+    """
+    Hash a file's contents without reading it into memory at once
+    
+    Args:
+        file_path: Path to file
+        
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    """Place src at dst as a hard link (a copy across filesystems), replacing dst"""
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def cached(op_name: str, ext: str) -> Callable:
+    """
+    Cache a conversion's output by the content of its input file
+    
+    The wrapped function must take the input path first and the optional
+    output path second. On a hit the cached file is linked to the output
+    path (callers delete their outputs, the cache keeps its own link).
+    
+    Args:
+        op_name: Operation name, part of the cache key
+        ext: Extension of the output file (e.g. '.pdf')
+        
+    Returns:
+        Decorator
+    """
+    def decorator(func: Callable[..., str]) -> Callable[..., str]:
+        @functools.wraps(func)
+        def wrapper(input_path: str, output_path: str = None, *args, **kwargs) -> str:
+            if not ENABLE_CACHE:
+                return func(input_path, output_path, *args, **kwargs)
+            
+            try:
+                key = hashlib.sha256(
+                    f"{op_name}:{file_digest(input_path)}:{args!r}:{sorted(kwargs.items())!r}".encode()
+                ).hexdigest()
+            except OSError:
+                return func(input_path, output_path, *args, **kwargs)
+            
+            cache_path = os.path.join(CACHE_DIR, key + ext)
+            try:
+                fresh = time.time() - os.path.getmtime(cache_path) < CACHE_EXPIRY
+            except OSError:
+                fresh = False
+            
+            if fresh:
+                target = output_path or os.path.splitext(input_path)[0] + f"_{op_name}{ext}"
+                _link_or_copy(cache_path, target)
+                logger.info(f"Cache hit for {op_name}: {target}")
+                return target
+            
+            result = func(input_path, output_path, *args, **kwargs)
+            
+            if result != input_path:
+                try:
+                    _link_or_copy(result, cache_path)
+                except OSError as e:
+                    logger.warning(f"Could not cache {op_name} result: {e}")
+            return result
+        
+        return wrapper
+    return decorator
+
+
+def prune_cache() -> None:
+    """Delete cached outputs older than CACHE_EXPIRY, then the oldest ones until the cache fits CACHE_MAX_MB"""
+    try:
+        now = time.time()
+        entries = []
+        for entry in os.scandir(CACHE_DIR):
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            if now - stat.st_mtime >= CACHE_EXPIRY:
+                with suppress(FileNotFoundError):
+                    os.remove(entry.path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        
+        total_size = sum(size for _, size, _ in entries)
+        max_size = CACHE_MAX_MB * 1024 * 1024
+        for _, size, path in sorted(entries):
+            if total_size <= max_size:
+                break
+            with suppress(FileNotFoundError):
+                os.remove(path)
+            total_size -= size
+    except Exception as e:
+        logger.error(f"Error pruning cache: {e}")
+
+
+async def _prune_periodically() -> None:
+    """Prune the cache now and then every CACHE_PRUNE_INTERVAL seconds"""
+    while True:
+        await asyncio.to_thread(prune_cache)
+        await asyncio.sleep(CACHE_PRUNE_INTERVAL)
+
+
+async def start_cache_pruner() -> None:
+    """Start pruning the cache in the background (call once the event loop is running)"""
+    global _prune_task
+    if _prune_task is None:
+        _prune_task = asyncio.create_task(_prune_periodically())
+
+
+async def stop_cache_pruner() -> None:
+    """Stop the background pruning"""
+    global _prune_task
+    if _prune_task is None:
+        return
+    
+    _prune_task.cancel()
+    try:
+        await _prune_task
+    except asyncio.CancelledError:
+        pass
+    _prune_task = None
\ No newline at end of file
@@ -0,0 +1,162 @@
+"""
+Shared PDF Documents
+Read-only operations on the same PDF reuse one parsed PyMuPDF document per process,
+and page-by-page work is split into page ranges processed across the pool
+"""
+
+import asyncio
+import atexit
+import os
+from functools import lru_cache
+from typing import Any, Callable, List, Tuple
+from config.settings import PDF_WORKERS
+from utils.executors import run_in_process
+
+# Documents kept open per process (each holds its parsed xref table and a file handle)
+MAX_OPEN_DOCUMENTS = 8
+
+
+def open_pdf(pdf_path: str):
+    """
+    Open a PDF for reading, reusing the document parsed by an earlier call
+    
+    The document is shared: callers must not modify or close it.
+    
+    Args:
+        pdf_path: Path to PDF
+        
+    Returns:
+        fitz.Document
+    """
+    stat = os.stat(pdf_path)
+    # A file rewritten in place gets a new mtime/size and so a fresh document
+    return _open_pdf(os.path.abspath(pdf_path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=MAX_OPEN_DOCUMENTS)
+def _open_pdf(pdf_path: str, mtime_ns: int, size: int):
+    """Parse a PDF (cached by path, modification time and size)"""
+    import fitz
+    return fitz.open(pdf_path)
+
+
+# Dropping the cache releases the documents (and their file handles)
+atexit.register(_open_pdf.cache_clear)
+
+
+def count_pages(pdf_path: str) -> int:
+    """
+    Get the number of pages in a PDF (PyMuPDF, or poppler's pdfinfo without it)
+    
+    Run it in the process pool: the parsed document then stays cached for the
+    worker's page jobs, and PyMuPDF is never used from several threads at once.
+    
+    Args:
+        pdf_path: Path to PDF
+        
+    Returns:
+        Number of pages
+    """
+    try:
+        import fitz  # noqa: F401
+    except ImportError:
+        from pdf2image import pdfinfo_from_path
+        return int(pdfinfo_from_path(pdf_path)["Pages"])
+    
+    return open_pdf(pdf_path).page_count
+
+
+def page_ranges(page_count: int, parts: int) -> List[Tuple[int, int]]:
+    """
+    Split pages into contiguous ranges of near-equal size
+    
+    Args:
+        page_count: Number of pages
+        parts: Maximum number of ranges
+        
+    Returns:
+        List of 0-based (start, stop) ranges, stop exclusive
+    """
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def join_pdfs(part_paths: List[str], output_path: str) -> str:
+    """
+    Concatenate partial PDFs into one file
+    
+    Args:
+        part_paths: Paths of the partial PDFs, in order
+        output_path: Output PDF path
+        
+    Returns:
+        Path to output PDF
+    """
+    try:
+        import fitz
+    except ImportError:
+        from pypdf import PdfWriter
+        
+        writer = PdfWriter()
+        for part_path in part_paths:
+            writer.append(part_path)
+        with open(output_path, 'wb') as output_file:
+            writer.write(output_file)
+        return output_path
+    
+    with fitz.open() as doc:
+        for part_path in part_paths:
+            with fitz.open(part_path) as part:
+                doc.insert_pdf(part)
+        doc.save(output_path, garbage=3, deflate=True)
+    return output_path
+
+
+async def process_page_ranges(pdf_path: str, output_path: str,
+                              job: Callable[..., str], *args: Any) -> str:
+    """
+    Run a page-range job over a whole PDF in parallel and join the results
+    
+    The pages are split into one range per pool worker. Each range is handled by
+    job(pdf_path, start, stop, part_path, *args), which writes its pages to part_path.
+    
+    Args:
+        pdf_path: Path to input PDF
+        output_path: Output PDF path
+        job: Module-level (picklable) function processing one page range
+        *args: Extra arguments for job (must be picklable)
+        
+    Returns:
+        Path to output PDF
+    """
+    page_count = await run_in_process(count_pages, pdf_path)
+    base = output_path.rsplit('.', 1)[0]
+    part_paths = []
+    
+    try:
+        jobs = []
+        for i, (start, stop) in enumerate(page_ranges(page_count, PDF_WORKERS)):
+            part_path = f"{base}_part{i}.pdf"
+            part_paths.append(part_path)
+            jobs.append(run_in_process(job, pdf_path, start, stop, part_path, *args))
+        # Let every job finish before the parts are cleaned up, then surface the first error
+        for result in await asyncio.gather(*jobs, return_exceptions=True):
+            if isinstance(result, BaseException):
+                raise result
+        
+        if len(part_paths) == 1:
+            os.replace(part_paths[0], output_path)
+        else:
+            await run_in_process(join_pdfs, part_paths, output_path)
+        return output_path
+    finally:
+        for part_path in part_paths:
+            if os.path.exists(part_path):
+                os.remove(part_path)
\ No newline at end of file
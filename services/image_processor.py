@@ -2,15 +2,34 @@
 Image Processing Services
 """
 
+import asyncio
 import os
 import logging
-from typing import List
+from typing import Callable, Dict, List
 from PIL import Image
 
+from services._documents import count_pages, open_pdf
+from utils.executors import run_in_process
+
 logger = logging.getLogger(__name__)
 
+# Extra options for standalone JPEG files: Huffman-optimized, progressive scans
+# (smaller files to upload at the same quality)
+_JPEG_SAVE_OPTIONS = {"optimize": True, "progressive": True}
 
-async def images_to_pdf(image_paths: List[str], output_path: str = None) -> str:
+# Image modes Pillow's PDF writer embeds as-is (others are converted to RGB first)
+_PDF_NATIVE_MODES = frozenset(("RGB", "L", "1", "CMYK"))
+
+# Image modes a JPEG file can store (others are converted to RGB first)
+_JPEG_MODES = frozenset(("RGB", "L", "CMYK"))
+
+
+def _ensure_mode(img: Image.Image, allowed_modes: frozenset = _JPEG_MODES) -> Image.Image:
+    """Convert to RGB only if needed (Pillow copies the whole image even for a same-mode convert)"""
+    return img if img.mode in allowed_modes else img.convert('RGB')
+
+
+def _images_to_pdf_sync(image_paths: List[str], output_path: str = None) -> str:
     """
     Convert multiple images to a single PDF
     
@@ -25,16 +44,24 @@ async def images_to_pdf(image_paths: List[str], output_path: str = None) -> str:
         if not image_paths:
             raise ValueError("No images provided")
         
-        # Open all images and convert to RGB
+        # Create output path if not provided
+        if not output_path:
+            output_dir = os.path.dirname(image_paths[0])
+            output_path = os.path.join(output_dir, 'images_combined.pdf')
+        
+        if _images_to_pdf_img2pdf(image_paths, output_path):
+            logger.info(f"Created PDF from {len(image_paths)} images: {output_path}")
+            return output_path
+        
+        # Pillow fallback: open lazily and only convert modes the PDF writer can't embed
         images = []
         for img_path in image_paths:
             try:
                 img = Image.open(img_path)
-                # Convert to RGB if necessary
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                images.append(img)
-                logger.info(f"Loaded image: {img_path}")
+                converted = _ensure_mode(img, _PDF_NATIVE_MODES)
+                if converted is not img:
+                    img.close()
+                images.append(converted)
             except Exception as e:
                 logger.error(f"Error loading image {img_path}: {e}")
                 continue
@@ -42,22 +69,18 @@ async def images_to_pdf(image_paths: List[str], output_path: str = None) -> str:
         if not images:
             raise ValueError("No valid images found")
         
-        # Create output path if not provided
-        if not output_path:
-            output_dir = os.path.dirname(image_paths[0])
-            output_path = os.path.join(output_dir, 'images_combined.pdf')
-        
-        # Save all images as a single PDF
-        if len(images) == 1:
-            images[0].save(output_path, 'PDF', resolution=100.0)
-        else:
+        try:
+            # Save all images as a single PDF
             images[0].save(
                 output_path,
                 'PDF',
                 resolution=100.0,
-                save_all=True,
+                save_all=len(images) > 1,
                 append_images=images[1:]
             )
+        finally:
+            for img in images:
+                img.close()
         
         logger.info(f"Created PDF from {len(images)} images: {output_path}")
         return output_path
@@ -67,52 +90,79 @@ async def images_to_pdf(image_paths: List[str], output_path: str = None) -> str:
         raise
 
 
-async def pdf_to_images(pdf_path: str, output_dir: str = None, format: str = 'jpg') -> List[str]:
+def _images_to_pdf_img2pdf(image_paths: List[str], output_path: str) -> bool:
     """
-    Convert PDF pages to images
+    Embed the images in a PDF with img2pdf, without decoding or re-encoding them
+    
+    Args:
+        image_paths: List of paths to image files
+        output_path: Output PDF path
+        
+    Returns:
+        True if the PDF was written, False if img2pdf is missing or can't take these images
+    """
+    try:
+        import img2pdf
+    except ImportError:
+        return False
+    
+    try:
+        # Same page size as the Pillow path (100 pixels per inch)
+        layout = img2pdf.get_fixed_dpi_layout_fun((100, 100))
+        with open(output_path, 'wb') as f:
+            f.write(img2pdf.convert(image_paths, layout_fun=layout))
+        return True
+    except Exception as e:
+        # e.g. images with an alpha channel or unreadable files; Pillow handles those
+        logger.info(f"img2pdf could not convert images, falling back to Pillow: {e}")
+        return False
+
+
+def _render_page_sync(pdf_path: str, page_number: int, output_path: str, format: str = 'jpg') -> str:
+    """
+    Render one PDF page to an image file (PyMuPDF, or pdf2image without it)
     
     Args:
         pdf_path: Path to input PDF
-        output_dir: Output directory (optional)
+        page_number: 1-based page number
+        output_path: Output image path
         format: Image format ('jpg' or 'png')
         
     Returns:
-        List of image paths
+        Path to the image
     """
     try:
-        from pdf2image import convert_from_path
-        
-        if not output_dir:
-            output_dir = os.path.dirname(pdf_path)
-        
-        # Convert PDF to images
-        images = convert_from_path(pdf_path, dpi=300)
-        image_paths = []
-        
-        for i, image in enumerate(images):
-            output_path = os.path.join(
-                output_dir,
-                f"page_{i+1}.{format}"
-            )
-            
-            if format.lower() == 'jpg':
-                image = image.convert('RGB')
-                image.save(output_path, 'JPEG', quality=95)
-            else:
-                image.save(output_path, 'PNG')
-            
-            image_paths.append(output_path)
-            logger.info(f"Converted page {i+1} to image: {output_path}")
-        
-        logger.info(f"Converted {len(image_paths)} pages to {format.upper()}")
-        return image_paths
+        import fitz
+    except ImportError:
+        fitz = None
+    
+    if fitz is not None:
+        # Rasterize in-process and encode the pixmap directly (no pdftoppm, no PIL round trip);
+        # the parsed document is reused by the worker's following pages
+        pix = open_pdf(pdf_path)[page_number - 1].get_pixmap(dpi=300, colorspace=fitz.csRGB)
+        if format.lower() == 'jpg':
+            pix.save(output_path, output='jpeg', jpg_quality=95)
+        else:
+            pix.save(output_path, output='png')
         
-    except Exception as e:
-        logger.error(f"Error converting PDF to images: {e}")
-        raise
+        logger.info(f"Converted page {page_number} to image: {output_path}")
+        return output_path
+    
+    from pdf2image import convert_from_path
+    
+    image = convert_from_path(pdf_path, dpi=300, first_page=page_number, last_page=page_number)[0]
+    
+    if format.lower() == 'jpg':
+        image = _ensure_mode(image)
+        image.save(output_path, 'JPEG', quality=95, **_JPEG_SAVE_OPTIONS)
+    else:
+        image.save(output_path, 'PNG')
+    
+    logger.info(f"Converted page {page_number} to image: {output_path}")
+    return output_path
 
 
-async def resize_image(image_path: str, max_width: int = 1920, max_height: int = 1920) -> str:
+def _resize_image_sync(image_path: str, max_width: int = 1920, max_height: int = 1920) -> str:
     """
     Resize image maintaining aspect ratio
     
@@ -127,12 +177,18 @@ async def resize_image(image_path: str, max_width: int = 1920, max_height: int =
     try:
         img = Image.open(image_path)
         
-        # Calculate new size maintaining aspect ratio
+        # Image.open only reads the header; an image that already fits is never decoded
+        if img.width <= max_width and img.height <= max_height:
+            img.close()
+            return image_path
+        
+        # Calculate new size maintaining aspect ratio (thumbnail() also sets
+        # draft mode, so libjpeg DCT-downscales large JPEGs while decoding)
         img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
         
-        # Save back to same path
-        if img.mode == 'RGBA':
-            img = img.convert('RGB')
+        # Save back to same path (the extension picks the format; only JPEG needs a mode change)
+        if os.path.splitext(image_path)[1].lower() in ('.jpg', '.jpeg'):
+            img = _ensure_mode(img)
         
         img.save(image_path, quality=95)
         logger.info(f"Resized image: {image_path}")
@@ -144,7 +200,7 @@ async def resize_image(image_path: str, max_width: int = 1920, max_height: int =
         raise
 
 
-async def compress_image(image_path: str, quality: int = 85) -> str:
+def _compress_image_sync(image_path: str, quality: int = 85) -> str:
     """
     Compress image
     
@@ -160,10 +216,8 @@ async def compress_image(image_path: str, quality: int = 85) -> str:
         
         output_path = image_path.rsplit('.', 1)[0] + '_compressed.jpg'
         
-        if img.mode == 'RGBA':
-            img = img.convert('RGB')
-        
-        img.save(output_path, 'JPEG', quality=quality, optimize=True)
+        img = _ensure_mode(img)
+        img.save(output_path, 'JPEG', quality=quality, **_JPEG_SAVE_OPTIONS)
         logger.info(f"Compressed image: {output_path}")
         
         return output_path
@@ -173,7 +227,36 @@ async def compress_image(image_path: str, quality: int = 85) -> str:
         raise
 
 
-async def convert_image_format(image_path: str, target_format: str) -> str:
+def _save_jpeg(img: Image.Image, output_path: str) -> None:
+    """Save as JPEG, flattening modes JPEG can't store"""
+    _ensure_mode(img).save(output_path, 'JPEG', quality=95, **_JPEG_SAVE_OPTIONS)
+
+
+def _save_png(img: Image.Image, output_path: str) -> None:
+    """Save as PNG"""
+    img.save(output_path, 'PNG')
+
+
+def _save_webp(img: Image.Image, output_path: str) -> None:
+    """Save as WebP"""
+    img.save(output_path, 'WEBP', quality=95)
+
+
+def _save_by_extension(img: Image.Image, output_path: str) -> None:
+    """Save in the format Pillow infers from the file extension"""
+    img.save(output_path)
+
+
+# Saver per target format for convert_image_format (other formats use _save_by_extension)
+_FORMAT_SAVERS: Dict[str, Callable[[Image.Image, str], None]] = {
+    'jpg': _save_jpeg,
+    'jpeg': _save_jpeg,
+    'png': _save_png,
+    'webp': _save_webp,
+}
+
+
+def _convert_image_format_sync(image_path: str, target_format: str) -> str:
     """
     Convert image to different format
     
@@ -187,18 +270,10 @@ async def convert_image_format(image_path: str, target_format: str) -> str:
     try:
         img = Image.open(image_path)
         
-        output_path = image_path.rsplit('.', 1)[0] + f'.{target_format.lower()}'
+        target_format = target_format.lower()
+        output_path = image_path.rsplit('.', 1)[0] + f'.{target_format}'
         
-        if target_format.lower() in ['jpg', 'jpeg']:
-            if img.mode in ('RGBA', 'LA', 'P'):
-                img = img.convert('RGB')
-            img.save(output_path, 'JPEG', quality=95)
-        elif target_format.lower() == 'png':
-            img.save(output_path, 'PNG')
-        elif target_format.lower() == 'webp':
-            img.save(output_path, 'WEBP', quality=95)
-        else:
-            img.save(output_path)
+        _FORMAT_SAVERS.get(target_format, _save_by_extension)(img, output_path)
         
         logger.info(f"Converted image to {target_format.upper()}: {output_path}")
         return output_path
@@ -208,7 +283,7 @@ async def convert_image_format(image_path: str, target_format: str) -> str:
         raise
 
 
-async def rotate_image(image_path: str, angle: int) -> str:
+def _rotate_image_sync(image_path: str, angle: int) -> str:
     """
     Rotate image
     
@@ -234,4 +309,66 @@ async def rotate_image(image_path: str, angle: int) -> str:
         
     except Exception as e:
         logger.error(f"Error rotating image: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+# Async entry points: the blocking work above runs in the shared process pool
+async def images_to_pdf(image_paths: List[str], output_path: str = None) -> str:
+    """Convert multiple images to a single PDF"""
+    return await run_in_process(_images_to_pdf_sync, image_paths, output_path)
+
+
+async def pdf_to_images(pdf_path: str, output_dir: str = None, format: str = 'jpg') -> List[str]:
+    """
+    Convert PDF pages to images, rendering the pages in parallel across the pool
+    
+    Args:
+        pdf_path: Path to input PDF
+        output_dir: Output directory (optional)
+        format: Image format ('jpg' or 'png')
+        
+    Returns:
+        List of image paths, in page order
+    """
+    try:
+        if not output_dir:
+            output_dir = os.path.dirname(pdf_path)
+        
+        page_count = await run_in_process(count_pages, pdf_path)
+        image_paths = await asyncio.gather(*(
+            run_in_process(
+                _render_page_sync, pdf_path, page_number,
+                os.path.join(output_dir, f"page_{page_number}.{format}"), format
+            )
+            for page_number in range(1, page_count + 1)
+        ))
+        
+        logger.info(f"Converted {len(image_paths)} pages to {format.upper()}")
+        return list(image_paths)
+        
+    except ImportError:
+        logger.error("PyMuPDF or pdf2image required. Install with: pip install PyMuPDF")
+        raise
+    except Exception as e:
+        logger.error(f"Error converting PDF to images: {e}")
+        raise
+
+
+async def resize_image(image_path: str, max_width: int = 1920, max_height: int = 1920) -> str:
+    """Resize image maintaining aspect ratio"""
+    return await run_in_process(_resize_image_sync, image_path, max_width, max_height)
+
+
+async def compress_image(image_path: str, quality: int = 85) -> str:
+    """Compress image"""
+    return await run_in_process(_compress_image_sync, image_path, quality)
+
+
+async def convert_image_format(image_path: str, target_format: str) -> str:
+    """Convert image to different format"""
+    return await run_in_process(_convert_image_format_sync, image_path, target_format)
+
+
+async def rotate_image(image_path: str, angle: int) -> str:
+    """Rotate image"""
+    return await run_in_process(_rotate_image_sync, image_path, angle)
\ No newline at end of file
@@ -3,16 +3,64 @@ PDF Conversion Services
 Handles conversion between PDF and other formats
 """
 
+import asyncio
 import os
 import logging
 from typing import Optional
 from PIL import Image
 from fpdf import FPDF
 
+from config.settings import PDF_WORKERS
+from services.image_processor import pdf_to_images  # single implementation, re-exported here
+from services._cache import cached
+from services._documents import open_pdf
+from utils.executors import run_in_process, run_in_thread
+
 logger = logging.getLogger(__name__)
 
+# LibreOffice conversions allowed at once across all requests (they run in threads)
+_libreoffice_slots = asyncio.Semaphore(PDF_WORKERS)
 
-async def convert_image_to_pdf(image_path: str, output_path: str = None) -> str:
+
+def libreoffice_convert(input_path: str, output_path: str) -> str:
+    """
+    Convert an office document to PDF with headless LibreOffice
+    
+    Every run gets its own LibreOffice profile: runs sharing the default
+    profile can't overlap (the second exits without writing anything).
+    
+    Args:
+        input_path: Document to convert
+        output_path: Output PDF path
+        
+    Returns:
+        Path to output PDF
+    """
+    import shutil
+    import subprocess
+    import tempfile
+    from pathlib import Path
+    
+    with tempfile.TemporaryDirectory(prefix='libreoffice_') as work_dir:
+        profile_url = Path(work_dir, 'profile').as_uri()
+        try:
+            subprocess.run([
+                'libreoffice', f'-env:UserInstallation={profile_url}',
+                '--headless', '--convert-to', 'pdf', '--outdir', work_dir, input_path
+            ], check=True, capture_output=True)
+        except FileNotFoundError:
+            raise Exception("LibreOffice not available for document conversion")
+        
+        # LibreOffice names its output <basename>.pdf
+        produced = os.path.join(work_dir, os.path.splitext(os.path.basename(input_path))[0] + '.pdf')
+        if not os.path.exists(produced):
+            raise Exception(f"LibreOffice did not convert {os.path.basename(input_path)}")
+        shutil.move(produced, output_path)
+    return output_path
+
+
+@cached("image_to_pdf", ".pdf")
+def _convert_image_to_pdf_sync(image_path: str, output_path: str = None) -> str:
     """
     Convert an image to PDF format
     
@@ -46,7 +94,8 @@ async def convert_image_to_pdf(image_path: str, output_path: str = None) -> str:
         raise
 
 
-async def convert_document_to_pdf(doc_path: str, output_path: str = None) -> str:
+@cached("document_to_pdf", ".pdf")
+def _convert_document_to_pdf_sync(doc_path: str, output_path: str = None) -> str:
     """
     Convert a document (DOCX, TXT, etc.) to PDF format
     
@@ -68,20 +117,17 @@ async def convert_document_to_pdf(doc_path: str, output_path: str = None) -> str
             try:
                 from docx2pdf import convert as docx_convert
                 docx_convert(doc_path, output_path)
-            except ImportError:
-                logger.warning("docx2pdf not available, trying alternative method")
-                # Fallback: try using LibreOffice if available
-                import subprocess
-                try:
-                    subprocess.run([
-                        'libreoffice', '--headless', '--convert-to', 'pdf',
-                        '--outdir', os.path.dirname(output_path), doc_path
-                    ], check=True, capture_output=True)
-                except FileNotFoundError:
-                    raise Exception("Neither docx2pdf nor LibreOffice available for DOCX conversion")
+            except (ImportError, NotImplementedError) as e:
+                # docx2pdf drives MS Word, so it is missing or unsupported on Linux hosts
+                logger.warning(f"docx2pdf not usable ({e}), falling back to LibreOffice")
+                libreoffice_convert(doc_path, output_path)
         
         elif file_ext == 'txt':
-            # Convert TXT to PDF using FPDF
+            if _txt_to_pdf_fitz(doc_path, output_path):
+                logger.info(f"Document converted successfully: {output_path}")
+                return output_path
+            
+            # Without PyMuPDF, convert TXT to PDF using FPDF
             pdf = FPDF()
             pdf.add_page()
             pdf.set_font("Arial", size=12)
@@ -111,95 +157,80 @@ async def convert_document_to_pdf(doc_path: str, output_path: str = None) -> str
         raise
 
 
-async def pdf_to_text(pdf_path: str, output_path: str = None) -> str:
+def _txt_to_pdf_fitz(txt_path: str, output_path: str) -> bool:
     """
-    Extract text from PDF to TXT file
+    Lay out a text file as an A4 PDF with PyMuPDF's Story (text flow and pagination run in MuPDF)
     
     Args:
-        pdf_path: Path to input PDF
-        output_path: Output text file path (optional)
+        txt_path: Path to text file
+        output_path: Output PDF path
         
     Returns:
-        Path to output text file
+        True if the PDF was written, False if PyMuPDF isn't installed
     """
     try:
-        import fitz  # PyMuPDF
-        
-        doc = fitz.open(pdf_path)
-        text_content = []
-        
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            text = page.get_text()
-            text_content.append(f"--- Page {page_num + 1} ---\n{text}\n")
-        
-        doc.close()
-        
-        full_text = "\n".join(text_content)
-        
-        if not output_path:
-            output_path = pdf_path.rsplit('.', 1)[0] + '.txt'
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(full_text)
-        
-        logger.info(f"Text extracted to: {output_path}")
-        return output_path
-        
-    except Exception as e:
-        logger.error(f"Error extracting text from PDF: {e}")
-        raise
+        import fitz
+    except ImportError:
+        return False
+    
+    import html
+    
+    with open(txt_path, 'r', encoding='utf-8', errors='ignore') as file:
+        body = html.escape(file.read())
+    
+    story = fitz.Story(
+        html=f"<body>{body}</body>",
+        user_css="body { font-family: sans-serif; font-size: 12pt; white-space: pre-wrap; }"
+    )
+    mediabox = fitz.paper_rect("a4")
+    where = mediabox + (36, 36, -36, -36)
+    
+    writer = fitz.DocumentWriter(output_path)
+    more = True
+    while more:
+        device = writer.begin_page(mediabox)
+        more, _ = story.place(where)
+        story.draw(device)
+        writer.end_page()
+    writer.close()
+    return True
 
 
-async def pdf_to_images(pdf_path: str, output_dir: str = None, format: str = 'jpg') -> list:
+@cached("pdf_to_text", ".txt")
+def _pdf_to_text_sync(pdf_path: str, output_path: str = None) -> str:
     """
-    Convert PDF pages to images
+    Extract text from PDF to TXT file
     
     Args:
         pdf_path: Path to input PDF
-        output_dir: Output directory (optional)
-        format: Image format ('jpg' or 'png')
+        output_path: Output text file path (optional)
         
     Returns:
-        List of image paths
+        Path to output text file
     """
     try:
-        from pdf2image import convert_from_path
-        
-        if not output_dir:
-            output_dir = os.path.dirname(pdf_path)
-        
-        # Convert PDF to images
-        images = convert_from_path(pdf_path, dpi=300)
-        image_paths = []
+        if not output_path:
+            output_path = pdf_path.rsplit('.', 1)[0] + '.txt'
         
-        for i, image in enumerate(images):
-            output_path = os.path.join(
-                output_dir,
-                f"page_{i+1}.{format}"
-            )
-            
-            if format.lower() == 'jpg':
-                image = image.convert('RGB')
-                image.save(output_path, 'JPEG', quality=95)
-            else:
-                image.save(output_path, 'PNG')
-            
-            image_paths.append(output_path)
-            logger.info(f"Converted page {i+1} to image: {output_path}")
+        # Write page by page instead of joining the whole text in memory
+        doc = open_pdf(pdf_path)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            for page_num, page in enumerate(doc):
+                if page_num:
+                    f.write("\n")
+                f.write(f"--- Page {page_num + 1} ---\n")
+                f.write(page.get_text())
+                f.write("\n")
         
-        logger.info(f"Converted {len(image_paths)} pages to {format.upper()}")
-        return image_paths
+        logger.info(f"Text extracted to: {output_path}")
+        return output_path
         
-    except ImportError:
-        logger.error("pdf2image not installed. Install with: pip install pdf2image")
-        raise
     except Exception as e:
-        logger.error(f"Error converting PDF to images: {e}")
+        logger.error(f"Error extracting text from PDF: {e}")
         raise
 
 
-async def word_to_pdf(doc_path: str, output_path: str = None) -> str:
+def _word_to_pdf_sync(doc_path: str, output_path: str = None) -> str:
     """
     Convert Word document to PDF
     
@@ -210,10 +241,11 @@ async def word_to_pdf(doc_path: str, output_path: str = None) -> str:
     Returns:
         Path to output PDF
     """
-    return await convert_document_to_pdf(doc_path, output_path)
+    return _convert_document_to_pdf_sync(doc_path, output_path)
 
 
-async def excel_to_pdf(excel_path: str, output_path: str = None) -> str:
+@cached("excel_to_pdf", ".pdf")
+def _excel_to_pdf_sync(excel_path: str, output_path: str = None) -> str:
     """
     Convert Excel to PDF
     
@@ -225,29 +257,21 @@ async def excel_to_pdf(excel_path: str, output_path: str = None) -> str:
         Path to output PDF
     """
     try:
-        import subprocess
-        
         if not output_path:
             output_path = excel_path.rsplit('.', 1)[0] + '.pdf'
         
-        # Try using LibreOffice
-        try:
-            subprocess.run([
-                'libreoffice', '--headless', '--convert-to', 'pdf',
-                '--outdir', os.path.dirname(output_path), excel_path
-            ], check=True, capture_output=True)
-            
-            logger.info(f"Excel converted successfully: {output_path}")
-            return output_path
-        except FileNotFoundError:
-            raise Exception("LibreOffice not available for Excel conversion")
+        libreoffice_convert(excel_path, output_path)
+        
+        logger.info(f"Excel converted successfully: {output_path}")
+        return output_path
         
     except Exception as e:
         logger.error(f"Error converting Excel to PDF: {e}")
         raise
 
 
-async def powerpoint_to_pdf(ppt_path: str, output_path: str = None) -> str:
+@cached("powerpoint_to_pdf", ".pdf")
+def _powerpoint_to_pdf_sync(ppt_path: str, output_path: str = None) -> str:
     """
     Convert PowerPoint to PDF
     
@@ -259,29 +283,21 @@ async def powerpoint_to_pdf(ppt_path: str, output_path: str = None) -> str:
         Path to output PDF
     """
     try:
-        import subprocess
-        
         if not output_path:
             output_path = ppt_path.rsplit('.', 1)[0] + '.pdf'
         
-        # Try using LibreOffice
-        try:
-            subprocess.run([
-                'libreoffice', '--headless', '--convert-to', 'pdf',
-                '--outdir', os.path.dirname(output_path), ppt_path
-            ], check=True, capture_output=True)
-            
-            logger.info(f"PowerPoint converted successfully: {output_path}")
-            return output_path
-        except FileNotFoundError:
-            raise Exception("LibreOffice not available for PowerPoint conversion")
+        libreoffice_convert(ppt_path, output_path)
+        
+        logger.info(f"PowerPoint converted successfully: {output_path}")
+        return output_path
         
     except Exception as e:
         logger.error(f"Error converting PowerPoint to PDF: {e}")
         raise
 
 
-async def html_to_pdf(html_path: str, output_path: str = None) -> str:
+@cached("html_to_pdf", ".pdf")
+def _html_to_pdf_sync(html_path: str, output_path: str = None) -> str:
     """
     Convert HTML to PDF
     
@@ -293,25 +309,30 @@ async def html_to_pdf(html_path: str, output_path: str = None) -> str:
         Path to output PDF
     """
     try:
-        import pdfkit
-        
         if not output_path:
             output_path = html_path.rsplit('.', 1)[0] + '.pdf'
         
-        pdfkit.from_file(html_path, output_path)
+        try:
+            # WeasyPrint renders in-process, avoiding a wkhtmltopdf start-up per call
+            from weasyprint import HTML
+            HTML(filename=html_path).write_pdf(output_path)
+        except ImportError:
+            import pdfkit
+            pdfkit.from_file(html_path, output_path)
         
         logger.info(f"HTML converted successfully: {output_path}")
         return output_path
         
     except ImportError:
-        logger.error("pdfkit not installed. Install with: pip install pdfkit")
+        logger.error("No HTML renderer installed. Install with: pip install weasyprint")
         raise
     except Exception as e:
         logger.error(f"Error converting HTML to PDF: {e}")
         raise
 
 
-async def pdf_to_word(pdf_path: str, output_path: str = None) -> str:
+@cached("pdf_to_word", ".docx")
+def _pdf_to_word_sync(pdf_path: str, output_path: str = None) -> str:
     """
     Convert PDF to Word document
     
@@ -343,7 +364,8 @@ async def pdf_to_word(pdf_path: str, output_path: str = None) -> str:
         raise
 
 
-async def pdf_to_excel(pdf_path: str, output_path: str = None) -> str:
+@cached("pdf_to_excel", ".xlsx")
+def _pdf_to_excel_sync(pdf_path: str, output_path: str = None) -> str:
     """
     Convert PDF to Excel (extract tables)
     
@@ -356,33 +378,97 @@ async def pdf_to_excel(pdf_path: str, output_path: str = None) -> str:
     """
     try:
         import pdfplumber
-        import pandas as pd
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
         
         if not output_path:
             output_path = pdf_path.rsplit('.', 1)[0] + '.xlsx'
         
-        all_tables = []
+        # Write-only mode streams rows to disk as tables are extracted, page by page
+        workbook = Workbook(write_only=True)
+        header_font = Font(bold=True)
+        table_count = 0
         
         with pdfplumber.open(pdf_path) as pdf:
             for page in pdf.pages:
-                tables = page.extract_tables()
-                all_tables.extend(tables)
-        
-        if not all_tables:
+                for table in page.extract_tables():
+                    if not table:
+                        continue
+                    table_count += 1
+                    sheet = workbook.create_sheet(f'Table_{table_count}')
+                    
+                    header = []
+                    for value in table[0]:
+                        cell = WriteOnlyCell(sheet, value=value)
+                        cell.font = header_font
+                        header.append(cell)
+                    sheet.append(header)
+                    
+                    for row in table[1:]:
+                        sheet.append(row)
+        
+        if not table_count:
             raise ValueError("No tables found in PDF")
         
-        # Write to Excel
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            for i, table in enumerate(all_tables):
-                df = pd.DataFrame(table[1:], columns=table[0])
-                df.to_excel(writer, sheet_name=f'Table_{i+1}', index=False)
+        workbook.save(output_path)
         
         logger.info(f"PDF converted to Excel: {output_path}")
         return output_path
         
     except ImportError:
-        logger.error("Required libraries not installed. Install with: pip install pdfplumber pandas openpyxl")
+        logger.error("Required libraries not installed. Install with: pip install pdfplumber openpyxl")
         raise
     except Exception as e:
         logger.error(f"Error converting PDF to Excel: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+# Async entry points: the blocking work above runs in the shared process pool, except
+# conversions that only wait on an external program (LibreOffice), which run in a
+# thread so they don't hold a pool worker idle
+async def convert_image_to_pdf(image_path: str, output_path: str = None) -> str:
+    """Convert an image to PDF format"""
+    return await run_in_process(_convert_image_to_pdf_sync, image_path, output_path)
+
+
+async def convert_document_to_pdf(doc_path: str, output_path: str = None) -> str:
+    """Convert a document (DOCX, TXT, etc.) to PDF format"""
+    return await run_in_process(_convert_document_to_pdf_sync, doc_path, output_path)
+
+
+async def pdf_to_text(pdf_path: str, output_path: str = None) -> str:
+    """Extract text from PDF to TXT file"""
+    return await run_in_process(_pdf_to_text_sync, pdf_path, output_path)
+
+
+async def word_to_pdf(doc_path: str, output_path: str = None) -> str:
+    """Convert Word document to PDF"""
+    return await run_in_process(_word_to_pdf_sync, doc_path, output_path)
+
+
+async def excel_to_pdf(excel_path: str, output_path: str = None) -> str:
+    """Convert Excel to PDF"""
+    async with _libreoffice_slots:
+        return await run_in_thread(_excel_to_pdf_sync, excel_path, output_path)
+
+
+async def powerpoint_to_pdf(ppt_path: str, output_path: str = None) -> str:
+    """Convert PowerPoint to PDF"""
+    async with _libreoffice_slots:
+        return await run_in_thread(_powerpoint_to_pdf_sync, ppt_path, output_path)
+
+
+async def html_to_pdf(html_path: str, output_path: str = None) -> str:
+    """Convert HTML to PDF"""
+    return await run_in_process(_html_to_pdf_sync, html_path, output_path)
+
+
+async def pdf_to_word(pdf_path: str, output_path: str = None) -> str:
+    """Convert PDF to Word document"""
+    return await run_in_process(_pdf_to_word_sync, pdf_path, output_path)
+
+
+async def pdf_to_excel(pdf_path: str, output_path: str = None) -> str:
+    """Convert PDF to Excel (extract tables)"""
+    return await run_in_process(_pdf_to_excel_sync, pdf_path, output_path)
\ No newline at end of file
@@ -5,13 +5,87 @@ Handles rotation, watermarks, page numbers, cropping, etc.
 
 import os
 import logging
-from PyPDF2 import PdfReader, PdfWriter
+from pypdf import PdfReader, PdfWriter
 from PIL import Image
 
+from services._documents import open_pdf, process_page_ranges
+from utils.executors import run_in_process
+
 logger = logging.getLogger(__name__)
 
+# Resolution grayscale pages are rendered at
+GRAYSCALE_DPI = 150
 
-async def rotate_pdf(pdf_path: str, rotation: int, output_path: str = None) -> str:
+
+def _rotate_pdf_fitz(pdf_path: str, rotation: int, output_path: str) -> bool:
+    """
+    Rotate all pages by updating their /Rotate entry with PyMuPDF
+    
+    Returns:
+        False if PyMuPDF is not installed
+    """
+    try:
+        import fitz
+    except ImportError:
+        return False
+    
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            page.set_rotation((page.rotation + rotation) % 360)
+        doc.save(output_path, garbage=3, deflate=True)
+    return True
+
+
+def _crop_pdf_fitz(pdf_path: str, margins: dict, output_path: str) -> bool:
+    """
+    Crop all pages by setting their crop box with PyMuPDF
+    
+    Margins apply to the unrotated page, like the mediabox edits of the pypdf fallback.
+    
+    Returns:
+        False if PyMuPDF is not installed
+    """
+    try:
+        import fitz
+    except ImportError:
+        return False
+    
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            # Crop box coordinates are relative to the mediabox, with y pointing down
+            mediabox = page.mediabox
+            page.set_cropbox(fitz.Rect(
+                margins.get('left', 0),
+                margins.get('top', 0),
+                mediabox.width - margins.get('right', 0),
+                mediabox.height - margins.get('bottom', 0)
+            ))
+        doc.save(output_path, garbage=3, deflate=True)
+    return True
+
+
+def _resize_pdf_fitz(pdf_path: str, page_size: tuple, output_path: str) -> bool:
+    """
+    Resize all pages with PyMuPDF by placing each one, stretched, on a new page of page_size
+    
+    Returns:
+        False if PyMuPDF is not installed
+    """
+    try:
+        import fitz
+    except ImportError:
+        return False
+    
+    width, height = page_size
+    with fitz.open(pdf_path) as src, fitz.open() as doc:
+        for page_num in range(src.page_count):
+            page = doc.new_page(width=width, height=height)
+            page.show_pdf_page(page.rect, src, page_num, keep_proportion=False)
+        doc.save(output_path, garbage=3, deflate=True)
+    return True
+
+
+def _rotate_pdf_sync(pdf_path: str, rotation: int, output_path: str = None) -> str:
     """
     Rotate all pages in a PDF
     
@@ -27,6 +101,13 @@ async def rotate_pdf(pdf_path: str, rotation: int, output_path: str = None) -> s
         if rotation not in [90, 180, 270]:
             raise ValueError("Rotation must be 90, 180, or 270 degrees")
         
+        if not output_path:
+            output_path = pdf_path.rsplit('.', 1)[0] + '_rotated.pdf'
+        
+        if _rotate_pdf_fitz(pdf_path, rotation, output_path):
+            logger.info(f"Rotated PDF saved to: {output_path}")
+            return output_path
+        
         reader = PdfReader(pdf_path)
         writer = PdfWriter()
         
@@ -34,9 +115,6 @@ async def rotate_pdf(pdf_path: str, rotation: int, output_path: str = None) -> s
             rotated_page = page.rotate(rotation)
             writer.add_page(rotated_page)
         
-        if not output_path:
-            output_path = pdf_path.rsplit('.', 1)[0] + '_rotated.pdf'
-        
         with open(output_path, 'wb') as output_file:
             writer.write(output_file)
         
@@ -48,7 +126,103 @@ async def rotate_pdf(pdf_path: str, rotation: int, output_path: str = None) -> s
         raise
 
 
-async def add_watermark(pdf_path: str, watermark_path: str, output_path: str = None) -> str:
+def _watermark_size(img_width: int, img_height: int, page_width: float, page_height: float) -> tuple:
+    """Watermark size in points: the image's pixel size, scaled down to at most half the page"""
+    if img_width > page_width * 0.5 or img_height > page_height * 0.5:
+        scale = min(page_width * 0.5 / img_width, page_height * 0.5 / img_height)
+        img_width = int(img_width * scale)
+        img_height = int(img_height * scale)
+    return img_width, img_height
+
+
+def _page_number_x(position: str, page_width: float) -> float:
+    """Horizontal position of a page number ('bottom-right', 'bottom-center' or 'bottom-left')"""
+    if position == 'bottom-center':
+        return page_width / 2 - 10
+    if position == 'bottom-left':
+        return 50
+    return page_width - 50
+
+
+def _add_watermark_fitz(pdf_path: str, watermark_path: str, output_path: str) -> bool:
+    """
+    Stamp a watermark image centred on every page with PyMuPDF
+    
+    The image is embedded once and every page references the same object.
+    
+    Returns:
+        False if PyMuPDF is not installed
+    """
+    try:
+        import fitz
+    except ImportError:
+        return False
+    
+    with Image.open(watermark_path) as img:
+        img_width, img_height = img.size
+    
+    with fitz.open(pdf_path) as doc:
+        xref = 0
+        for page in doc:
+            # Centre on the page as displayed, then map into the unrotated page space
+            width, height = _watermark_size(img_width, img_height, page.rect.width, page.rect.height)
+            x = (page.rect.width - width) / 2
+            y = (page.rect.height - height) / 2
+            rect = fitz.Rect(x, y, x + width, y + height) * page.derotation_matrix
+            xref = page.insert_image(rect, filename=watermark_path, xref=xref, rotate=page.rotation)
+        doc.save(output_path, garbage=3, deflate=True)
+    return True
+
+
+def _add_page_numbers_fitz(pdf_path: str, output_path: str, position: str) -> bool:
+    """
+    Write page numbers straight into each page's content with PyMuPDF
+    
+    Returns:
+        False if PyMuPDF is not installed
+    """
+    try:
+        import fitz
+    except ImportError:
+        return False
+    
+    with fitz.open(pdf_path) as doc:
+        for page_num, page in enumerate(doc, 1):
+            point = fitz.Point(_page_number_x(position, page.rect.width), page.rect.height - 20)
+            page.insert_text(point * page.derotation_matrix, str(page_num),
+                             fontname="helv", fontsize=12, rotate=page.rotation)
+        doc.save(output_path, garbage=3, deflate=True)
+    return True
+
+
+def _add_header_footer_fitz(pdf_path: str, header_text: str, footer_text: str,
+                            output_path: str) -> bool:
+    """
+    Write header/footer text straight into each page's content with PyMuPDF
+    
+    Returns:
+        False if PyMuPDF is not installed
+    """
+    try:
+        import fitz
+    except ImportError:
+        return False
+    
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            lines = []
+            if header_text:
+                lines.append((fitz.Point(50, 30), header_text))
+            if footer_text:
+                lines.append((fitz.Point(50, page.rect.height - 30), footer_text))
+            for point, text in lines:
+                page.insert_text(point * page.derotation_matrix, text,
+                                 fontname="helv", fontsize=10, rotate=page.rotation)
+        doc.save(output_path, garbage=3, deflate=True)
+    return True
+
+
+def _add_watermark_sync(pdf_path: str, watermark_path: str, output_path: str = None) -> str:
     """
     Add a watermark image to all pages of a PDF
     
@@ -61,6 +235,14 @@ async def add_watermark(pdf_path: str, watermark_path: str, output_path: str = N
         Path to output PDF
     """
     try:
+        if not output_path:
+            output_path = pdf_path.rsplit('.', 1)[0] + '_watermarked.pdf'
+        
+        if _add_watermark_fitz(pdf_path, watermark_path, output_path):
+            logger.info(f"Watermarked PDF saved to: {output_path}")
+            return output_path
+        
+        # Without PyMuPDF, merge a ReportLab overlay into each page with pypdf
         from reportlab.pdfgen import canvas
         from reportlab.lib.pagesizes import letter
         from io import BytesIO
@@ -69,16 +251,10 @@ async def add_watermark(pdf_path: str, watermark_path: str, output_path: str = N
         watermark_pdf = BytesIO()
         c = canvas.Canvas(watermark_pdf, pagesize=letter)
         
-        # Get watermark image dimensions
-        img = Image.open(watermark_path)
-        img_width, img_height = img.size
-        
-        # Scale watermark if too large
+        # Get watermark image dimensions, scaled down if too large
         page_width, page_height = letter
-        if img_width > page_width * 0.5 or img_height > page_height * 0.5:
-            scale = min(page_width * 0.5 / img_width, page_height * 0.5 / img_height)
-            img_width = int(img_width * scale)
-            img_height = int(img_height * scale)
+        with Image.open(watermark_path) as img:
+            img_width, img_height = _watermark_size(*img.size, page_width, page_height)
         
         # Center watermark
         x = (page_width - img_width) / 2
@@ -98,9 +274,6 @@ async def add_watermark(pdf_path: str, watermark_path: str, output_path: str = N
             page.merge_page(watermark_page)
             writer.add_page(page)
         
-        if not output_path:
-            output_path = pdf_path.rsplit('.', 1)[0] + '_watermarked.pdf'
-        
         with open(output_path, 'wb') as output_file:
             writer.write(output_file)
         
@@ -115,7 +288,7 @@ async def add_watermark(pdf_path: str, watermark_path: str, output_path: str = N
         raise
 
 
-async def add_page_numbers(pdf_path: str, output_path: str = None, 
+def _add_page_numbers_sync(pdf_path: str, output_path: str = None, 
                           position: str = 'bottom-right') -> str:
     """
     Add page numbers to all pages of a PDF
@@ -129,6 +302,14 @@ async def add_page_numbers(pdf_path: str, output_path: str = None,
         Path to output PDF
     """
     try:
+        if not output_path:
+            output_path = pdf_path.rsplit('.', 1)[0] + '_numbered.pdf'
+        
+        if _add_page_numbers_fitz(pdf_path, output_path, position):
+            logger.info(f"Numbered PDF saved to: {output_path}")
+            return output_path
+        
+        # Without PyMuPDF, merge a ReportLab overlay into each page with pypdf
         from reportlab.pdfgen import canvas
         from reportlab.lib.pagesizes import letter
         from io import BytesIO
@@ -136,33 +317,24 @@ async def add_page_numbers(pdf_path: str, output_path: str = None,
         reader = PdfReader(pdf_path)
         writer = PdfWriter()
         
-        for page_num, page in enumerate(reader.pages, 1):
-            # Create page number overlay
-            overlay_pdf = BytesIO()
-            c = canvas.Canvas(overlay_pdf, pagesize=letter)
+        # Draw all page numbers into one overlay document (one overlay page per page),
+        # so ReportLab and PdfReader run once rather than once per page
+        overlay_pdf = BytesIO()
+        c = canvas.Canvas(overlay_pdf, pagesize=letter)
+        page_width, page_height = letter
+        x = _page_number_x(position, page_width)
+        for page_num in range(1, len(reader.pages) + 1):
             c.setFont("Helvetica", 12)
-            
-            # Position page number
-            page_width, page_height = letter
-            if position == 'bottom-center':
-                x, y = page_width / 2 - 10, 20
-            elif position == 'bottom-left':
-                x, y = 50, 20
-            else:  # bottom-right
-                x, y = page_width - 50, 20
-            
-            c.drawString(x, y, str(page_num))
-            c.save()
-            overlay_pdf.seek(0)
-            
-            overlay_reader = PdfReader(overlay_pdf)
-            overlay_page = overlay_reader.pages[0]
+            c.drawString(x, 20, str(page_num))
+            c.showPage()
+        c.save()
+        overlay_pdf.seek(0)
+        
+        overlay_reader = PdfReader(overlay_pdf)
+        for page, overlay_page in zip(reader.pages, overlay_reader.pages):
             page.merge_page(overlay_page)
             writer.add_page(page)
         
-        if not output_path:
-            output_path = pdf_path.rsplit('.', 1)[0] + '_numbered.pdf'
-        
         with open(output_path, 'wb') as output_file:
             writer.write(output_file)
         
@@ -177,7 +349,7 @@ async def add_page_numbers(pdf_path: str, output_path: str = None,
         raise
 
 
-async def crop_pdf(pdf_path: str, margins: dict, output_path: str = None) -> str:
+def _crop_pdf_sync(pdf_path: str, margins: dict, output_path: str = None) -> str:
     """
     Crop PDF pages
     
@@ -190,6 +362,13 @@ async def crop_pdf(pdf_path: str, margins: dict, output_path: str = None) -> str
         Path to output PDF
     """
     try:
+        if not output_path:
+            output_path = pdf_path.rsplit('.', 1)[0] + '_cropped.pdf'
+        
+        if _crop_pdf_fitz(pdf_path, margins, output_path):
+            logger.info(f"Cropped PDF saved to: {output_path}")
+            return output_path
+        
         reader = PdfReader(pdf_path)
         writer = PdfWriter()
         
@@ -204,9 +383,6 @@ async def crop_pdf(pdf_path: str, margins: dict, output_path: str = None) -> str
             )
             writer.add_page(page)
         
-        if not output_path:
-            output_path = pdf_path.rsplit('.', 1)[0] + '_cropped.pdf'
-        
         with open(output_path, 'wb') as output_file:
             writer.write(output_file)
         
@@ -218,7 +394,7 @@ async def crop_pdf(pdf_path: str, margins: dict, output_path: str = None) -> str
         raise
 
 
-async def resize_pdf(pdf_path: str, page_size: tuple, output_path: str = None) -> str:
+def _resize_pdf_sync(pdf_path: str, page_size: tuple, output_path: str = None) -> str:
     """
     Resize PDF pages
     
@@ -231,6 +407,13 @@ async def resize_pdf(pdf_path: str, page_size: tuple, output_path: str = None) -
         Path to output PDF
     """
     try:
+        if not output_path:
+            output_path = pdf_path.rsplit('.', 1)[0] + '_resized.pdf'
+        
+        if _resize_pdf_fitz(pdf_path, page_size, output_path):
+            logger.info(f"Resized PDF saved to: {output_path}")
+            return output_path
+        
         reader = PdfReader(pdf_path)
         writer = PdfWriter()
         
@@ -238,9 +421,6 @@ async def resize_pdf(pdf_path: str, page_size: tuple, output_path: str = None) -
             page.scale_to(page_size[0], page_size[1])
             writer.add_page(page)
         
-        if not output_path:
-            output_path = pdf_path.rsplit('.', 1)[0] + '_resized.pdf'
-        
         with open(output_path, 'wb') as output_file:
             writer.write(output_file)
         
@@ -252,7 +432,7 @@ async def resize_pdf(pdf_path: str, page_size: tuple, output_path: str = None) -
         raise
 
 
-async def add_header_footer(pdf_path: str, header_text: str = None, 
+def _add_header_footer_sync(pdf_path: str, header_text: str = None, 
                            footer_text: str = None, output_path: str = None) -> str:
     """
     Add header and/or footer to all pages
@@ -267,40 +447,44 @@ async def add_header_footer(pdf_path: str, header_text: str = None,
         Path to output PDF
     """
     try:
+        if not output_path:
+            output_path = pdf_path.rsplit('.', 1)[0] + '_header_footer.pdf'
+        
+        if _add_header_footer_fitz(pdf_path, header_text, footer_text, output_path):
+            logger.info(f"PDF with header/footer saved to: {output_path}")
+            return output_path
+        
+        # Without PyMuPDF, merge a ReportLab overlay into each page with pypdf
         from reportlab.pdfgen import canvas
         from reportlab.lib.pagesizes import letter
         from io import BytesIO
         
+        # The overlay is the same on every page: build and parse it once
+        overlay_pdf = BytesIO()
+        c = canvas.Canvas(overlay_pdf, pagesize=letter)
+        c.setFont("Helvetica", 10)
+        
+        page_width, page_height = letter
+        
+        # Add header
+        if header_text:
+            c.drawString(50, page_height - 30, header_text)
+        
+        # Add footer
+        if footer_text:
+            c.drawString(50, 30, footer_text)
+        
+        c.save()
+        overlay_pdf.seek(0)
+        overlay_page = PdfReader(overlay_pdf).pages[0]
+        
         reader = PdfReader(pdf_path)
         writer = PdfWriter()
         
-        for page_num, page in enumerate(reader.pages, 1):
-            # Create header/footer overlay
-            overlay_pdf = BytesIO()
-            c = canvas.Canvas(overlay_pdf, pagesize=letter)
-            c.setFont("Helvetica", 10)
-            
-            page_width, page_height = letter
-            
-            # Add header
-            if header_text:
-                c.drawString(50, page_height - 30, header_text)
-            
-            # Add footer
-            if footer_text:
-                c.drawString(50, 30, footer_text)
-            
-            c.save()
-            overlay_pdf.seek(0)
-            
-            overlay_reader = PdfReader(overlay_pdf)
-            overlay_page = overlay_reader.pages[0]
+        for page in reader.pages:
             page.merge_page(overlay_page)
             writer.add_page(page)
         
-        if not output_path:
-            output_path = pdf_path.rsplit('.', 1)[0] + '_header_footer.pdf'
-        
         with open(output_path, 'wb') as output_file:
             writer.write(output_file)
         
@@ -315,9 +499,67 @@ async def add_header_footer(pdf_path: str, header_text: str = None,
         raise
 
 
+def _grayscale_pages_sync(pdf_path: str, start: int, stop: int, part_path: str) -> str:
+    """
+    Render a range of pages in grayscale into a partial PDF
+    
+    Args:
+        pdf_path: Path to input PDF
+        start: First page index (0-based)
+        stop: Page index to stop before
+        part_path: Output path for the rendered pages
+        
+    Returns:
+        Path to the partial PDF
+    """
+    import fitz  # PyMuPDF
+    
+    with fitz.open() as part:
+        for page in open_pdf(pdf_path).pages(start, stop):
+            # Replace each page by a grayscale rendering of it, at the page's displayed size
+            pix = page.get_pixmap(dpi=GRAYSCALE_DPI, colorspace=fitz.csGRAY)
+            gray_page = part.new_page(width=page.rect.width, height=page.rect.height)
+            gray_page.insert_image(gray_page.rect, pixmap=pix)
+        part.save(part_path, deflate=True)
+    return part_path
+
+
+# Async entry points: the blocking work above runs in the shared process pool
+async def rotate_pdf(pdf_path: str, rotation: int, output_path: str = None) -> str:
+    """Rotate all pages in a PDF"""
+    return await run_in_process(_rotate_pdf_sync, pdf_path, rotation, output_path)
+
+
+async def add_watermark(pdf_path: str, watermark_path: str, output_path: str = None) -> str:
+    """Add a watermark image to all pages of a PDF"""
+    return await run_in_process(_add_watermark_sync, pdf_path, watermark_path, output_path)
+
+
+async def add_page_numbers(pdf_path: str, output_path: str = None, 
+                          position: str = 'bottom-right') -> str:
+    """Add page numbers to all pages of a PDF"""
+    return await run_in_process(_add_page_numbers_sync, pdf_path, output_path, position)
+
+
+async def crop_pdf(pdf_path: str, margins: dict, output_path: str = None) -> str:
+    """Crop PDF pages"""
+    return await run_in_process(_crop_pdf_sync, pdf_path, margins, output_path)
+
+
+async def resize_pdf(pdf_path: str, page_size: tuple, output_path: str = None) -> str:
+    """Resize PDF pages"""
+    return await run_in_process(_resize_pdf_sync, pdf_path, page_size, output_path)
+
+
+async def add_header_footer(pdf_path: str, header_text: str = None, 
+                           footer_text: str = None, output_path: str = None) -> str:
+    """Add header and/or footer to all pages"""
+    return await run_in_process(_add_header_footer_sync, pdf_path, header_text, footer_text, output_path)
+
+
 async def convert_to_grayscale(pdf_path: str, output_path: str = None) -> str:
     """
-    Convert PDF to grayscale (black and white)
+    Convert PDF to grayscale (black and white), rendering page ranges in parallel
     
     Args:
         pdf_path: Path to input PDF
@@ -327,24 +569,10 @@ async def convert_to_grayscale(pdf_path: str, output_path: str = None) -> str:
         Path to output PDF
     """
     try:
-        import fitz  # PyMuPDF
-        
-        doc = fitz.open(pdf_path)
-        
-        for page in doc:
-            # Convert to grayscale
-            pix = page.get_pixmap(colorspace=fitz.csGRAY)
-            img = Image.frombytes("L", [pix.width, pix.height], pix.samples)
-            
-            # Clear page content and add grayscale image
-            page.clean_contents()
-            img_bytes = img.tobytes()
-            
         if not output_path:
             output_path = pdf_path.rsplit('.', 1)[0] + '_grayscale.pdf'
         
-        doc.save(output_path)
-        doc.close()
+        await process_page_ranges(pdf_path, output_path, _grayscale_pages_sync)
         
         logger.info(f"Grayscale PDF saved to: {output_path}")
         return output_path
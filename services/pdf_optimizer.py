@@ -3,16 +3,28 @@ PDF Optimization Services
 Handles compression, repair, OCR, etc.
 """
 
+import asyncio
 import os
 import logging
-from PyPDF2 import PdfReader, PdfWriter
+import shutil
+import subprocess
+from typing import List, Tuple
+from pypdf import PdfReader, PdfWriter
+
+from config.settings import PDF_WORKERS
+from services._documents import (count_pages, join_pdfs, open_pdf, page_ranges,
+                                  process_page_ranges)
+from utils.executors import run_in_process
 
 logger = logging.getLogger(__name__)
 
+# Resolution pages are rendered at for Tesseract
+OCR_DPI = 300
+
 
-async def compress_pdf(pdf_path: str, quality: str = 'medium', output_path: str = None) -> str:
+def _compress_pdf_sync(pdf_path: str, quality: str = 'medium', output_path: str = None) -> str:
     """
-    Compress a PDF file
+    Compress a PDF file's content streams with pypdf (compress_pdf uses Ghostscript when installed)
     
     Args:
         pdf_path: Path to input PDF
@@ -27,9 +39,9 @@ async def compress_pdf(pdf_path: str, quality: str = 'medium', output_path: str
         writer = PdfWriter()
         
         for page in reader.pages:
-            # Compress the page content streams
+            # Compress the page content streams (pypdf only does this on a writer's page)
+            page = writer.add_page(page)
             page.compress_content_streams()
-            writer.add_page(page)
         
         # Set compression level based on quality
         if quality == 'high':
@@ -54,62 +66,54 @@ async def compress_pdf(pdf_path: str, quality: str = 'medium', output_path: str
         raise
 
 
-async def compress_pdf_advanced(pdf_path: str, quality: str = 'medium', 
-                               output_path: str = None) -> str:
+# Ghostscript PDFSETTINGS per compression quality
+GS_QUALITY_SETTINGS = {
+    'low': '/screen',      # 72 dpi
+    'medium': '/ebook',    # 150 dpi
+    'high': '/printer'     # 300 dpi
+}
+
+# Each part of a split PDF re-embeds its shared fonts and images, so only PDFs
+# at least this large are split, into parts of at least GS_MIN_PAGES_PER_PART pages
+GS_SPLIT_MIN_MB = 10
+GS_MIN_PAGES_PER_PART = 10
+
+# Ghostscript processes allowed at once across all requests
+_ghostscript_slots = asyncio.Semaphore(PDF_WORKERS)
+
+
+def _ghostscript_command(pdf_path: str, output_path: str, quality: str = 'medium',
+                         first_page: int = None, last_page: int = None) -> List[str]:
     """
-    Advanced PDF compression using Ghostscript
+    Build the Ghostscript command compressing a PDF (or a 1-based page range of it)
     
     Args:
         pdf_path: Path to input PDF
+        output_path: Output PDF path
         quality: Compression quality ('low', 'medium', 'high')
-        output_path: Output PDF path (optional)
+        first_page: First page to keep (optional)
+        last_page: Last page to keep (optional)
         
     Returns:
-        Path to compressed PDF
+        Command line arguments
     """
-    try:
-        import subprocess
-        
-        # Quality settings for Ghostscript
-        quality_settings = {
-            'low': '/screen',      # 72 dpi
-            'medium': '/ebook',    # 150 dpi
-            'high': '/printer'     # 300 dpi
-        }
-        
-        gs_quality = quality_settings.get(quality, '/ebook')
-        
-        if not output_path:
-            output_path = pdf_path.rsplit('.', 1)[0] + '_compressed.pdf'
-        
-        # Run Ghostscript
-        gs_command = [
-            'gs',
-            '-sDEVICE=pdfwrite',
-            '-dCompatibilityLevel=1.4',
-            f'-dPDFSETTINGS={gs_quality}',
-            '-dNOPAUSE',
-            '-dQUIET',
-            '-dBATCH',
-            f'-sOutputFile={output_path}',
-            pdf_path
-        ]
-        
-        try:
-            subprocess.run(gs_command, check=True, capture_output=True)
-            logger.info(f"Advanced compressed PDF saved to: {output_path}")
-            return output_path
-        except FileNotFoundError:
-            logger.warning("Ghostscript not available, using basic compression")
-            return await compress_pdf(pdf_path, quality, output_path)
-        
-    except Exception as e:
-        logger.error(f"Error in advanced compression: {e}")
-        # Fallback to basic compression
-        return await compress_pdf(pdf_path, quality, output_path)
+    command = [
+        'gs',
+        '-sDEVICE=pdfwrite',
+        '-dCompatibilityLevel=1.4',
+        f'-dPDFSETTINGS={GS_QUALITY_SETTINGS.get(quality, "/ebook")}',
+        '-dDetectDuplicateImages=true',
+        '-dCompressFonts=true',
+        '-dNOPAUSE',
+        '-dQUIET',
+        '-dBATCH',
+    ]
+    if first_page is not None:
+        command += [f'-dFirstPage={first_page}', f'-dLastPage={last_page}']
+    return command + [f'-sOutputFile={output_path}', pdf_path]
 
 
-async def repair_pdf(pdf_path: str, output_path: str = None) -> str:
+def _repair_pdf_sync(pdf_path: str, output_path: str = None) -> str:
     """
     Attempt to repair a damaged PDF
     
@@ -148,7 +152,7 @@ async def repair_pdf(pdf_path: str, output_path: str = None) -> str:
         raise
 
 
-async def ocr_pdf(pdf_path: str, language: str = 'eng', output_path: str = None) -> str:
+def _ocr_pdf_sync(pdf_path: str, language: str = 'eng', output_path: str = None) -> str:
     """
     Perform OCR on a scanned PDF to make it searchable
     
@@ -186,157 +190,179 @@ async def ocr_pdf(pdf_path: str, language: str = 'eng', output_path: str = None)
         raise
 
 
-async def ocr_pdf_pytesseract(pdf_path: str, language: str = 'eng', 
-                             output_path: str = None) -> str:
+def _ocr_pages_sync(pdf_path: str, start: int, stop: int, part_path: str,
+                    language: str = 'eng') -> str:
     """
-    Perform OCR using pytesseract (alternative method)
+    OCR a range of pages into a partial PDF, laying an invisible text layer over each page
     
     Args:
         pdf_path: Path to input PDF
+        start: First page index (0-based)
+        stop: Page index to stop before
+        part_path: Output path for the processed pages
         language: Tesseract language code
-        output_path: Output PDF path (optional)
         
     Returns:
-        Path to searchable PDF
+        Path to the partial PDF
     """
-    try:
-        import pytesseract
-        from pdf2image import convert_from_path
-        from fpdf import FPDF
-        
-        # Convert PDF to images
-        images = convert_from_path(pdf_path, dpi=300)
-        
-        # Perform OCR on each image
-        text_pages = []
-        for img in images:
-            text = pytesseract.image_to_string(img, lang=language)
-            text_pages.append(text)
-        
-        # Create new PDF with OCR text
-        pdf = FPDF()
-        pdf.set_auto_page_break(auto=True, margin=15)
-        
-        for text in text_pages:
-            pdf.add_page()
-            pdf.set_font("Arial", size=12)
-            # Handle encoding issues
-            try:
-                pdf.multi_cell(0, 10, txt=text)
-            except:
-                # Skip problematic characters
-                safe_text = text.encode('latin-1', 'ignore').decode('latin-1')
-                pdf.multi_cell(0, 10, txt=safe_text)
-        
-        if not output_path:
-            output_path = pdf_path.rsplit('.', 1)[0] + '_ocr.pdf'
-        
-        pdf.output(output_path)
+    import fitz  # PyMuPDF
+    import pytesseract
+    from PIL import Image
+    
+    with fitz.open() as part:
+        # Keep the original pages (vector content, images, fonts) and only add text to them
+        part.insert_pdf(open_pdf(pdf_path), from_page=start, to_page=stop - 1)
         
-        logger.info(f"OCR completed with pytesseract, saved to: {output_path}")
-        return output_path
+        for page in part:
+            # Pages that already have text are kept as they are
+            if page.get_text().strip():
+                continue
+            
+            pix = page.get_pixmap(dpi=OCR_DPI, colorspace=fitz.csRGB)
+            image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+            # Tesseract writes a searchable PDF page; textonly_pdf leaves out its copy of the image
+            text_pdf = pytesseract.image_to_pdf_or_hocr(
+                image, lang=language, extension='pdf', config='-c textonly_pdf=1'
+            )
+            
+            with fitz.open("pdf", text_pdf) as text_doc:
+                # The rendering is of the page as displayed; map it back onto the unrotated page
+                page.show_pdf_page(page.rect * page.derotation_matrix, text_doc, 0,
+                                   rotate=page.rotation)
         
-    except ImportError as e:
-        logger.error(f"Required library not installed: {e}")
-        raise
-    except Exception as e:
-        logger.error(f"Error performing OCR with pytesseract: {e}")
-        raise
+        part.save(part_path, garbage=3, deflate=True)
+    return part_path
 
 
-async def optimize_images_in_pdf(pdf_path: str, quality: int = 85, 
-                                output_path: str = None) -> str:
+def _list_images_sync(pdf_path: str) -> List[Tuple[int, int]]:
     """
-    Optimize images within a PDF
+    Find the distinct images in a PDF that can be re-encoded as JPEG
     
     Args:
         pdf_path: Path to input PDF
-        quality: Image quality (1-100)
-        output_path: Output PDF path (optional)
         
     Returns:
-        Path to optimized PDF
+        (xref, page index) pairs: each image once, with a page that shows it
     """
-    try:
-        import fitz  # PyMuPDF
-        from PIL import Image
-        from io import BytesIO
-        
-        doc = fitz.open(pdf_path)
-        
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            image_list = page.get_images()
-            
-            for img_index, img in enumerate(image_list):
-                xref = img[0]
-                base_image = doc.extract_image(xref)
-                image_bytes = base_image["image"]
-                
-                # Open image with PIL
-                pil_image = Image.open(BytesIO(image_bytes))
-                
-                # Compress image
-                output = BytesIO()
-                if pil_image.mode == 'RGBA':
-                    pil_image = pil_image.convert('RGB')
-                pil_image.save(output, format='JPEG', quality=quality, optimize=True)
-                
-                # Replace image in PDF
-                output.seek(0)
-                # This is simplified - actual implementation is more complex
+    images = {}
+    for page in open_pdf(pdf_path):
+        for img in page.get_images():
+            xref, smask = img[0], img[1]
+            # Images with a transparency mask are left alone (JPEG has no alpha)
+            if not smask and xref not in images:
+                images[xref] = page.number
+    return list(images.items())
+
+
+def _recompress_images_sync(pdf_path: str, xrefs: List[int], quality: int) -> List[Tuple[int, bytes]]:
+    """
+    Re-encode images of a PDF as JPEG
+    
+    Args:
+        pdf_path: Path to input PDF
+        xrefs: Image xrefs to re-encode
+        quality: JPEG quality (1-100)
         
-        if not output_path:
-            output_path = pdf_path.rsplit('.', 1)[0] + '_optimized.pdf'
+    Returns:
+        (xref, JPEG bytes) pairs for the images that got smaller
+    """
+    from PIL import Image
+    from io import BytesIO
+    
+    doc = open_pdf(pdf_path)
+    smaller = []
+    
+    for xref in xrefs:
+        base_image = doc.extract_image(xref)
+        if not base_image:
+            continue
+        image_bytes = base_image["image"]
+        
+        pil_image = Image.open(BytesIO(image_bytes))
+        if pil_image.mode not in ('RGB', 'L'):
+            pil_image = pil_image.convert('RGB')
+        
+        output = BytesIO()
+        pil_image.save(output, format='JPEG', quality=quality, optimize=True)
+        if output.tell() < len(image_bytes):
+            smaller.append((xref, output.getvalue()))
+    
+    return smaller
+
+
+def _replace_images_sync(pdf_path: str, replacements: List[Tuple[int, int, bytes]],
+                         output_path: str) -> str:
+    """
+    Swap images of a PDF for re-encoded versions
+    
+    Args:
+        pdf_path: Path to input PDF
+        replacements: (xref, page index, image bytes) for each image to replace
+        output_path: Output PDF path
         
+    Returns:
+        Path to output PDF
+    """
+    import fitz  # PyMuPDF
+    
+    with fitz.open(pdf_path) as doc:
+        for xref, page_index, stream in replacements:
+            # Replacing the image object updates every page that shows it
+            doc[page_index].replace_image(xref, stream=stream)
         doc.save(output_path, garbage=4, deflate=True)
-        doc.close()
-        
-        logger.info(f"Optimized PDF with compressed images saved to: {output_path}")
-        return output_path
-        
-    except ImportError:
-        logger.error("PyMuPDF not installed. Install with: pip install PyMuPDF")
-        raise
-    except Exception as e:
-        logger.error(f"Error optimizing images in PDF: {e}")
-        raise
+    return output_path
+
+
+def _qpdf_reduce(pdf_path: str, output_path: str) -> bool:
+    """
+    Losslessly recompress a PDF with qpdf (object streams, maximum Flate level)
+    
+    Returns:
+        False if qpdf is not installed or could not process the file
+    """
+    qpdf = shutil.which('qpdf')
+    if not qpdf:
+        return False
+    
+    result = subprocess.run(
+        [
+            qpdf,
+            '--object-streams=generate',
+            '--compress-streams=y',
+            '--recompress-flate',
+            '--compression-level=9',
+            pdf_path,
+            output_path,
+        ],
+        capture_output=True,
+    )
+    # Exit status 3 means the output was written but qpdf fixed problems on the way
+    if result.returncode in (0, 3):
+        return True
+    
+    logger.warning(f"qpdf failed ({result.returncode}), using basic size reduction: "
+                   f"{result.stderr.decode(errors='replace').strip()}")
+    return False
 
 
-async def reduce_file_size(pdf_path: str, output_path: str = None) -> str:
+def _reduce_file_size_sync(pdf_path: str, output_path: str = None, force_python: bool = False) -> str:
     """
-    Reduce PDF file size using multiple techniques
+    Reduce PDF file size using multiple techniques (with qpdf when installed)
     
     Args:
         pdf_path: Path to input PDF
         output_path: Output PDF path (optional)
+        force_python: Use the pypdf content-stream compression even if qpdf is available
         
     Returns:
         Path to reduced PDF
     """
     try:
-        reader = PdfReader(pdf_path)
-        writer = PdfWriter()
-        
-        for page in reader.pages:
-            # Compress content
-            page.compress_content_streams()
-            
-            # Remove unnecessary data
-            if '/Annots' in page:
-                # Keep annotations but compress them
-                pass
-            
-            writer.add_page(page)
-        
-        # Remove duplicate objects
-        writer.add_metadata({})  # Clear metadata to reduce size
-        
         if not output_path:
             output_path = pdf_path.rsplit('.', 1)[0] + '_reduced.pdf'
         
-        with open(output_path, 'wb') as output_file:
-            writer.write(output_file)
+        if force_python or not _qpdf_reduce(pdf_path, output_path):
+            _reduce_file_size_pypdf(pdf_path, output_path)
         
         original_size = os.path.getsize(pdf_path) / (1024 * 1024)
         reduced_size = os.path.getsize(output_path) / (1024 * 1024)
@@ -349,7 +375,23 @@ async def reduce_file_size(pdf_path: str, output_path: str = None) -> str:
         raise
 
 
-async def linearize_pdf(pdf_path: str, output_path: str = None) -> str:
+def _reduce_file_size_pypdf(pdf_path: str, output_path: str) -> None:
+    """Recompress every content stream with pypdf and drop the metadata"""
+    reader = PdfReader(pdf_path)
+    writer = PdfWriter()
+    
+    for page in reader.pages:
+        # Compress content (pypdf only does this on a writer's page)
+        page = writer.add_page(page)
+        page.compress_content_streams()
+    
+    writer.add_metadata({})  # Clear metadata to reduce size
+    
+    with open(output_path, 'wb') as output_file:
+        writer.write(output_file)
+
+
+def _linearize_pdf_sync(pdf_path: str, output_path: str = None) -> str:
     """
     Linearize PDF for fast web viewing
     
@@ -383,4 +425,188 @@ async def linearize_pdf(pdf_path: str, output_path: str = None) -> str:
         
     except Exception as e:
         logger.error(f"Error linearizing PDF: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+# Async entry points: the blocking work above runs in the shared process pool
+async def compress_pdf(pdf_path: str, quality: str = 'medium', output_path: str = None,
+                       force_python: bool = False) -> str:
+    """Compress a PDF file (with Ghostscript when installed)"""
+    if not force_python and shutil.which('gs'):
+        return await compress_pdf_advanced(pdf_path, quality, output_path)
+    return await run_in_process(_compress_pdf_sync, pdf_path, quality, output_path)
+
+
+async def _run_ghostscript(command: List[str]) -> None:
+    """Run a Ghostscript command as a subprocess, raising RuntimeError if it fails"""
+    async with _ghostscript_slots:
+        process = await asyncio.create_subprocess_exec(
+            *command, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            _, stderr = await process.communicate()
+        except asyncio.CancelledError:
+            process.kill()
+            raise
+    
+    if process.returncode:
+        raise RuntimeError(f"Ghostscript exited with {process.returncode}: "
+                           f"{stderr.decode(errors='replace').strip()}")
+
+
+async def compress_pdf_advanced(pdf_path: str, quality: str = 'medium', 
+                               output_path: str = None) -> str:
+    """
+    Advanced PDF compression using Ghostscript
+    
+    Ghostscript is single-threaded, so large PDFs are split into page ranges
+    compressed by concurrent Ghostscript processes and joined afterwards. If the
+    joined result is bigger than the input, the input is returned unchanged.
+    
+    Args:
+        pdf_path: Path to input PDF
+        quality: Compression quality ('low', 'medium', 'high')
+        output_path: Output PDF path (optional)
+        
+    Returns:
+        Path to compressed PDF
+    """
+    if not shutil.which('gs'):
+        return await run_in_process(_compress_pdf_sync, pdf_path, quality, output_path)
+    
+    if not output_path:
+        output_path = pdf_path.rsplit('.', 1)[0] + '_compressed.pdf'
+    base = output_path.rsplit('.', 1)[0]
+    part_paths = []
+    
+    try:
+        page_count = 0
+        if os.path.getsize(pdf_path) >= GS_SPLIT_MIN_MB * 1024 * 1024:
+            try:
+                page_count = await run_in_process(count_pages, pdf_path)
+            except Exception as e:
+                logger.warning(f"Could not count pages, compressing in a single run: {e}")
+        ranges = page_ranges(page_count, min(PDF_WORKERS, page_count // GS_MIN_PAGES_PER_PART))
+        
+        if len(ranges) == 1:
+            await _run_ghostscript(_ghostscript_command(pdf_path, output_path, quality))
+        else:
+            runs = []
+            for i, (start, stop) in enumerate(ranges):
+                part_path = f"{base}_part{i}.pdf"
+                part_paths.append(part_path)
+                runs.append(_run_ghostscript(
+                    _ghostscript_command(pdf_path, part_path, quality, start + 1, stop)
+                ))
+            # Let every run finish before the parts are cleaned up, then surface the first error
+            for result in await asyncio.gather(*runs, return_exceptions=True):
+                if isinstance(result, BaseException):
+                    raise result
+            await run_in_process(join_pdfs, part_paths, output_path)
+            
+            # Duplicated fonts can outweigh the savings on text-heavy PDFs
+            if os.path.getsize(output_path) >= os.path.getsize(pdf_path):
+                shutil.copyfile(pdf_path, output_path)
+        
+        logger.info(f"Advanced compressed PDF saved to: {output_path}")
+        return output_path
+    
+    except Exception as e:
+        logger.error(f"Error in advanced compression: {e}")
+        # Fallback to basic compression
+        return await run_in_process(_compress_pdf_sync, pdf_path, quality, output_path)
+    
+    finally:
+        for part_path in part_paths:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+
+async def repair_pdf(pdf_path: str, output_path: str = None) -> str:
+    """Attempt to repair a damaged PDF"""
+    return await run_in_process(_repair_pdf_sync, pdf_path, output_path)
+
+
+async def ocr_pdf(pdf_path: str, language: str = 'eng', output_path: str = None) -> str:
+    """Perform OCR on a scanned PDF to make it searchable"""
+    return await run_in_process(_ocr_pdf_sync, pdf_path, language, output_path)
+
+
+async def ocr_pdf_pytesseract(pdf_path: str, language: str = 'eng', 
+                             output_path: str = None) -> str:
+    """
+    Perform OCR using pytesseract (alternative method), recognizing page ranges in parallel
+    
+    Args:
+        pdf_path: Path to input PDF
+        language: Tesseract language code
+        output_path: Output PDF path (optional)
+        
+    Returns:
+        Path to searchable PDF
+    """
+    try:
+        if not output_path:
+            output_path = pdf_path.rsplit('.', 1)[0] + '_ocr.pdf'
+        
+        await process_page_ranges(pdf_path, output_path, _ocr_pages_sync, language)
+        
+        logger.info(f"OCR completed with pytesseract, saved to: {output_path}")
+        return output_path
+        
+    except ImportError as e:
+        logger.error(f"Required library not installed: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Error performing OCR with pytesseract: {e}")
+        raise
+
+
+async def optimize_images_in_pdf(pdf_path: str, quality: int = 85, 
+                                output_path: str = None) -> str:
+    """
+    Optimize images within a PDF, re-encoding them in parallel across the pool
+    
+    Args:
+        pdf_path: Path to input PDF
+        quality: Image quality (1-100)
+        output_path: Output PDF path (optional)
+        
+    Returns:
+        Path to optimized PDF
+    """
+    try:
+        if not output_path:
+            output_path = pdf_path.rsplit('.', 1)[0] + '_optimized.pdf'
+        
+        images = await run_in_process(_list_images_sync, pdf_path)
+        pages = dict(images)
+        xrefs = list(pages)
+        
+        # Deal the images out round-robin so large and small ones spread over the workers
+        results = await asyncio.gather(*(
+            run_in_process(_recompress_images_sync, pdf_path, xrefs[i::PDF_WORKERS], quality)
+            for i in range(min(PDF_WORKERS, len(xrefs)))
+        ))
+        replacements = [(xref, pages[xref], stream) for result in results for xref, stream in result]
+        await run_in_process(_replace_images_sync, pdf_path, replacements, output_path)
+        
+        logger.info(f"Optimized PDF with compressed images saved to: {output_path}")
+        return output_path
+        
+    except ImportError:
+        logger.error("PyMuPDF not installed. Install with: pip install PyMuPDF")
+        raise
+    except Exception as e:
+        logger.error(f"Error optimizing images in PDF: {e}")
+        raise
+
+
+async def reduce_file_size(pdf_path: str, output_path: str = None, force_python: bool = False) -> str:
+    """Reduce PDF file size using multiple techniques (with qpdf when installed)"""
+    return await run_in_process(_reduce_file_size_sync, pdf_path, output_path, force_python)
+
+
+async def linearize_pdf(pdf_path: str, output_path: str = None) -> str:
+    """Linearize PDF for fast web viewing"""
+    return await run_in_process(_linearize_pdf_sync, pdf_path, output_path)
\ No newline at end of file
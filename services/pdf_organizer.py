@@ -6,7 +6,7 @@ Handles merging, splitting, extracting, and removing pages
 import os
 import logging
 from typing import List, Tuple, Union
-from PyPDF2 import PdfReader, PdfWriter, PdfMerger
+from pypdf import PdfReader, PdfWriter
 
 # Optional import for better performance
 try:
@@ -15,14 +15,17 @@ try:
 except ImportError:
     HAS_FITZ = False
 
+from services._documents import open_pdf
+from utils.executors import run_in_process
+
 logger = logging.getLogger(__name__)
 
 
 class PDFOrganizer:
-    """PDF organization operations"""
+    """PDF organization operations (blocking; see the async wrappers below)"""
     
     @staticmethod
-    async def merge_pdfs(pdf_paths: List[str], output_path: str = None) -> str:
+    def merge_pdfs(pdf_paths: List[str], output_path: str = None) -> str:
         """
         Merge multiple PDF files into one
         
@@ -45,7 +48,7 @@ class PDFOrganizer:
                 output_dir = os.path.dirname(pdf_paths[0])
                 output_path = os.path.join(output_dir, 'merged_output.pdf')
             
-            merger = PdfMerger()
+            merger = PdfWriter()
             
             # Add each PDF to the merger
             for pdf_path in pdf_paths:
@@ -76,7 +79,7 @@ class PDFOrganizer:
             raise
     
     @staticmethod
-    async def split_pdf(pdf_path: str, split_mode: str) -> List[str]:
+    def split_pdf(pdf_path: str, split_mode: str) -> List[str]:
         """
         Split a PDF file
         
@@ -139,7 +142,7 @@ class PDFOrganizer:
             raise
     
     @staticmethod
-    async def extract_pages(pdf_path: str, page_spec: str, output_path: str = None) -> str:
+    def extract_pages(pdf_path: str, page_spec: str, output_path: str = None) -> str:
         """
         Extract specific pages from a PDF
         
@@ -181,7 +184,7 @@ class PDFOrganizer:
             raise
     
     @staticmethod
-    async def remove_pages(pdf_path: str, page_spec: str, output_path: str = None) -> str:
+    def remove_pages(pdf_path: str, page_spec: str, output_path: str = None) -> str:
         """
         Remove specific pages from a PDF
         
@@ -223,7 +226,7 @@ class PDFOrganizer:
             raise
     
     @staticmethod
-    async def reorder_pages(pdf_path: str, page_order: str, output_path: str = None) -> str:
+    def reorder_pages(pdf_path: str, page_order: str, output_path: str = None) -> str:
         """
         Reorder pages in a PDF
         
@@ -265,7 +268,7 @@ class PDFOrganizer:
             raise
     
     @staticmethod
-    async def extract_images(pdf_path: str, output_dir: str = None) -> List[str]:
+    def extract_images(pdf_path: str, output_dir: str = None) -> List[str]:
         """
         Extract all images from a PDF
         
@@ -283,7 +286,7 @@ class PDFOrganizer:
             if not output_dir:
                 output_dir = os.path.dirname(pdf_path)
             
-            doc = fitz.open(pdf_path)
+            doc = open_pdf(pdf_path)
             image_paths = []
             image_count = 0
             
@@ -307,7 +310,6 @@ class PDFOrganizer:
                     image_paths.append(image_path)
                     logger.info(f"Extracted image: {image_path}")
             
-            doc.close()
             logger.info(f"Extracted {len(image_paths)} images from PDF")
             return image_paths
             
@@ -316,7 +318,7 @@ class PDFOrganizer:
             raise
     
     @staticmethod
-    async def extract_text(pdf_path: str, output_path: str = None) -> str:
+    def extract_text(pdf_path: str, output_path: str = None) -> str:
         """
         Extract all text from a PDF
         
@@ -330,17 +332,15 @@ class PDFOrganizer:
         try:
             if HAS_FITZ:
                 # Use PyMuPDF if available (better text extraction)
-                doc = fitz.open(pdf_path)
+                doc = open_pdf(pdf_path)
                 text_content = []
                 
                 for page_num in range(len(doc)):
                     page = doc[page_num]
                     text = page.get_text()
                     text_content.append(f"--- Page {page_num + 1} ---\n{text}\n")
-                
-                doc.close()
             else:
-                # Fallback to PyPDF2
+                # Fallback to pypdf
                 reader = PdfReader(pdf_path)
                 text_content = []
                 
@@ -405,32 +405,32 @@ class PDFOrganizer:
         return pages
 
 
-# Convenience functions
+# Convenience functions: the blocking work runs in the shared process pool
 async def merge_pdfs(pdf_paths: List[str], output_path: str = None) -> str:
     """Merge multiple PDFs"""
-    return await PDFOrganizer.merge_pdfs(pdf_paths, output_path)
+    return await run_in_process(PDFOrganizer.merge_pdfs, pdf_paths, output_path)
 
 
 async def split_pdf(pdf_path: str, split_mode: str) -> List[str]:
     """Split a PDF"""
-    return await PDFOrganizer.split_pdf(pdf_path, split_mode)
+    return await run_in_process(PDFOrganizer.split_pdf, pdf_path, split_mode)
 
 
 async def extract_pages(pdf_path: str, page_spec: str, output_path: str = None) -> str:
     """Extract pages from PDF"""
-    return await PDFOrganizer.extract_pages(pdf_path, page_spec, output_path)
+    return await run_in_process(PDFOrganizer.extract_pages, pdf_path, page_spec, output_path)
 
 
 async def remove_pages(pdf_path: str, page_spec: str, output_path: str = None) -> str:
     """Remove pages from PDF"""
-    return await PDFOrganizer.remove_pages(pdf_path, page_spec, output_path)
+    return await run_in_process(PDFOrganizer.remove_pages, pdf_path, page_spec, output_path)
 
 
 async def extract_images(pdf_path: str, output_dir: str = None) -> List[str]:
     """Extract images from PDF"""
-    return await PDFOrganizer.extract_images(pdf_path, output_dir)
+    return await run_in_process(PDFOrganizer.extract_images, pdf_path, output_dir)
 
 
 async def extract_text(pdf_path: str, output_path: str = None) -> str:
     """Extract text from PDF"""
-    return await PDFOrganizer.extract_text(pdf_path, output_path)
\ No newline at end of file
+    return await run_in_process(PDFOrganizer.extract_text, pdf_path, output_path)
\ No newline at end of file
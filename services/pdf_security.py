@@ -5,12 +5,14 @@ Handles encryption, decryption, permissions, etc.
 
 import os
 import logging
-from PyPDF2 import PdfReader, PdfWriter
+from pypdf import PdfReader, PdfWriter
+
+from utils.executors import run_in_process
 
 logger = logging.getLogger(__name__)
 
 
-async def unlock_pdf(pdf_path: str, password: str, output_path: str = None) -> str:
+def _unlock_pdf_sync(pdf_path: str, password: str, output_path: str = None) -> str:
     """
     Remove password protection from a PDF
     
@@ -55,7 +57,7 @@ async def unlock_pdf(pdf_path: str, password: str, output_path: str = None) -> s
         raise
 
 
-async def protect_pdf(pdf_path: str, password: str, output_path: str = None,
+def _protect_pdf_sync(pdf_path: str, password: str, output_path: str = None,
                      owner_password: str = None, permissions: int = None) -> str:
     """
     Add password protection to a PDF
@@ -79,10 +81,11 @@ async def protect_pdf(pdf_path: str, password: str, output_path: str = None,
         
         # Encrypt the PDF
         if owner_password:
+            options = {} if permissions is None else {'permissions_flag': permissions}
             writer.encrypt(
                 user_password=password,
                 owner_password=owner_password,
-                permissions_flag=permissions
+                **options
             )
         else:
             writer.encrypt(password)
@@ -101,7 +104,7 @@ async def protect_pdf(pdf_path: str, password: str, output_path: str = None,
         raise
 
 
-async def add_permissions(pdf_path: str, allow_printing: bool = True,
+def _add_permissions_sync(pdf_path: str, allow_printing: bool = True,
                          allow_copying: bool = True, allow_modification: bool = False,
                          password: str = None, output_path: str = None) -> str:
     """
@@ -154,7 +157,7 @@ async def add_permissions(pdf_path: str, allow_printing: bool = True,
         raise
 
 
-async def remove_metadata(pdf_path: str, output_path: str = None) -> str:
+def _remove_metadata_sync(pdf_path: str, output_path: str = None) -> str:
     """
     Remove all metadata from a PDF
     
@@ -189,7 +192,7 @@ async def remove_metadata(pdf_path: str, output_path: str = None) -> str:
         raise
 
 
-async def get_pdf_info(pdf_path: str) -> dict:
+def _get_pdf_info_sync(pdf_path: str) -> dict:
     """
     Get PDF information and metadata
     
@@ -228,7 +231,7 @@ async def get_pdf_info(pdf_path: str) -> dict:
         raise
 
 
-async def sign_pdf(pdf_path: str, signature_path: str, output_path: str = None) -> str:
+def _sign_pdf_sync(pdf_path: str, signature_path: str, output_path: str = None) -> str:
     """
     Add digital signature to PDF (placeholder - requires advanced setup)
     
@@ -256,7 +259,7 @@ async def sign_pdf(pdf_path: str, signature_path: str, output_path: str = None)
         raise
 
 
-async def redact_pdf(pdf_path: str, areas: list, output_path: str = None) -> str:
+def _redact_pdf_sync(pdf_path: str, areas: list, output_path: str = None) -> str:
     """
     Redact (permanently remove) content from PDF areas
     
@@ -301,7 +304,7 @@ async def redact_pdf(pdf_path: str, areas: list, output_path: str = None) -> str
         raise
 
 
-async def compare_pdfs(pdf_path1: str, pdf_path2: str, output_path: str = None) -> dict:
+def _compare_pdfs_sync(pdf_path1: str, pdf_path2: str, output_path: str = None) -> dict:
     """
     Compare two PDF files
     
@@ -346,4 +349,48 @@ async def compare_pdfs(pdf_path1: str, pdf_path2: str, output_path: str = None)
         
     except Exception as e:
         logger.error(f"Error comparing PDFs: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+# Async entry points: the blocking work above runs in the shared process pool
+async def unlock_pdf(pdf_path: str, password: str, output_path: str = None) -> str:
+    """Remove password protection from a PDF"""
+    return await run_in_process(_unlock_pdf_sync, pdf_path, password, output_path)
+
+
+async def protect_pdf(pdf_path: str, password: str, output_path: str = None,
+                     owner_password: str = None, permissions: int = None) -> str:
+    """Add password protection to a PDF"""
+    return await run_in_process(_protect_pdf_sync, pdf_path, password, output_path, owner_password, permissions)
+
+
+async def add_permissions(pdf_path: str, allow_printing: bool = True,
+                         allow_copying: bool = True, allow_modification: bool = False,
+                         password: str = None, output_path: str = None) -> str:
+    """Add permission restrictions to a PDF"""
+    return await run_in_process(_add_permissions_sync, pdf_path, allow_printing, allow_copying, allow_modification, password, output_path)
+
+
+async def remove_metadata(pdf_path: str, output_path: str = None) -> str:
+    """Remove all metadata from a PDF"""
+    return await run_in_process(_remove_metadata_sync, pdf_path, output_path)
+
+
+async def get_pdf_info(pdf_path: str) -> dict:
+    """Get PDF information and metadata"""
+    return await run_in_process(_get_pdf_info_sync, pdf_path)
+
+
+async def sign_pdf(pdf_path: str, signature_path: str, output_path: str = None) -> str:
+    """Add digital signature to PDF (placeholder - requires advanced setup)"""
+    return await run_in_process(_sign_pdf_sync, pdf_path, signature_path, output_path)
+
+
+async def redact_pdf(pdf_path: str, areas: list, output_path: str = None) -> str:
+    """Redact (permanently remove) content from PDF areas"""
+    return await run_in_process(_redact_pdf_sync, pdf_path, areas, output_path)
+
+
+async def compare_pdfs(pdf_path1: str, pdf_path2: str, output_path: str = None) -> dict:
+    """Compare two PDF files"""
+    return await run_in_process(_compare_pdfs_sync, pdf_path1, pdf_path2, output_path)
\ No newline at end of file
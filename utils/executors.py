@@ -0,0 +1,109 @@
+"""
+Worker Pools
+Runs blocking PDF and image work off the event loop
+"""
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+from config.settings import PDF_WORKERS
+from utils.log_queue import get_log_queue, use_queue_logging
+from utils.warmup import warmup
+
+logger = logging.getLogger(__name__)
+
+# Created on first use so importing this module never forks workers
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Get the shared process pool, creating it on first use
+    
+    Returns:
+        ProcessPoolExecutor sized by PDF_WORKERS
+    """
+    global _process_pool
+    
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=PDF_WORKERS, initializer=_init_worker, initargs=(get_log_queue(),)
+        )
+        logger.info(f"Started process pool with {PDF_WORKERS} workers")
+    return _process_pool
+
+
+async def prestart_process_pool() -> None:
+    """Spawn and warm up the pool workers at startup instead of on the first jobs"""
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    await asyncio.gather(*(loop.run_in_executor(pool, _noop) for _ in range(PDF_WORKERS)))
+
+
+def _init_worker(log_queue: Any) -> None:
+    """Set up a pool worker: send log records to the main process and warm up"""
+    use_queue_logging(log_queue)
+    warmup()
+
+
+def _noop() -> None:
+    """Placeholder job used to spawn workers"""
+
+
+async def run_in_process(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Run a CPU-bound function in the shared process pool
+    
+    Args:
+        func: Module-level (picklable) function to run
+        *args: Positional arguments (must be picklable)
+        **kwargs: Keyword arguments (must be picklable)
+        
+    Returns:
+        The function's return value
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    try:
+        return await loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+    except BrokenProcessPool:
+        # A worker died (crash or OOM kill); drop the pool so the next job starts a fresh one
+        _discard_pool(pool)
+        raise
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Shut down a broken pool and forget it, unless it has already been replaced"""
+    global _process_pool
+    
+    if _process_pool is pool:
+        logger.error("Process pool broke (a worker died); starting a new one on the next job")
+        _process_pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_in_thread(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Run a blocking I/O-bound function in the default thread pool
+    
+    Args:
+        func: Function to run
+        *args: Positional arguments
+        **kwargs: Keyword arguments
+        
+    Returns:
+        The function's return value
+    """
+    return await asyncio.to_thread(func, *args, **kwargs)
+
+
+def shutdown_pools() -> None:
+    """Stop the shared process pool, cancelling jobs that haven't started"""
+    global _process_pool
+    
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
\ No newline at end of file
@@ -3,14 +3,41 @@ File Management Utilities
 """
 
 import os
+import asyncio
 import logging
-from typing import List
-from config.settings import TEMP_DIR, MAX_FILE_SIZE_MB
+import tempfile
+from contextlib import suppress
+from typing import List, NamedTuple, Optional, Set
+import httpx
+from telegram import InputFile
+from config.settings import CACHE_DIR, TEMP_DIR, MAX_FILE_SIZE_MB, SUPPORTED_DOCUMENT_EXTS, SUPPORTED_IMAGE_EXTS
 
 logger = logging.getLogger(__name__)
 
+# PDF files begin with this marker (readers accept it within the first 1KB)
+PDF_MAGIC = b"%PDF-"
 
-async def download_file(bot, file_id: str, filename: str) -> str:
+# Downloads are streamed to disk in chunks of this size
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_TIMEOUT = 120.0
+
+# Shared connection pool for file downloads (see _get_http_client)
+_http_client: Optional[httpx.AsyncClient] = None
+
+# Extensions accepted by is_image (GIF is readable even though it isn't offered for upload)
+_IMAGE_EXTS = SUPPORTED_IMAGE_EXTS | {".gif"}
+
+# Strong references to pending cleanup tasks so they aren't garbage collected
+_cleanup_tasks: Set[asyncio.Task] = set()
+
+
+class DownloadedFile(NamedTuple):
+    """A file saved from Telegram, with its type sniffed once at download time"""
+    path: str
+    is_pdf: bool
+
+
+async def download_file(bot, file_id: str, filename: str) -> DownloadedFile:
     """
     Download a file from Telegram
     
@@ -20,24 +47,95 @@ async def download_file(bot, file_id: str, filename: str) -> str:
         filename: Name to save file as
         
     Returns:
-        Path to downloaded file
+        DownloadedFile with the local path and whether the content is a PDF
     """
     try:
         file = await bot.get_file(file_id)
-        file_path = os.path.join(TEMP_DIR, filename)
         
         # Ensure temp directory exists
         os.makedirs(TEMP_DIR, exist_ok=True)
         
-        await file.download_to_drive(file_path)
+        # Each download gets its own directory, so outputs named after it (or with
+        # fixed names like merged_output.pdf) never collide between chats
+        file_path = os.path.join(tempfile.mkdtemp(dir=TEMP_DIR), os.path.basename(filename))
+        
+        if file.file_path and file.file_path.startswith(("https://", "http://")):
+            await _stream_to_disk(file.file_path, file_path)
+        else:
+            # Local Bot API server: file_path is already on this machine
+            await file.download_to_drive(file_path)
         logger.info(f"File downloaded: {file_path}")
-        return file_path
+        return DownloadedFile(file_path, await asyncio.to_thread(has_pdf_header, file_path))
         
     except Exception as e:
         logger.error(f"Error downloading file: {e}")
         raise
 
 
+async def _stream_to_disk(url: str, file_path: str) -> None:
+    """Download url to file_path in fixed-size chunks, writing each off the event loop"""
+    async with _get_http_client().stream("GET", url) as response:
+        response.raise_for_status()
+        with open(file_path, 'wb') as out:
+            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                await asyncio.to_thread(out.write, chunk)
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Get the shared client for file downloads, creating it on first use"""
+    global _http_client
+    
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(timeout=httpx.Timeout(30.0, read=DOWNLOAD_TIMEOUT))
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared download client"""
+    global _http_client
+    
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def has_pdf_header(file_path: str) -> bool:
+    """
+    Check whether a file starts with a PDF header, regardless of its name
+    
+    Args:
+        file_path: Path to file
+        
+    Returns:
+        True if the %PDF- marker appears in the first 1KB
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            return PDF_MAGIC in f.read(1024)
+    except OSError:
+        return False
+
+
+async def load_document(file_path: str, filename: str) -> InputFile:
+    """
+    Read a file into an InputFile for upload without blocking the event loop
+    
+    Args:
+        file_path: Path to file
+        filename: Name shown to the user in Telegram
+        
+    Returns:
+        InputFile holding the file contents (the file handle is closed)
+    """
+    return await asyncio.to_thread(_read_input_file, file_path, filename)
+
+
+def _read_input_file(file_path: str, filename: str) -> InputFile:
+    """Open, read and close a file into an InputFile (runs in a worker thread)"""
+    with open(file_path, 'rb') as f:
+        return InputFile(f, filename=filename)
+
+
 def cleanup_files(file_paths: List[str]) -> None:
     """
     Delete temporary files
@@ -50,10 +148,32 @@ def cleanup_files(file_paths: List[str]) -> None:
             if file_path and os.path.exists(file_path):
                 os.remove(file_path)
                 logger.info(f"Cleaned up file: {file_path}")
+                _remove_download_dir(os.path.dirname(file_path))
         except Exception as e:
             logger.error(f"Error cleaning up file {file_path}: {e}")
 
 
+def _remove_download_dir(directory: str) -> None:
+    """Remove a download's own directory once its last file is gone"""
+    if os.path.dirname(directory) == os.fspath(TEMP_DIR) and directory != os.fspath(CACHE_DIR):
+        with suppress(OSError):  # Still holds other outputs of the job
+            os.rmdir(directory)
+
+
+def schedule_cleanup(file_paths: List[str]) -> None:
+    """
+    Delete temporary files in a worker thread without waiting for it
+    
+    Must be called from within the running event loop.
+    
+    Args:
+        file_paths: List of file paths to delete
+    """
+    task = asyncio.create_task(asyncio.to_thread(cleanup_files, list(file_paths)))
+    _cleanup_tasks.add(task)
+    task.add_done_callback(_cleanup_tasks.discard)
+
+
 def get_file_size(file_path: str) -> int:
     """
     Get file size in bytes
@@ -176,8 +296,7 @@ def is_image(file_path: str) -> bool:
     Returns:
         True if file is an image
     """
-    image_extensions = ["jpg", "jpeg", "png", "webp", "bmp", "tiff", "gif"]
-    return get_file_extension(file_path) in image_extensions
+    return os.path.splitext(file_path)[1].lower() in _IMAGE_EXTS
 
 
 def is_document(file_path: str) -> bool:
@@ -190,8 +309,7 @@ def is_document(file_path: str) -> bool:
     Returns:
         True if file is a document
     """
-    doc_extensions = ["docx", "doc", "txt", "rtf", "odt"]
-    return get_file_extension(file_path) in doc_extensions
+    return os.path.splitext(file_path)[1].lower() in SUPPORTED_DOCUMENT_EXTS
 
 
 def generate_unique_filename(base_name: str, extension: str) -> str:
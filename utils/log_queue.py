@@ -0,0 +1,66 @@
+"""
+Queued Logging
+Moves the root logger's handlers onto a background thread so log calls never block on disk I/O
+"""
+
+import logging
+import multiprocessing
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+# Listener draining the queue, and the queue itself (set by start_queue_logging).
+# A multiprocessing queue, so pool workers can send their records here too.
+_listener: Optional[QueueListener] = None
+_log_queue: Optional[multiprocessing.Queue] = None
+
+
+def start_queue_logging() -> None:
+    """Put the handlers configured on the root logger behind a QueueHandler"""
+    global _listener, _log_queue
+    
+    if _listener is not None:
+        return
+    
+    root = logging.getLogger()
+    handlers = tuple(root.handlers)
+    _log_queue = multiprocessing.Queue()
+    
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(_log_queue))
+    
+    _listener = QueueListener(_log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_queue_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_log_queue() -> Optional[multiprocessing.Queue]:
+    """Get the queue the listener drains (None until start_queue_logging has run)"""
+    return _log_queue
+
+
+def use_queue_logging(log_queue: Optional[multiprocessing.Queue]) -> None:
+    """
+    Send this process's records to the main process's listener
+    
+    Pool workers call this so only the main process writes (and rotates) the
+    log file; several processes rotating the same file lose records.
+    
+    Args:
+        log_queue: Queue from get_log_queue() in the main process
+    """
+    if log_queue is None:
+        return
+    
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
\ No newline at end of file
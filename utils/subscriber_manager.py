@@ -2,13 +2,26 @@
 Subscriber Management
 """
 
+import asyncio
 import json
 import logging
-from typing import List
+import os
+from typing import List, Optional, Set
 from config.settings import SUBSCRIBERS_FILE
 
 logger = logging.getLogger(__name__)
 
+# Flush queued changes after this many, or after this many seconds
+FLUSH_BATCH_SIZE = 128
+FLUSH_INTERVAL = 0.25
+
+# In-memory subscriber set (source of truth once loaded)
+_subscribers: Optional[Set[int]] = None
+
+# Write-behind queue and its flusher task (set by start_subscriber_flusher)
+_pending: Optional[asyncio.Queue] = None
+_flusher_task: Optional[asyncio.Task] = None
+
 
 def _load_subscribers() -> List[int]:
     """Load subscribers from file"""
@@ -25,15 +38,86 @@ def _load_subscribers() -> List[int]:
 
 
 def _save_subscribers(subscribers: List[int]) -> None:
-    """Save subscribers to file"""
+    """Save subscribers to file (atomically, via a temp file)"""
     try:
         SUBSCRIBERS_FILE.parent.mkdir(exist_ok=True)
-        with open(SUBSCRIBERS_FILE, 'w', encoding='utf-8') as f:
+        tmp_file = SUBSCRIBERS_FILE.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
             json.dump(subscribers, f)
+        os.replace(tmp_file, SUBSCRIBERS_FILE)
     except Exception as e:
         logger.error(f"Error saving subscribers: {e}")
 
 
+def _get_subscribers() -> Set[int]:
+    """Get the in-memory subscriber set, loading it from file on first use"""
+    global _subscribers
+    if _subscribers is None:
+        _subscribers = set(_load_subscribers())
+    return _subscribers
+
+
+def _schedule_save(op: str, user_id: int) -> None:
+    """Queue a change for the background flusher, or save now if it isn't running"""
+    if _pending is None:
+        _save_subscribers(sorted(_get_subscribers()))
+    else:
+        _pending.put_nowait((op, user_id))
+
+
+async def _subscriber_flusher() -> None:
+    """Write queued subscriber changes to disk in batches"""
+    loop = asyncio.get_running_loop()
+    
+    while True:
+        await _pending.get()
+        batch_size = 1
+        deadline = loop.time() + FLUSH_INTERVAL
+        
+        # Coalesce everything that arrives within the flush window
+        while batch_size < FLUSH_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                await asyncio.wait_for(_pending.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch_size += 1
+        
+        await asyncio.to_thread(_save_subscribers, sorted(_get_subscribers()))
+        logger.debug(f"Flushed {batch_size} subscriber change(s)")
+
+
+async def start_subscriber_flusher() -> None:
+    """Start batching subscriber writes (call once the event loop is running)"""
+    global _pending, _flusher_task
+    if _flusher_task is not None:
+        return
+    
+    _get_subscribers()
+    _pending = asyncio.Queue()
+    _flusher_task = asyncio.create_task(_subscriber_flusher())
+
+
+async def stop_subscriber_flusher() -> None:
+    """Stop the background flusher and persist any unsaved changes"""
+    global _pending, _flusher_task
+    if _flusher_task is None:
+        return
+    
+    _flusher_task.cancel()
+    try:
+        await _flusher_task
+    except asyncio.CancelledError:
+        pass
+    
+    # Always write: a flusher cancelled mid-batch has already dequeued its changes
+    _save_subscribers(sorted(_get_subscribers()))
+    _pending = None
+    _flusher_task = None
+
+
 def add_subscriber(user_id: int) -> bool:
     """
     Add a user to subscribers
@@ -44,13 +128,13 @@ def add_subscriber(user_id: int) -> bool:
     Returns:
         True if added, False if already subscribed
     """
-    subscribers = _load_subscribers()
+    subscribers = _get_subscribers()
     
     if user_id in subscribers:
         return False
     
-    subscribers.append(user_id)
-    _save_subscribers(subscribers)
+    subscribers.add(user_id)
+    _schedule_save("add", user_id)
     logger.info(f"Added subscriber: {user_id}")
     return True
 
@@ -65,13 +149,13 @@ def remove_subscriber(user_id: int) -> bool:
     Returns:
         True if removed, False if not subscribed
     """
-    subscribers = _load_subscribers()
+    subscribers = _get_subscribers()
     
     if user_id not in subscribers:
         return False
     
-    subscribers = [s for s in subscribers if s != user_id]
-    _save_subscribers(subscribers)
+    subscribers.discard(user_id)
+    _schedule_save("remove", user_id)
     logger.info(f"Removed subscriber: {user_id}")
     return True
 
@@ -86,8 +170,7 @@ def is_subscribed(user_id: int) -> bool:
     Returns:
         True if subscribed
     """
-    subscribers = _load_subscribers()
-    return user_id in subscribers
+    return user_id in _get_subscribers()
 
 
 def list_subscribers() -> List[int]:
@@ -97,7 +180,7 @@ def list_subscribers() -> List[int]:
     Returns:
         List of subscriber user IDs
     """
-    return _load_subscribers()
+    return sorted(_get_subscribers())
 
 
 def get_subscriber_count() -> int:
@@ -107,7 +190,7 @@ def get_subscriber_count() -> int:
     Returns:
         Number of subscribers
     """
-    return len(_load_subscribers())
+    return len(_get_subscribers())
 
 
 async def notify_subscribers(bot, text: str) -> int:
@@ -121,7 +204,7 @@ async def notify_subscribers(bot, text: str) -> int:
     Returns:
         Number of successful deliveries
     """
-    subscribers = _load_subscribers()
+    subscribers = list_subscribers()
     success_count = 0
     
     for user_id in subscribers:
@@ -0,0 +1,45 @@
+"""
+Startup Warm-up
+Imports the heavy optional libraries the services load lazily, so the first user of a feature doesn't pay for it
+"""
+
+import importlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Libraries imported inside service functions (missing optional ones are skipped)
+WARMUP_MODULES = (
+    "PIL.Image",
+    "pypdf",
+    "fpdf",
+    "fitz",
+    "reportlab.pdfgen.canvas",
+    "reportlab.lib.pagesizes",
+    "pdf2image",
+    "pytesseract",
+    "ocrmypdf",
+    "pdf2docx",
+    "pdfplumber",
+)
+
+
+def warmup() -> None:
+    """Import service libraries and initialise Pillow's format plugins"""
+    loaded = []
+    for name in WARMUP_MODULES:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except ImportError:
+            continue
+        except Exception as e:
+            logger.warning(f"Warm-up import of {name} failed: {e}")
+    
+    try:
+        from PIL import Image
+        Image.init()
+    except ImportError:
+        pass
+    
+    logger.debug(f"Warmed up: {', '.join(loaded)}")
\ No newline at end of file